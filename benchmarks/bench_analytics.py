@@ -0,0 +1,93 @@
+"""
+Cost of the intake analytics counters: what the triggers add to each save, and how long
+the dashboard's read takes against aggregating a full scan of the profiles.
+
+Inserts --profiles profiles into SQLite stores with and without the analytics triggers,
+then applies --updates delta revisions. Dashboard reads are timed as load_analytics()
+against recomputing the same counts from iter_rows(), which is what answering the
+questions took before.
+
+Usage:
+    python -m benchmarks.bench_analytics [--profiles 100000] [--updates 5000]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from collections import Counter
+from benchmarks.bench_storage import make_profile
+from src.services.analytics import ANALYTICS_COLUMNS, analytics_keys
+from src.storage.sqlite_store import SQLiteProfileStore
+
+DIETS = ["I don't follow a specific diet", "Vegetarian", "Vegan", "Keto", "Mediterranean"]
+GOALS = ["Improve Energy", "Better Sleep", "Heart Health", "Immune Support", "Stress Relief", "Joint Health"]
+
+def make_row(i, rng):
+    row = make_profile(i)
+    row.update(diet=rng.choice(DIETS), stress_level=rng.choice(["Low", "Moderate", "High"]),
+               health_goals=rng.sample(GOALS, 2), allergies=rng.sample(["Peanuts", "Penicillin", "Shellfish"], 1))
+    return row
+
+def drop_triggers(store):
+    conn = store._connection()
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%analytics%'").fetchall():
+        conn.execute(f"DROP TRIGGER {name}")
+
+def run(path, rows, updates, triggers, rng):
+    store = SQLiteProfileStore(path)
+    if not triggers:
+        drop_triggers(store)
+    started = time.perf_counter()
+    for start in range(0, len(rows), 500):
+        store.insert_profiles(rows[start:start + 500])
+    insert_seconds = time.perf_counter() - started
+
+    update_times = []
+    for _ in range(updates):
+        user_id = rng.choice(rows)["user_id"]
+        changes = {"diet": rng.choice(DIETS), "health_goals": rng.sample(GOALS, 2)}
+        started = time.perf_counter()
+        store.append_revision(user_id, changes, uuid.uuid4().hex)
+        update_times.append(time.perf_counter() - started)
+    return store, insert_seconds, statistics.median(update_times)
+
+def best_of(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--updates", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    rows = [make_row(i, rng) for i in range(args.profiles)]
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, plain_insert, plain_update = run(os.path.join(tmp, "plain.db"), rows, args.updates, False, random.Random(4))
+        plain.close()
+        store, insert, update = run(os.path.join(tmp, "analytics.db"), rows, args.updates, True, random.Random(4))
+
+        read_seconds, counters = best_of(5, store.load_analytics)
+        scan_seconds, scanned = best_of(1, lambda: Counter(
+            key for row in store.iter_rows(latest_only=True, columns=ANALYTICS_COLUMNS) for key in analytics_keys(row)))
+        mismatched = sum(1 for key in counters.keys() | scanned.keys() if counters.get(key, 0) != scanned.get(key, 0))
+        store.close()
+
+    print(f"{args.profiles} profiles, {args.updates} updates")
+    print(f"  insert: {plain_insert / args.profiles * 1e6:.1f}us/profile without counters, "
+          f"{insert / args.profiles * 1e6:.1f}us with")
+    print(f"  update p50: {plain_update * 1e3:.3f}ms without counters, {update * 1e3:.3f}ms with")
+    print(f"  dashboard read: {read_seconds * 1e3:.2f}ms for {len(counters)} counters; "
+          f"full scan: {scan_seconds * 1e3:.0f}ms")
+    print(f"  counters differing from the full scan: {mismatched}")
+
+if __name__ == "__main__":
+    main()
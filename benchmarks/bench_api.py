@@ -0,0 +1,167 @@
+"""
+Load test for the intake API: starts uvicorn against a local SQLite database (or
+targets --url), seeds profiles, then drives a create/load/update/recover mix from
+concurrent async clients and reports requests/sec and latency percentiles.
+
+Needs the benchmark requirements (pip install -r benchmarks/requirements.txt).
+
+Usage:
+    python -m benchmarks.bench_api [--workers N] [--concurrency 64] [--duration 20] [--seed 500]
+    python -m benchmarks.bench_api --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+import aiohttp
+
+QUESTIONS = ("What is your favorite color?", "What city were you born in?", "What is your pet's name?")
+MIX = (("load", 0.6), ("recover", 0.15), ("create", 0.15), ("update", 0.1))
+
+def make_body(i):
+    return {
+        "age_range": random.choice(["18-24", "25-34", "35-44", "45-54"]),
+        "sex": random.choice(["Male", "Female"]),
+        "height_ft": 5, "height_in": i % 12, "weight_lbs": 120 + i % 100,
+        "medical_conditions": random.sample(["Asthma", "Diabetes", "Hypertension", "Migraine"], 2),
+        "current_medications": ["Metformin 500mg"],
+        "natural_supplements": ["fish oil", "vitamin d3"],
+        "health_goals": ["Improve Energy"],
+        "additional_info": "load test",
+        **{f"security_question_{n}": QUESTIONS[n - 1] for n in (1, 2, 3)},
+        **{f"security_answer_{n}": f"answer-{n}-{i}" for n in (1, 2, 3)},
+    }
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def wait_for(client, url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with client.get(f"{url}/health") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"API at {url} did not start")
+
+async def request(client, url, op, profiles, counter) -> int:
+    """Sends one request of the given kind and returns the status code once the body is read."""
+    if op == "load":
+        code, _ = random.choice(profiles)
+        call = client.get(f"{url}/profiles/{code}")
+    elif op == "recover":
+        _, body = random.choice(profiles)
+        call = client.post(f"{url}/profiles/recover",
+                           json={k: v for k, v in body.items() if k.startswith("security_")})
+    elif op == "update":
+        code, _ = random.choice(profiles)
+        call = client.put(f"{url}/profiles/{code}", json={"weight_lbs": random.randint(100, 250)})
+    else:
+        counter[0] += 1
+        call = client.post(f"{url}/profiles", json=make_body(counter[0]))
+    async with call as response:
+        await response.read()
+        return response.status
+
+async def run_load(url, profiles, concurrency, duration):
+    timings = defaultdict(list)
+    failures = defaultdict(int)
+    counter = [len(profiles)]
+    ops, weights = zip(*MIX)
+    deadline = time.monotonic() + duration
+    # aiohttp rather than httpx: httpx's pool tops out near 100 requests/sec at 64
+    # concurrent connections on a small machine, which would measure the client
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency),
+                                     timeout=aiohttp.ClientTimeout(total=30)) as client:
+        async def worker():
+            while time.monotonic() < deadline:
+                op = random.choices(ops, weights)[0]
+                started = time.perf_counter()
+                try:
+                    ok = await request(client, url, op, profiles, counter) < 300
+                except aiohttp.ClientError:
+                    ok = False
+                elapsed = (time.perf_counter() - started) * 1000
+                if ok:
+                    timings[op].append(elapsed)
+                else:
+                    failures[op] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in timings.values())
+    everything = [value for values in timings.values() for value in values]
+    print(f"{total / elapsed:,.0f} requests/sec over {elapsed:.1f}s, p50 {percentile(everything, 0.5):.1f}ms, "
+          f"p99 {percentile(everything, 0.99):.1f}ms")
+    for op in ops:
+        values = timings[op]
+        if values:
+            print(f"  {op:<8} {len(values) / elapsed:>8,.0f}/s  p50 {percentile(values, 0.5):6.1f}ms  "
+                  f"p99 {percentile(values, 0.99):6.1f}ms  failures {failures[op]}")
+
+async def seed(url, count, concurrency):
+    profiles = []
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as client:
+        await wait_for(client, url)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create(i):
+            body = make_body(i)
+            async with semaphore, client.post(f"{url}/profiles", json=body) as response:
+                response.raise_for_status()
+                profiles.append(((await response.json())["user_id"], body))
+
+        await asyncio.gather(*(create(i) for i in range(count)))
+    return profiles
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="test a running API instead of starting one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=500, help="profiles created before the run")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    tmp = tempfile.TemporaryDirectory()
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        env = dict(os.environ, STORAGE_BACKEND="sqlite", SQLITE_PATH=os.path.join(tmp.name, "profiles.db"))
+        env.setdefault("RECOVERY_KEY_SECRET", "benchmark")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.api.app:app", "--port", str(port), "--workers",
+             str(args.workers), "--log-level", "warning", "--no-access-log"],
+            env=env,
+        )
+    try:
+        profiles = asyncio.run(seed(url, args.seed, args.concurrency))
+        print(f"seeded {len(profiles)} profiles")
+        asyncio.run(run_load(url, profiles, args.concurrency, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
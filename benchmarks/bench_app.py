@@ -0,0 +1,247 @@
+"""
+Headless load test of the Streamlit app with AppTest, against a local SQLite store.
+
+Each simulated user makes three visits: creating a profile; loading it by code and
+updating it; and recovering the code from the security questions. Every rerun is
+timed as a whole and per form section, and peak Python memory per visit is measured
+in a separate tracemalloc pass. Results are written as JSON and checked against the
+thresholds file; the exit status is 1 if any threshold is exceeded.
+
+Usage:
+    python -m benchmarks.bench_app [--users 200] [--processes N] [--output bench_app_results.json]
+                                   [--thresholds benchmarks/app_thresholds.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from multiprocessing import Pool
+from src.utils.fragment_utils import SECTION_TIMINGS_KEY
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+RETURNING = "Yes, I have filled out the intake form before"
+CODE_PATTERN = re.compile(r"Profile Code is: ([A-Za-z0-9]{3}-[A-Za-z0-9]{3}-[A-Za-z0-9]{3})")
+
+class Visit:
+    """One browser session: an AppTest instance whose reruns are timed step by step."""
+
+    def __init__(self, samples):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file(APP_FILE, default_timeout=60)
+        self.samples = samples
+
+    def run(self, step):
+        self.app.session_state[SECTION_TIMINGS_KEY] = {}
+        started = time.perf_counter()
+        self.app.run()
+        elapsed = time.perf_counter() - started
+        if self.app.exception:
+            raise RuntimeError(f"{step}: {self.app.exception[0].value}")
+        sections = self.app.session_state[SECTION_TIMINGS_KEY] if SECTION_TIMINGS_KEY in self.app.session_state else {}
+        self.samples.append({"step": step, "seconds": elapsed, "sections": dict(sections)})
+
+    def text(self):
+        return " ".join(str(element.value) for element in [*self.app.header, *self.app.success, *self.app.markdown])
+
+def answers(user):
+    return {f"security_answer_{n}": f"answer {n} for user {user}" for n in (1, 2, 3)}
+
+def new_profile(user, samples):
+    visit = Visit(samples)
+    visit.run("open")
+    visit.app.text_input(key="weight_lbs").input(str(random.randint(110, 240)))
+    visit.app.text_area(key="medical_conditions").input("high blood pressure, migrains")
+    visit.app.text_area(key="current_medications").input("lisinopril 10mg daily")
+    visit.app.text_area(key="natural_supplements").input("fish oil, vitamin d3")
+    for key, value in answers(user).items():
+        visit.app.text_input(key=key).input(value)
+    visit.app.button(key="create_profile").click()
+    visit.run("create")
+    match = CODE_PATTERN.search(visit.text())
+    if not match:
+        raise RuntimeError("create: no profile code shown")
+    return match.group(1)
+
+def load_and_update(code, samples):
+    visit = Visit(samples)
+    visit.run("open")
+    visit.app.radio(key="user_status").set_value(RETURNING)
+    visit.run("returning")
+    visit.app.text_input(key="load_user_id").input(code)
+    visit.app.button(key="load_profile").click()
+    visit.run("load")
+    visit.app.text_input(key="weight_lbs").input(str(random.randint(110, 240)))
+    visit.app.button(key="create_profile").click()
+    visit.run("update")
+    if "updated successfully" not in visit.text():
+        raise RuntimeError("update: no confirmation shown")
+
+def recover(user, code, samples):
+    visit = Visit(samples)
+    visit.run("open")
+    visit.app.radio(key="user_status").set_value(RETURNING)
+    visit.run("returning")
+    visit.app.button(key="forgot_code").click()
+    visit.run("forgot_code")
+    for key, value in answers(user).items():
+        visit.app.text_input(key=key).input(value)
+    visit.app.button(key="recover_code").click()
+    visit.run("recover")
+    if code not in visit.text():
+        raise RuntimeError("recover: profile code not shown")
+
+def journey(user, samples):
+    code = new_profile(user, samples)
+    load_and_update(code, samples)
+    recover(user, code, samples)
+
+def run_users(users):
+    """Worker entry point: runs one unrecorded warm-up journey, then the given users."""
+    journey(f"warmup-{os.getpid()}", [])
+    samples, failures = [], []
+    for user in users:
+        try:
+            journey(user, samples)
+        except Exception as e:
+            failures.append(f"user {user}: {e}")
+    return samples, failures
+
+def measure_memory(users):
+    """Peak traced allocation per visit, in MB; run apart from the timing pass because tracing is slow."""
+    journey("memory-warmup", [])
+    peaks = []
+    for user in users:
+        tracemalloc.start()
+        code = new_profile(user, [])
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        load_and_update(code, [])
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return [peak / 1e6 for peak in peaks]
+
+def percentiles(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": round(statistics.median(values) * 1000, 2),
+        "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2),
+    }
+
+def summarize(samples, elapsed, users, processes, memory, failures):
+    steps, sections = defaultdict(list), defaultdict(list)
+    for sample in samples:
+        steps[sample["step"]].append(sample["seconds"])
+        for name, seconds in sample["sections"].items():
+            sections[name].append(seconds)
+    return {
+        "environment": {"python": platform.python_version(), "cpus": os.cpu_count(), "processes": processes},
+        "users": users,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 2),
+        "throughput": {
+            "users_per_s": round(users / elapsed, 3),
+            "reruns_per_s": round(len(samples) / elapsed, 2),
+        },
+        "reruns": {step: percentiles(values) for step, values in steps.items()},
+        "sections": {name: percentiles(values) for name, values in sections.items()},
+        "memory_mb": {
+            "peak_per_visit_max": round(max(memory), 2) if memory else None,
+            "peak_per_visit_median": round(statistics.median(memory), 2) if memory else None,
+        },
+    }
+
+def check_thresholds(results, thresholds):
+    """Returns a message for every threshold the results exceed."""
+    problems = []
+    if results["failures"] and not thresholds.get("allow_failures", False):
+        problems.append(f"{len(results['failures'])} failed journeys")
+    for step, limit in thresholds.get("rerun_p95_ms", {}).items():
+        actual = results["reruns"].get(step, {}).get("p95_ms")
+        if actual is not None and actual > limit:
+            problems.append(f"rerun '{step}' p95 {actual}ms > {limit}ms")
+    section_limits = thresholds.get("section_p95_ms", {})
+    for name, stats in results["sections"].items():
+        limit = section_limits.get(name, section_limits.get("default"))
+        if limit is not None and stats["p95_ms"] > limit:
+            problems.append(f"section '{name}' p95 {stats['p95_ms']}ms > {limit}ms")
+    memory_limit = thresholds.get("peak_memory_per_visit_mb")
+    peak = results["memory_mb"]["peak_per_visit_max"]
+    if memory_limit is not None and peak is not None and peak > memory_limit:
+        problems.append(f"peak memory per visit {peak}MB > {memory_limit}MB")
+    minimum = thresholds.get("min_users_per_s")
+    if minimum is not None and results["throughput"]["users_per_s"] < minimum:
+        problems.append(f"throughput {results['throughput']['users_per_s']} users/s < {minimum}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--memory-users", type=int, default=3, help="users measured in the tracemalloc pass")
+    parser.add_argument("--output", default="bench_app_results.json")
+    parser.add_argument("--thresholds", default=os.path.join(os.path.dirname(__file__), "app_thresholds.json"))
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    # Read by init_connection() in every worker, so each AppTest session uses the local store
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(tmp.name, "profiles.db")
+    os.environ["PROFILE_WRITE_BEHIND"] = ""
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["DRAFT_STORE_PATH"] = os.path.join(tmp.name, "drafts.db")
+    os.environ.setdefault("RECOVERY_KEY_SECRET", "benchmark")
+    # Every AppTest session has the same session id, so the per-session limit would
+    # throttle the simulated users as if they were one
+    os.environ.setdefault("GUARD_SESSION_PER_MINUTE", "1000000")
+    os.environ.setdefault("GUARD_SESSION_BURST", "1000000")
+
+    # AppTest replaces sys.modules["__main__"] while a script runs, so sessions only
+    # ever run in worker processes, where the functions pickled by name still resolve
+    memory = []
+    if args.memory_users:
+        with Pool(1) as pool:
+            memory = pool.apply(measure_memory, ([f"memory-{i}" for i in range(args.memory_users)],))
+
+    users = list(range(args.users))
+    chunks = [users[i::args.processes] for i in range(args.processes)]
+    started = time.perf_counter()
+    with Pool(args.processes) as pool:
+        outcomes = pool.map(run_users, chunks)
+    elapsed = time.perf_counter() - started
+    samples = [sample for chunk_samples, _ in outcomes for sample in chunk_samples]
+    failures = [failure for _, chunk_failures in outcomes for failure in chunk_failures]
+    tmp.cleanup()
+
+    results = summarize(samples, elapsed, args.users, args.processes, memory, failures)
+    thresholds = {}
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+    results["threshold_violations"] = check_thresholds(results, thresholds)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{args.users} users in {elapsed:.1f}s: {results['throughput']['users_per_s']} users/s, "
+          f"{results['throughput']['reruns_per_s']} reruns/s, {len(failures)} failures")
+    for step, stats in results["reruns"].items():
+        print(f"  rerun {step:<12} p50 {stats['p50_ms']:8.1f}ms  p95 {stats['p95_ms']:8.1f}ms")
+    for name, stats in sorted(results["sections"].items()):
+        print(f"  section {name:<28} p50 {stats['p50_ms']:6.2f}ms  p95 {stats['p95_ms']:6.2f}ms")
+    print(f"  peak memory per visit: {results['memory_mb']['peak_per_visit_max']} MB")
+    for problem in results["threshold_violations"]:
+        print(f"THRESHOLD EXCEEDED: {problem}")
+    print(f"results written to {args.output}")
+    sys.exit(1 if results["threshold_violations"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Page latency of the staff profile browser at increasing depth.
+
+Loads --profiles profiles into a SQLite store, walks every page of the browser with
+keyset pagination, unfiltered and filtered by medication and health goal, and reports
+the latency of pages 1, 10, 100, 1,000 and 10,000 where they exist, next to the same
+page fetched with LIMIT/OFFSET. Every walk is checked against a brute-force filter of
+the profiles.
+
+Usage:
+    python -m benchmarks.bench_browse [--profiles 250000] [--page-size 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from benchmarks.bench_storage import make_profile
+from src.storage.base import BROWSE_COLUMNS
+from src.storage.sqlite_store import SQLiteProfileStore
+
+MEDICATIONS = ["Metformin", "Lisinopril", "Atorvastatin", "Levothyroxine", "Sertraline", "Omeprazole"]
+GOALS = ["Support Heart Health", "Improve Energy", "Better Sleep", "Immune Support", "Stress Relief"]
+FILTERS = {
+    "unfiltered": {},
+    "metformin": {"current_medications": ["Metformin"]},
+    "metformin + heart health": {"current_medications": ["Metformin"], "health_goals": ["Support Heart Health"]},
+}
+PAGES = (1, 10, 100, 1000, 10000)
+
+def make_row(i, rng):
+    row = make_profile(i)
+    row.update(current_medications=rng.sample(MEDICATIONS, rng.randint(0, 2)), health_goals=rng.sample(GOALS, 2),
+               created_at=f"2026-01-01T00:00:00.{i:06d}+00:00")
+    return row
+
+def offset_page(store, filters, page, page_size):
+    """The same page with LIMIT/OFFSET over user_profiles_latest, as a naive browser would fetch it."""
+    conditions = " AND ".join(
+        f"EXISTS (SELECT 1 FROM json_each({column}) WHERE value = ?)" for column, values in filters.items() for _ in values)
+    sql = (f"SELECT {', '.join(BROWSE_COLUMNS)} FROM user_profiles_latest {'WHERE ' + conditions if conditions else ''} "
+           f"ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?")
+    params = [value for values in filters.values() for value in values] + [page_size, (page - 1) * page_size]
+    return store._connection().execute(sql, params).fetchall()
+
+def timed(fn, repeats=20):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=250000)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    rows = [make_row(i, rng) for i in range(args.profiles)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteProfileStore(os.path.join(tmp, "browse.db"))
+        started = time.perf_counter()
+        for start in range(0, len(rows), 1000):
+            store.insert_profiles(rows[start:start + 1000])
+        print(f"{args.profiles} profiles loaded in {time.perf_counter() - started:.1f}s, page size {args.page_size}")
+        print(f"{'filter':<26} {'matches':>8} {'page':>6} {'keyset':>9} {'offset':>9}")
+
+        for name, filters in FILTERS.items():
+            expected = [row["user_id"] for row in reversed(rows)
+                        if all(set(values) <= set(row[column]) for column, values in filters.items())]
+            cursors, seen = [None], []
+            while True:
+                page = store.browse(filters, cursors[-1], args.page_size)
+                seen.extend(row["user_id"] for row in page)
+                if len(page) < args.page_size:
+                    break
+                cursors.append((page[-1]["created_at"], page[-1]["id"]))
+            if seen != expected:
+                print(f"{name}: browse returned {len(seen)} profiles, expected {len(expected)}")
+            for number in PAGES:
+                if number > len(cursors):
+                    break
+                keyset = timed(lambda: store.browse(filters, cursors[number - 1], args.page_size))
+                offset = timed(lambda: offset_page(store, filters, number, args.page_size), repeats=3)
+                print(f"{name:<26} {len(expected):>8} {number:>6} {keyset:>7.3f}ms {offset:>7.1f}ms")
+        store.close()
+
+if __name__ == "__main__":
+    main()
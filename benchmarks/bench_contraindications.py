@@ -0,0 +1,71 @@
+"""
+Scores profiles against a synthetic product catalog with the bitset contraindication
+engine: compile time, single-profile latency and batched throughput.
+
+Usage:
+    python -m benchmarks.bench_contraindications [--products 50000] [--profiles 5000]
+"""
+import argparse
+import random
+import statistics
+import time
+from src.config.vocabulary import VOCABULARY
+from src.services.contraindications import ContraindicationEngine
+
+CONDITIONS = list(VOCABULARY["condition"])
+SUBSTANCES = list(VOCABULARY["medication"]) + list(VOCABULARY["supplement"])
+ALLERGENS = list(VOCABULARY["allergen"])
+
+def make_catalog(size):
+    return [{
+        "product_id": f"prod-{i}",
+        "contraindicated_conditions": random.sample(CONDITIONS, random.randint(0, 3)),
+        "interacting_medications": random.sample(SUBSTANCES, random.randint(0, 4)),
+        "contraindicated_allergens": random.sample(ALLERGENS, random.randint(0, 1)),
+        "avoid_when_pregnant": random.random() < 0.2,
+    } for i in range(size)]
+
+def make_profile():
+    return {
+        "medical_conditions": random.sample(CONDITIONS, random.randint(0, 2)),
+        "current_medications": [f"{m} 10mg daily" for m in random.sample(SUBSTANCES, random.randint(0, 3))],
+        "natural_supplements": random.sample(SUBSTANCES, random.randint(0, 2)),
+        "allergies": random.sample(ALLERGENS, random.randint(0, 1)),
+        "pregnant_or_breastfeeding": random.choice(["No", "Yes", "Not Applicable"]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--profiles", type=int, default=5_000)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.products)
+    started = time.perf_counter()
+    engine = ContraindicationEngine(catalog)
+    print(f"compile: {args.products} products, {len(engine.feature_index)} features in "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms")
+
+    profiles = [make_profile() for _ in range(args.profiles)]
+    encoded = [engine.encode(profile) for profile in profiles]
+    timings = []
+    for features in encoded:
+        started = time.perf_counter()
+        ~engine.unsafe_bits(features) & engine.catalog_mask
+        timings.append(time.perf_counter() - started)
+    print(f"single (pre-encoded): p50 {statistics.median(timings) * 1e6:.1f} us")
+
+    timings = []
+    for profile in profiles[:1000]:
+        started = time.perf_counter()
+        engine.safe_bits(profile)
+        timings.append(time.perf_counter() - started)
+    print(f"single (encode + score): p50 {statistics.median(timings) * 1e6:.1f} us")
+
+    started = time.perf_counter()
+    engine.batch_safe_bits(profiles)
+    elapsed = time.perf_counter() - started
+    print(f"batch: {args.profiles} profiles in {elapsed * 1000:.0f} ms ({args.profiles / elapsed:,.0f} profiles/sec)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Write volume and restore latency of form draft autosave.
+
+Replays simulated sessions filling in the intake form: every rerun that changes a field
+is an edit, with short gaps while a field is being edited and longer pauses between
+fields. Edits go through DraftAutosaver (debounced, coalescing patches) and, for
+comparison, through a naive autosave that writes the whole form on every rerun. The
+timeline is compressed by --speedup, and the debounce with it. Restore latency is
+measured on a store holding --drafts drafts.
+
+Usage:
+    python -m benchmarks.bench_drafts [--sessions 200] [--speedup 20] [--drafts 10000]
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from src.config.form_defaults import FORM_FIELDS
+from src.storage.draft_store import DraftStore
+from src.utils.draft_utils import EXCLUDED_FIELDS, DraftAutosaver
+
+FIELD_VALUES = {
+    "age_range": ["25-34", "35-44", "45-54"],
+    "weight_lbs": ["1", "16", "165", "165.5"],
+    "physical_activity": ["1-2 days", "5+ days"],
+    "diet": ["Vegetarian", "Keto"],
+    "sleep_quality": ["Poor", "Fair"],
+    "medical_conditions": ["high blood pressure", "high blood pressure, migraines"],
+    "current_medications": ["lisinopril 10mg", "lisinopril 10mg daily, metformin 500mg"],
+    "natural_supplements": ["fish oil", "fish oil, vitamin d3 2000iu"],
+    "allergies": ["penicillin", "penicillin, shellfish"],
+    "health_goals": [["Improve Energy"], ["Improve Energy", "Better Sleep"]],
+    "other_health_goal": ["focus", "focus at work"],
+    "additional_info": ["I work night shifts", "I work night shifts and travel a lot"],
+}
+
+class CountingDraftStore(DraftStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.transactions = 0
+        self.bytes_written = 0
+
+    def save_patches(self, patches):
+        self.transactions += 1
+        self.bytes_written += sum(len(json.dumps(value)) for fields in patches.values() for value in fields.values())
+        return super().save_patches(patches)
+
+def session_edits(rng):
+    """(seconds from session start, field, value) for one user filling in the form."""
+    at = rng.uniform(0, 30)
+    edits = []
+    for field in rng.sample(list(FIELD_VALUES), rng.randint(6, len(FIELD_VALUES))):
+        for value in FIELD_VALUES[field]:
+            at += rng.uniform(0.3, 3.0)
+            edits.append((at, field, value))
+        at += rng.uniform(3.0, 20.0)
+    return edits
+
+def replay(sessions, speedup, debounce, max_delay, path):
+    rng = random.Random(11)
+    timeline = []
+    for session in range(sessions):
+        for at, field, value in session_edits(rng):
+            heapq.heappush(timeline, (at / speedup, f"draft-{session}", field, value))
+
+    store = CountingDraftStore(path)
+    autosaver = DraftAutosaver(store, debounce=debounce / speedup, max_delay=max_delay / speedup).start()
+    forms = {}
+    naive_writes = naive_bytes = edits = 0
+    started = time.perf_counter()
+    while timeline:
+        at, token, field, value = heapq.heappop(timeline)
+        delay = at - (time.perf_counter() - started)
+        if delay > 0:
+            time.sleep(delay)
+        form = forms.setdefault(token, {key: value for key, value in FORM_FIELDS.items() if key not in EXCLUDED_FIELDS})
+        form[field] = value
+        edits += 1
+        naive_writes += 1
+        naive_bytes += len(json.dumps(form))
+        autosaver.record(token, {field: value})
+    autosaver.stop()
+    elapsed = time.perf_counter() - started
+
+    # Every draft must match the form its session ended with
+    mismatched = sum(1 for token, form in forms.items()
+                     if any(form[field] != value for field, value in store.load(token).items()))
+    store.close()
+    return {
+        "edits": edits, "elapsed": elapsed, "naive_writes": naive_writes, "naive_bytes": naive_bytes,
+        "transactions": store.transactions, "fields": autosaver.written_fields, "bytes": store.bytes_written,
+        "mismatched": mismatched,
+    }
+
+def restore_latency(drafts, path, samples=2000):
+    store = DraftStore(path)
+    rng = random.Random(5)
+    batch = {}
+    for i in range(drafts):
+        batch[f"restore-{i}"] = {field: rng.choice(values) for field, values in FIELD_VALUES.items()}
+        if len(batch) == 1000:
+            store.save_patches(batch)
+            batch = {}
+    if batch:
+        store.save_patches(batch)
+    timings = []
+    for _ in range(samples):
+        token = f"restore-{rng.randrange(drafts)}"
+        started = time.perf_counter()
+        store.load(token)
+        timings.append(time.perf_counter() - started)
+    store.close()
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--speedup", type=float, default=20.0, help="how much faster than real time to replay")
+    parser.add_argument("--debounce", type=float, default=2.0, help="seconds, in real time")
+    parser.add_argument("--max-delay", type=float, default=10.0, help="seconds, in real time")
+    parser.add_argument("--drafts", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        result = replay(args.sessions, args.speedup, args.debounce, args.max_delay, os.path.join(tmp, "replay.db"))
+        p50, p99 = restore_latency(args.drafts, os.path.join(tmp, "restore.db"))
+
+    print(f"{args.sessions} sessions, {result['edits']} edits replayed in {result['elapsed']:.1f}s "
+          f"({args.speedup:g}x real time)")
+    print(f"  naive full-form writes: {result['naive_writes']} writes, {result['naive_bytes'] / 1e3:.1f} KB")
+    print(f"  debounced patches:      {result['transactions']} transactions, {result['fields']} fields, "
+          f"{result['bytes'] / 1e3:.1f} KB")
+    print(f"  fields per edit: {result['fields'] / result['edits']:.2f}, "
+          f"bytes saved: {1 - result['bytes'] / result['naive_bytes']:.1%}, "
+          f"drafts not matching their form: {result['mismatched']}")
+    print(f"  restore from {args.drafts} drafts: p50 {p50 * 1e3:.3f}ms, p99 {p99 * 1e3:.3f}ms")
+
+if __name__ == "__main__":
+    main()
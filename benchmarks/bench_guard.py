@@ -0,0 +1,152 @@
+"""
+Database load under bursts and abuse, with and without the profile lookup guard.
+
+Two scenarios against a SQLite store whose lookups are slowed by --db-latency to stand
+in for a network round trip, with the profile cache turned off so every lookup that
+gets through reaches the store:
+
+  herd:  --herd sessions press "Load Profile" for the same code at the same moment,
+         --rounds times. Counts store queries per round.
+  abuse: --attackers threads guess profile codes as fast as they can from --attacker-ips
+         addresses, each guess from a new session, for --seconds, while --users
+         legitimate users each load their own code every two seconds. Reports store
+         queries per second, guesses that reached the store and how the real users fared.
+
+Usage:
+    python -m benchmarks.bench_guard [--seconds 10] [--attackers 8] [--attacker-ips 4] [--users 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+
+os.environ["PROFILE_CACHE_TTL"] = "0"
+os.environ.setdefault("METRICS_PORT", "0")
+
+from benchmarks.bench_storage import make_profile
+from src.storage.sqlite_store import SQLiteProfileStore
+from src.utils.db_utils import load_profile_from_db
+from src.utils.guard_utils import ThrottledError, create_profile_guard, guarded_load_profile
+from src.utils.security_utils import generate_profile_code
+
+class SlowCountingStore(SQLiteProfileStore):
+    def __init__(self, path, latency):
+        super().__init__(path)
+        self.latency = latency
+        self.queries = 0
+        self._count_lock = threading.Lock()
+
+    def load_latest(self, user_id):
+        with self._count_lock:
+            self.queries += 1
+        time.sleep(self.latency)
+        return super().load_latest(user_id)
+
+def lookup(guard, store, user_id, clients):
+    """One click of "Load Profile": the profile, None if not found, or "throttled"."""
+    if guard is None:
+        return load_profile_from_db(store, user_id)
+    try:
+        return guarded_load_profile(guard, store, user_id, clients)
+    except ThrottledError:
+        return "throttled"
+
+def herd(guard, store, code, sessions, rounds):
+    queries = []
+    for _ in range(rounds):
+        before = store.queries
+        barrier = threading.Barrier(sessions)
+        def click(i):
+            barrier.wait()
+            lookup(guard, store, code, {"session": uuid.uuid4().hex, "ip": f"10.1.{i // 250}.{i % 250}"})
+        threads = [threading.Thread(target=click, args=(i,)) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        queries.append(store.queries - before)
+    return statistics.mean(queries)
+
+def abuse(guard, store, codes, seconds, attackers, attacker_ips, users):
+    stop = threading.Event()
+    guesses = []
+    outcomes = {"loaded": 0, "throttled": 0, "missing": 0}
+    latencies = []
+    lock = threading.Lock()
+
+    def attacker(i):
+        made = 0
+        while not stop.is_set():
+            lookup(guard, store, generate_profile_code(), {"session": uuid.uuid4().hex,
+                                                           "ip": f"203.0.113.{i % attacker_ips}"})
+            made += 1
+        with lock:
+            guesses.append(made)
+
+    def user(i):
+        session = uuid.uuid4().hex
+        rng = random.Random(1000 + i)
+        time.sleep(rng.uniform(0, 2))
+        while not stop.is_set():
+            started = time.perf_counter()
+            result = lookup(guard, store, codes[i], {"session": session, "ip": f"198.51.100.{i}"})
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                outcomes["throttled" if result == "throttled" else "loaded" if result else "missing"] += 1
+            stop.wait(2.0)
+
+    threads = [threading.Thread(target=attacker, args=(i,)) for i in range(attackers)]
+    threads += [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    before = store.queries
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        "queries_per_second": (store.queries - before - outcomes["loaded"] - outcomes["missing"]) / seconds,
+        "guesses": sum(guesses),
+        "users": outcomes,
+        "user_p50_ms": statistics.median(latencies) * 1000,
+        "user_p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds added to every store lookup")
+    parser.add_argument("--herd", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--attackers", type=int, default=8)
+    parser.add_argument("--attacker-ips", type=int, default=4)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles = [make_profile(i) for i in range(args.users)]
+        for guarded in (False, True):
+            store = SlowCountingStore(os.path.join(tmp, f"guard-{guarded}.db"), args.db_latency)
+            store.insert_profiles(profiles)
+            name = "guarded" if guarded else "unguarded"
+            guard = create_profile_guard() if guarded else None
+            per_round = herd(guard, store, profiles[0]["user_id"], args.herd, args.rounds)
+            print(f"{name}: {args.herd} simultaneous loads of one code -> {per_round:.1f} store queries per round")
+
+            guard = create_profile_guard() if guarded else None
+            result = abuse(guard, store, [profile["user_id"] for profile in profiles], args.seconds,
+                           args.attackers, args.attacker_ips, args.users)
+            users = result["users"]
+            print(f"{name}: {result['guesses']:,} guesses from {args.attacker_ips} IPs in {args.seconds:g}s, "
+                  f"{result['queries_per_second']:.1f} guess queries/s reached the store")
+            print(f"{' ' * len(name)}  real users: {users['loaded']} loaded, {users['throttled']} throttled, "
+                  f"{users['missing']} not found; p50 {result['user_p50_ms']:.1f}ms, p99 {result['user_p99_ms']:.1f}ms")
+            store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Interaction checks for many concurrent profiles against a local stub service,
+cold and after warm-up, reporting hit rate, coalescing and upstream calls.
+
+Usage:
+    python -m benchmarks.bench_interactions [--profiles 2000] [--threads 32] [--latency 0.05]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.config.vocabulary import VOCABULARY
+from src.services.interactions import InteractionCache, InteractionClient
+from benchmarks.stubs import InteractionHandler, StubServer
+
+COMMON = list(VOCABULARY["medication"])[:12] + list(VOCABULARY["supplement"])[:8]
+
+def make_profile():
+    return random.sample(COMMON, random.randint(2, 5))
+
+def run(client, profiles, threads):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(client.check_substances, profiles))
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub response time in seconds")
+    args = parser.parse_args()
+
+    InteractionHandler.latency = args.latency
+    profiles = [make_profile() for _ in range(args.profiles)]
+    naive_calls = sum(len(p) * (len(p) - 1) // 2 for p in profiles)
+    with StubServer(InteractionHandler) as stub, tempfile.TemporaryDirectory() as tmp:
+        client = InteractionClient(stub.url, InteractionCache(os.path.join(tmp, "cache.db")))
+        for label in ("cold", "warm"):
+            before = stub.requests
+            elapsed = run(client, profiles, args.threads)
+            stats = client.stats()
+            print(f"{label}: {args.profiles / elapsed:,.0f} profiles/sec, {stub.requests - before} upstream calls "
+                  f"(naive: {naive_calls}), hit rate {stats['hit_rate']:.1%}, coalesced {stats['coalesced']}")
+
+if __name__ == "__main__":
+    main()
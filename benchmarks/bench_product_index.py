@@ -0,0 +1,78 @@
+"""
+Product embedding index: build throughput, incremental update cost and top-k query
+latency for profile free text, at several catalog sizes.
+
+Usage:
+    python -m benchmarks.bench_product_index [--sizes 10000 100000] [--queries 1000] [--k 10]
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from benchmarks.stubs import FakeCatalog
+from src.services.product_index import ProductIndex, product_document
+from src.storage.catalog_store import product_record
+
+QUERIES = [
+    "I have trouble sleeping and feel stressed at work",
+    "looking for something for joint pain, I run a lot",
+    "want more energy, always tired in the afternoon",
+    "heart health, my doctor said my cholesterol is high",
+    "immune support during winter, I get colds often",
+    "bloating and digestion issues",
+    "hair and nails are brittle",
+    "I take coq10 already but want better recovery after workouts",
+    "Improve Sleep. magnesium",
+    "Boost Immunity. vitamin d3",
+]
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--changes", type=int, default=500)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        catalog = FakeCatalog(size)
+        products = [product_record(product) for product in catalog.products.values()]
+        with tempfile.TemporaryDirectory() as tmp:
+            index = ProductIndex(tmp)
+            started = time.perf_counter()
+            index.upsert(products)
+            build = time.perf_counter() - started
+
+            changed = random.sample(products, args.changes)
+            for product in changed:
+                product["title"] += " Extra Strength"
+            started = time.perf_counter()
+            index.upsert(changed)
+            update = time.perf_counter() - started
+
+            texts = [random.choice(QUERIES) + f" {i % 50}" for i in range(args.queries)]
+            for label, warm in (("cold", False), ("cached", True)):
+                timings = []
+                for text in texts:
+                    if not warm:
+                        index._embed_query.cache_clear()
+                    started = time.perf_counter()
+                    index.query(text, args.k)
+                    timings.append((time.perf_counter() - started) * 1000)
+                print(f"{size:>7,} products, {label} query embedding: p50 {statistics.median(timings):.2f}ms, "
+                      f"p95 {percentile(timings, 0.95):.2f}ms, p99 {percentile(timings, 0.99):.2f}ms")
+            print(f"{size:>7,} products: built at {size / build:,.0f} products/sec ({build:.1f}s), "
+                  f"{args.changes} re-embedded in {update * 1000:.0f}ms")
+            top = index.query(QUERIES[0], 3)
+            documents = {p["product_id"]: product_document(p) for p in products}
+            print(f"  '{QUERIES[0]}' ->")
+            for product_id, score in top:
+                print(f"    {score:.2f} {documents[product_id][:90]}")
+
+if __name__ == "__main__":
+    main()
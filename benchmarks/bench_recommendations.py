@@ -0,0 +1,105 @@
+"""
+End-to-end recommendation latency through the workflow graph, per node, with the
+analysis nodes chained (as in the project plan) and fanned out, against a stub
+interaction service and a local catalog, product index and rule set.
+
+Usage:
+    python -m benchmarks.bench_recommendations [--products 5000] [--profiles 200] [--latency 0.05] [--concurrency 16]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from benchmarks.stubs import FakeCatalog, InteractionHandler, StubServer
+from src.config.vocabulary import VOCABULARY
+from src.services.contraindications import ContraindicationEngine
+from src.services.interactions import InteractionCache, InteractionClient
+from src.services.product_index import ProductIndex
+from src.services.recommendations import RecommendationWorkflow
+from src.storage.catalog_store import CatalogStore, product_record
+
+GOALS = ["Improve Sleep", "Boost Energy", "Support Immunity", "Joint Health", "Heart Health", "Reduce Stress"]
+
+def make_rules(products, rng):
+    conditions, medications, allergens = (list(VOCABULARY[kind]) for kind in ("condition", "medication", "allergen"))
+    return [{
+        "product_id": product["product_id"],
+        "contraindicated_conditions": rng.sample(conditions, rng.randint(0, 2)),
+        "interacting_medications": rng.sample(medications, rng.randint(0, 2)),
+        "contraindicated_allergens": rng.sample(allergens, rng.randint(0, 1)),
+        "avoid_when_pregnant": rng.random() < 0.2,
+    } for product in products]
+
+def make_profile(i, rng):
+    return {
+        "user_id": f"BEN-{i:03d}-XYZ", "age_range": "35-44", "sex": rng.choice(["Male", "Female"]),
+        "pregnant_or_breastfeeding": rng.choice(["No", "No", "Yes"]),
+        "medical_conditions": rng.sample(list(VOCABULARY["condition"]), rng.randint(0, 2)),
+        "current_medications": rng.sample(list(VOCABULARY["medication"]), rng.randint(0, 3)),
+        "natural_supplements": rng.sample(list(VOCABULARY["supplement"]), rng.randint(0, 2)),
+        "allergies": rng.sample(list(VOCABULARY["allergen"]), rng.randint(0, 1)),
+        "health_goals": rng.sample(GOALS, 2),
+        "additional_info": rng.choice(["", "I have trouble sleeping", "always tired", "sore knees after running"]),
+        "security_question_1": "q1", "security_answer_1": "a",
+        "security_question_2": "q2", "security_answer_2": "b",
+        "security_question_3": "q3", "security_answer_3": "c",
+    }
+
+def report(label, results, elapsed):
+    print(f"{label}: {len(results) / elapsed:,.1f} profiles/sec")
+    nodes = list(results[0]["timings"])
+    for node in nodes:
+        values = sorted(r["timings"][node] * 1000 for r in results if node in r["timings"])
+        print(f"  {node:<18} p50 {statistics.median(values):7.1f}ms  p95 {values[int(len(values) * 0.95)]:7.1f}ms")
+    errors = sum(1 for r in results if r.get("errors"))
+    recommended = statistics.mean(len(r.get("recommendations") or []) for r in results)
+    print(f"  {errors} runs with errors, {recommended:.1f} recommendations per profile")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--profiles", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub interaction service response time")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    InteractionHandler.latency = args.latency
+    catalog = FakeCatalog(args.products)
+    products = [product_record(product) for product in catalog.products.values()]
+    engine = ContraindicationEngine(make_rules(products, rng))
+    profiles = [make_profile(i, rng) for i in range(args.profiles)]
+
+    with StubServer(InteractionHandler) as stub, tempfile.TemporaryDirectory() as tmp:
+        store = CatalogStore(os.path.join(tmp, "catalog.db"))
+        store.apply(catalog.products.values())
+        index = ProductIndex(os.path.join(tmp, "index"))
+        index.upsert(products)
+
+        for label, parallel in (("chained", False), ("fanned out", True)):
+            # A fresh interaction cache per mode so both see the same cold lookups
+            interactions = InteractionClient(stub.url, InteractionCache(os.path.join(tmp, f"{label}.db")))
+            workflow = RecommendationWorkflow(interactions, engine, index, store, parallel=parallel)
+            results = []
+            started = time.perf_counter()
+            for profile in profiles:
+                run_started = time.perf_counter()
+                result = workflow.run(profile)
+                result["timings"]["total"] = time.perf_counter() - run_started
+                results.append(result)
+            report(f"{label}, one profile at a time", results, time.perf_counter() - started)
+
+        interactions = InteractionClient(stub.url, InteractionCache(os.path.join(tmp, "batch.db")))
+        workflow = RecommendationWorkflow(interactions, engine, index, store)
+        started = time.perf_counter()
+        results = workflow.run_batch(profiles, concurrency=args.concurrency)
+        elapsed = time.perf_counter() - started
+        print(f"batch of {len(profiles)} at concurrency {args.concurrency}: {len(profiles) / elapsed:,.1f} profiles/sec")
+        print(f"  {sum(1 for r in results if r.get('errors'))} runs with errors, "
+              f"{interactions.stats()['upstream_calls']} interaction service calls")
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares security-question recovery on an unindexed table (six plaintext equality
+filters + ORDER BY created_at) with a single indexed recovery_key probe.
+
+Usage:
+    python -m benchmarks.bench_recovery_lookup [--sizes 10000 100000 1000000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import time
+from src.config.security_questions import SECURITY_QUESTIONS
+from src.utils.security_utils import compute_recovery_key
+
+os.environ.setdefault("RECOVERY_KEY_SECRET", "benchmark")
+
+def build_table(conn, size):
+    conn.execute("DROP TABLE IF EXISTS user_profiles")
+    conn.execute("""
+        CREATE TABLE user_profiles (
+            id INTEGER PRIMARY KEY, user_id TEXT,
+            security_question_1 TEXT, security_answer_1 TEXT,
+            security_question_2 TEXT, security_answer_2 TEXT,
+            security_question_3 TEXT, security_answer_3 TEXT,
+            recovery_key TEXT, created_at REAL
+        )
+    """)
+    rows = []
+    for i in range(size):
+        questions = random.sample(SECURITY_QUESTIONS, 3)
+        row = {
+            "user_id": f"u{i}",
+            "security_question_1": questions[0], "security_answer_1": f"answer-{i}-1",
+            "security_question_2": questions[1], "security_answer_2": f"answer-{i}-2",
+            "security_question_3": questions[2], "security_answer_3": f"answer-{i}-3",
+        }
+        row["recovery_key"] = compute_recovery_key(row)
+        row["created_at"] = float(i)
+        rows.append(row)
+    conn.executemany(
+        "INSERT INTO user_profiles (user_id, security_question_1, security_answer_1, security_question_2, "
+        "security_answer_2, security_question_3, security_answer_3, recovery_key, created_at) VALUES "
+        "(:user_id, :security_question_1, :security_answer_1, :security_question_2, :security_answer_2, "
+        ":security_question_3, :security_answer_3, :recovery_key, :created_at)",
+        rows,
+    )
+    conn.execute("CREATE INDEX idx_recovery_key ON user_profiles (recovery_key, created_at DESC)")
+    return rows
+
+def time_queries(conn, sql, params_list):
+    timings = []
+    for params in params_list:
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchone()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), max(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(":memory:")
+    plaintext_sql = (
+        "SELECT * FROM user_profiles WHERE security_question_1 = ? AND security_answer_1 = ? "
+        "AND security_question_2 = ? AND security_answer_2 = ? AND security_question_3 = ? "
+        "AND security_answer_3 = ? ORDER BY created_at DESC LIMIT 1"
+    )
+    key_sql = "SELECT * FROM user_profiles WHERE recovery_key = ? ORDER BY created_at DESC LIMIT 1"
+    print(f"{'rows':>10} {'plaintext p50 ms':>18} {'recovery_key p50 ms':>20} {'speedup':>9}")
+    for size in args.sizes:
+        rows = build_table(conn, size)
+        sample = random.sample(rows, min(args.queries, size))
+        plaintext_params = [
+            tuple(row[f] for f in (
+                "security_question_1", "security_answer_1", "security_question_2",
+                "security_answer_2", "security_question_3", "security_answer_3",
+            ))
+            for row in sample
+        ]
+        # The plaintext scan is slow at large sizes, so it gets a smaller sample
+        plaintext_p50, _ = time_queries(conn, plaintext_sql, plaintext_params[:20])
+        key_p50, _ = time_queries(conn, key_sql, [(compute_recovery_key(row),) for row in sample])
+        print(f"{size:>10} {plaintext_p50:>18.3f} {key_p50:>20.4f} {plaintext_p50 / key_p50:>8.0f}x")
+
+if __name__ == "__main__":
+    main()
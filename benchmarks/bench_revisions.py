@@ -0,0 +1,120 @@
+"""
+Storage, write payload and rebuild latency of delta revisions against full-row inserts.
+
+Creates --profiles profiles in two SQLite stores and applies --revisions updates to
+each, every update changing one or two fields (mostly weight). The "full" store appends
+the whole row to user_profiles for every update, as save_profile did before; the
+"delta" store records only the changed columns with append_revision, with a snapshot
+every --snapshot-every revisions. Reports database growth and payload per revision,
+write time, and the latency of rebuilding a random historical version.
+
+Usage:
+    python -m benchmarks.bench_revisions [--profiles 500] [--revisions 40] [--snapshot-every 10]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from benchmarks.bench_storage import make_profile
+from src.storage.sqlite_store import SQLiteProfileStore
+from src.utils.db_utils import profile_changes
+from src.utils.security_utils import compute_recovery_key
+
+EDITS = {
+    "weight_lbs": lambda rng, profile: round(profile["weight_lbs"] + rng.uniform(-3, 3), 1),
+    "sleep_quality": lambda rng, profile: rng.choice(["Poor", "Fair", "Good"]),
+    "stress_level": lambda rng, profile: rng.choice(["Low", "Moderate", "High"]),
+    "current_medications": lambda rng, profile: rng.sample(["Metformin 500mg", "Lisinopril 10mg", "Atorvastatin"], 2),
+    "health_goals": lambda rng, profile: rng.sample(["Improve Energy", "Better Sleep", "Heart Health"], 2),
+    "additional_info": lambda rng, profile: f"Updated notes {rng.randrange(1000)}",
+}
+EDIT_WEIGHTS = [6, 1, 1, 1, 1, 1]
+
+def database_bytes(store):
+    conn = store._connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return (page_count - freelist) * conn.execute("PRAGMA page_size").fetchone()[0]
+
+def updates(profiles, revisions, rng):
+    """Yields (previous version, next version) for every update, round-robin over the profiles."""
+    current = {profile["user_id"]: profile for profile in profiles}
+    for _ in range(revisions):
+        for user_id, previous in list(current.items()):
+            profile = dict(previous, submission_id=uuid.uuid4().hex)
+            for field in set(rng.choices(list(EDITS), EDIT_WEIGHTS, k=rng.randint(1, 2))):
+                profile[field] = EDITS[field](rng, profile)
+            current[user_id] = profile
+            yield previous, profile
+
+def run(mode, profiles, revisions, snapshot_every, path):
+    store = SQLiteProfileStore(path)
+    store.insert_profiles(profiles)
+    base_bytes = database_bytes(store)
+    payload = 0
+    write_times = []
+    for previous, profile in updates(profiles, revisions, random.Random(3)):
+        started = time.perf_counter()
+        if mode == "full":
+            row = dict(profile, recovery_key=compute_recovery_key(profile))
+            payload += len(json.dumps(row))
+            store.insert_profiles([row])
+        else:
+            changes = profile_changes(previous, profile)
+            payload += len(json.dumps(changes))
+            store.append_revision(profile["user_id"], changes, profile["submission_id"], snapshot_every)
+        write_times.append(time.perf_counter() - started)
+    grown = database_bytes(store) - base_bytes
+
+    conn = store._connection()
+    rng = random.Random(9)
+    rebuild_times = []
+    for _ in range(2000):
+        user_id = rng.choice(profiles)["user_id"]
+        revision = rng.randint(1, revisions)
+        started = time.perf_counter()
+        if mode == "full":
+            row = conn.execute(
+                "SELECT * FROM user_profiles WHERE user_id = ? ORDER BY created_at, id LIMIT 1 OFFSET ?",
+                (user_id, revision),
+            ).fetchone()
+            store._decode(row)
+        else:
+            store.load_revision(user_id, revision)
+        rebuild_times.append(time.perf_counter() - started)
+    store.close()
+    count = len(write_times)
+    rebuild_times.sort()
+    return {
+        "bytes_per_revision": grown / count,
+        "payload_per_revision": payload / count,
+        "write_ms": statistics.median(write_times) * 1000,
+        "rebuild_p50_ms": statistics.median(rebuild_times) * 1000,
+        "rebuild_p99_ms": rebuild_times[int(len(rebuild_times) * 0.99)] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=500)
+    parser.add_argument("--revisions", type=int, default=40, help="updates per profile")
+    parser.add_argument("--snapshot-every", type=int, default=10)
+    args = parser.parse_args()
+
+    random.seed(1)
+    profiles = [make_profile(i) for i in range(args.profiles)]
+    print(f"{args.profiles} profiles x {args.revisions} updates, snapshot every {args.snapshot_every}")
+    print(f"{'mode':<6} {'DB B/revision':>14} {'payload B/revision':>19} {'write p50':>10} "
+          f"{'rebuild p50':>12} {'rebuild p99':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("full", "delta"):
+            result = run(mode, profiles, args.revisions, args.snapshot_every, os.path.join(tmp, f"{mode}.db"))
+            print(f"{mode:<6} {result['bytes_per_revision']:>14,.0f} {result['payload_per_revision']:>19,.0f} "
+                  f"{result['write_ms']:>8.3f}ms {result['rebuild_p50_ms']:>10.3f}ms {result['rebuild_p99_ms']:>10.3f}ms")
+
+if __name__ == "__main__":
+    main()
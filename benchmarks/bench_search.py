@@ -0,0 +1,110 @@
+"""
+Build throughput, update throughput and query latency of the in-memory profile search
+index used by the SQLite backend.
+
+Generates --profiles synthetic profiles whose notes mix common intake phrases, a long
+tail of rare words and the odd misspelling, indexes them, re-indexes --updates of them
+as save_profile would, and times --repeats runs of each query, some of them misspelt.
+A linear scan for the exact phrase is timed as the baseline search would cost without
+an index.
+
+Usage:
+    python -m benchmarks.bench_search [--profiles 1000000] [--updates 20000] [--repeats 50]
+"""
+import argparse
+import random
+import resource
+import statistics
+import time
+from src.storage.base import SEARCH_COLUMNS
+from src.storage.search_index import ProfileSearchIndex
+
+PHRASES = [
+    "I have anxiety", "knee injury from running", "lower back pain", "trouble sleeping", "I work night shifts",
+    "recovering from surgery", "training for a marathon", "high cholesterol runs in my family",
+    "migraines in the afternoon", "joint stiffness in the morning", "acid reflux after meals",
+    "vegetarian for ten years", "post-partum fatigue", "old shoulder injury", "seasonal allergies",
+    "brain fog at work", "I travel a lot", "irregular periods", "hair thinning", "low iron last checkup",
+]
+OTHER_GOALS = ["focus", "lose weight", "run a half marathon", "better skin", "less anxiety", "recover from knee surgery"]
+MEDICATIONS = ["Metformin 500mg", "Lisinopril 10mg daily", "Sertraline 50mg", "Levothyroxine 75mcg", "Atorvastatin 20mg",
+               "Omeprazole 20mg before breakfast", "Ibuprofen as needed"]
+SUPPLEMENTS = ["Fish oil", "Vitamin D3 2000iu", "Magnesium glycinate", "Turmeric curcumin", "Ashwagandha", "Probiotic",
+               "Melatonin 3mg", "Collagen peptides"]
+QUERIES = ["anxiety", "knee injury", "anxeity", "night shift", "magnesium", "back pain", "sertraline",
+           "marathon training", "migrane", "cholesterol family history"]
+
+def rare_words(rng, count):
+    syllables = ["ka", "lo", "mi", "ter", "van", "os", "rel", "pha", "din", "qu", "ber", "sto", "ni", "ul", "zan"]
+    return ["".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(count)]
+
+def misspell(rng, text):
+    words = text.split()
+    i = rng.randrange(len(words))
+    word = words[i]
+    if len(word) > 4:
+        j = rng.randrange(1, len(word) - 2)
+        words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    return " ".join(words)
+
+def make_profiles(count, rng):
+    tail = rare_words(rng, 50000)
+    for i in range(count):
+        notes = rng.sample(PHRASES, rng.randint(0, 3))
+        if notes and rng.random() < 0.05:
+            notes[0] = misspell(rng, notes[0])
+        notes.append(" ".join(rng.choices(tail, k=rng.randint(0, 6))))
+        yield {
+            "user_id": f"user-{i}",
+            "additional_info": ". ".join(notes),
+            "other_health_goal": rng.choice(OTHER_GOALS) if rng.random() < 0.3 else "",
+            "current_medications": rng.sample(MEDICATIONS, rng.randint(0, 2)),
+            "natural_supplements": rng.sample(SUPPLEMENTS, rng.randint(0, 3)),
+        }
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=1000000)
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(13)
+    profiles = list(make_profiles(args.profiles, rng))
+    index = ProfileSearchIndex(SEARCH_COLUMNS)
+    before = rss_mb()
+    started = time.perf_counter()
+    index.build(profiles)
+    build = time.perf_counter() - started
+    print(f"{args.profiles} profiles indexed in {build:.1f}s ({args.profiles / build:,.0f} profiles/s), "
+          f"{len(index._postings):,} distinct words, peak RSS +{rss_mb() - before:,.0f} MB")
+
+    started = time.perf_counter()
+    for profile in rng.sample(profiles, args.updates):
+        index.add(profile["user_id"], dict(profile, additional_info=f"{profile['additional_info']}. knee pain"))
+    updates = time.perf_counter() - started
+    print(f"{args.updates} profiles re-indexed at {args.updates / updates:,.0f} profiles/s")
+
+    print(f"{'query':<28} {'matches':>8} {'top score':>10} {'p50':>9} {'p99':>9}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            results = index.search(query, args.limit)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(f"{query:<28} {len(results):>8} {results[0][1] if results else 0:>10.3f} "
+              f"{statistics.median(timings) * 1e3:>7.1f}ms {timings[int(len(timings) * 0.99)] * 1e3:>7.1f}ms")
+
+    documents = [index.document_text(profile).casefold() for profile in profiles]
+    started = time.perf_counter()
+    found = sum(1 for document in documents if "knee injury" in document)
+    print(f"linear scan for 'knee injury' (exact substring only): {found} matches in "
+          f"{(time.perf_counter() - started) * 1e3:.0f}ms")
+
+if __name__ == "__main__":
+    main()
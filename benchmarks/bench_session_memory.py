@@ -0,0 +1,97 @@
+"""
+Memory held per Streamlit session for the intake form's state, before and after the
+compact SessionProfile.
+
+Builds N concurrent sessions of form state the way main() and the form sections leave
+it: the profile being edited plus the widget values seeded from it. "dict" is the
+previous layout, a fresh profile dict literal per session (or the whole loaded row);
+"compact" is SessionProfile. Loaded profiles go through a JSON round trip so, as with
+rows from the store, no strings are shared between sessions up front. Allocations are
+measured with tracemalloc and reported as bytes per session.
+
+Usage:
+    python -m benchmarks.bench_session_memory [--sessions 1000 10000] [--loaded-ratio 0.5]
+"""
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from benchmarks.bench_storage import make_profile
+from src.config.form_defaults import FORM_FIELDS
+from src.models.session_profile import LIST_FIELDS, SessionProfile
+
+# The literal main() and clear_form() used to create for every session
+def legacy_profile():
+    return {
+        "user_id": "", "age_range": "18-24", "sex": "Male", "height_ft": 5, "height_in": 6, "weight_lbs": "",
+        "physical_activity": "3-4 days", "energy_level": "Neutral", "diet": "I don't follow a specific diet",
+        "pregnant_or_breastfeeding": "Not Applicable", "medical_conditions": [],
+        "medications": [], "natural_supplements": [], "allergies": [], "health_goals": [], "other_health_goal": "",
+        "interested_supplements": [], "additional_info": "",
+        "security_question_1": "", "security_answer_1": "",
+        "security_question_2": "", "security_answer_2": "",
+        "security_question_3": "", "security_answer_3": ""
+    }
+
+def stored_row(i):
+    row = make_profile(i)
+    row.update(
+        id=i, created_at="2026-01-01T00:00:00.000000+00:00",
+        physical_activity=random.choice(["1-2 days", "3-4 days", "5+ days"]),
+        energy_level=random.choice(["Low", "Neutral", "High"]),
+        allergies=random.sample(["Peanuts", "Penicillin", "Shellfish", "Sulfa"], 1),
+    )
+    return json.loads(json.dumps(row))
+
+def widget_values(profile):
+    """The widget keys the form sections seed from the profile; list fields become joined strings."""
+    widgets = {}
+    for key, default in FORM_FIELDS.items():
+        value = profile.get(key, default)
+        widgets[key] = ", ".join(value) if key in LIST_FIELDS and key != "health_goals" else value
+    return widgets
+
+def build_sessions(count, loaded_ratio, layout):
+    random.seed(7)
+    sessions = []
+    for i in range(count):
+        if random.random() < loaded_ratio:
+            row = stored_row(i)
+            profile = row if layout == "dict" else SessionProfile.from_profile(row)
+        else:
+            profile = legacy_profile() if layout == "dict" else SessionProfile()
+        sessions.append({"user_profile": profile, "errors": {}, "recovery_mode": False, **widget_values(profile)})
+    return sessions
+
+def measure(count, loaded_ratio, layout):
+    gc.collect()
+    tracemalloc.start()
+    sessions = build_sessions(count, loaded_ratio, layout)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return current
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--loaded-ratio", type=float, default=0.5,
+                        help="share of sessions that have loaded a saved profile")
+    args = parser.parse_args()
+
+    # Warm up imports and shared caches so they aren't attributed to the first layout
+    measure(100, args.loaded_ratio, "compact")
+
+    print(f"{'sessions':>8} {'loaded':>7} {'dict B/session':>15} {'compact B/session':>18} {'saved':>7} "
+          f"{'dict MB':>8} {'compact MB':>11}")
+    for count in args.sessions:
+        for ratio in sorted({0.0, args.loaded_ratio, 1.0}):
+            legacy = measure(count, ratio, "dict")
+            compact = measure(count, ratio, "compact")
+            print(f"{count:>8} {ratio:>7.0%} {legacy / count:>15,.0f} {compact / count:>18,.0f} "
+                  f"{1 - compact / legacy:>7.0%} {legacy / 1e6:>8.1f} {compact / 1e6:>11.1f}")
+
+if __name__ == "__main__":
+    main()
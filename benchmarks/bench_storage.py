@@ -0,0 +1,89 @@
+"""
+Round-trip latency and throughput of the profile stores on the same workload:
+save, load-latest, recover-by-key and a full keyset scan.
+
+Each backend is configured the same way as the app (SUPABASE_URL/KEY, DATABASE_URL,
+SQLITE_PATH). Usage:
+    python -m benchmarks.bench_storage --backends sqlite postgres [--profiles 2000] [--threads 8]
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from src.storage.factory import create_store
+from src.utils.security_utils import compute_recovery_key
+
+# Synthetic profiles only; a real deployment sets its own secret
+os.environ.setdefault("RECOVERY_KEY_SECRET", "benchmark")
+
+def make_profile(i):
+    code = ''.join(random.choices(string.ascii_letters + string.digits, k=9))
+    row = {
+        "user_id": f"{code[:3]}-{code[3:6]}-{code[6:]}",
+        "age_range": random.choice(["18-24", "25-34", "35-44", "45-54"]),
+        "sex": random.choice(["Male", "Female"]),
+        "height_ft": 5, "height_in": i % 12, "weight_lbs": 120 + i % 100,
+        "medical_conditions": random.sample(["Asthma", "Diabetes", "Hypertension", "Migraine"], 2),
+        "current_medications": ["Metformin 500mg"],
+        "health_goals": ["Improve Energy"],
+        "additional_info": "bench",
+        "security_question_1": "q1", "security_answer_1": f"a{i}",
+        "security_question_2": "q2", "security_answer_2": f"b{i}",
+        "security_question_3": "q3", "security_answer_3": f"c{i}",
+        "submission_id": uuid.uuid4().hex,
+    }
+    row["recovery_key"] = compute_recovery_key(row)
+    return row
+
+def run_timed(fn, items, threads):
+    timings = []
+    def call(item):
+        started = time.perf_counter()
+        fn(item)
+        timings.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, items))
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings),
+        "p99_ms": timings[int(len(timings) * 0.99) - 1],
+        "ops_per_sec": len(items) / elapsed,
+    }
+
+def bench_backend(backend, profiles, threads):
+    store = create_store(backend)
+    results = {
+        "save": run_timed(lambda row: store.insert_profiles([row]), profiles, threads),
+        "load_latest": run_timed(lambda row: store.load_latest(row["user_id"]), profiles, threads),
+        "recover": run_timed(lambda row: store.load_by_recovery_key(row["recovery_key"]), profiles, threads),
+    }
+    started = time.perf_counter()
+    scanned = sum(1 for _ in store.iter_rows(page_size=1000))
+    results["scan"] = {"rows": scanned, "rows_per_sec": scanned / (time.perf_counter() - started)}
+    store.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["sqlite"])
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    profiles = [make_profile(i) for i in range(args.profiles)]
+    for backend in args.backends:
+        results = bench_backend(backend, profiles, args.threads)
+        print(f"== {backend}")
+        for operation in ("save", "load_latest", "recover"):
+            r = results[operation]
+            print(f"  {operation:<12} p50 {r['p50_ms']:8.3f} ms  p99 {r['p99_ms']:8.3f} ms  {r['ops_per_sec']:10.0f} ops/s")
+        print(f"  {'scan':<12} {results['scan']['rows']} rows at {results['scan']['rows_per_sec']:.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
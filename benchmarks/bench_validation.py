@@ -0,0 +1,73 @@
+"""
+Profiles/sec for UserProfile validation: one model at a time versus validate_many.
+
+Usage:
+    python -m benchmarks.bench_validation [--rows 50000] [--invalid-ratio 0.01]
+"""
+import argparse
+import gc
+import random
+import time
+from src.models.user_profile import UserProfile, validate_many
+from pydantic import ValidationError
+
+def make_rows(count, invalid_ratio):
+    rows = []
+    for i in range(count):
+        row = {
+            "user_id": f"abc-def-{i:03d}", "age_range": "25-34", "sex": "Female",
+            "height_ft": 5, "height_in": 4, "weight_lbs": str(120 + i % 80),
+            "physical_activity": "3-4 days", "energy_level": "Neutral", "diet": "High Protein",
+            "meals_per_day": "3", "sleep_quality": "Good", "stress_level": "Moderate",
+            "pregnant_or_breastfeeding": "No",
+            "medical_conditions": ["Asthma"], "current_medications": ["Metformin 500mg"],
+            "natural_supplements": ["Fish Oil"], "allergies": [], "health_goals": ["Improve Energy"],
+            "other_health_goal": "", "interested_supplements": ["Vitamin D"], "additional_info": "",
+            "security_question_1": "q1", "security_answer_1": "a",
+            "security_question_2": "q2", "security_answer_2": "b",
+            "security_question_3": "q3", "security_answer_3": "c",
+        }
+        if random.random() < invalid_ratio:
+            row["weight_lbs"] = "heavy"
+        rows.append(row)
+    return rows
+
+def bench_single(rows):
+    started = time.perf_counter()
+    for row in rows:
+        try:
+            UserProfile(**row)
+        except ValidationError:
+            pass
+    return len(rows) / (time.perf_counter() - started)
+
+def bench_batch(rows, batch_size):
+    started = time.perf_counter()
+    for start in range(0, len(rows), batch_size):
+        validate_many(rows[start:start + batch_size])
+    return len(rows) / (time.perf_counter() - started)
+
+def best_of(repeats, fn, *args):
+    """Returns the best rate over several runs so GC and warm-up don't skew the comparison."""
+    rates = []
+    for _ in range(repeats):
+        gc.collect()
+        rates.append(fn(*args))
+    return max(rates)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--invalid-ratio", type=float, default=0.01)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.invalid_ratio)
+    single = best_of(args.repeats, bench_single, rows)
+    batch = best_of(args.repeats, bench_batch, rows, args.batch_size)
+    print(f"single:        {single:10.0f} profiles/sec")
+    print(f"validate_many: {batch:10.0f} profiles/sec (batch of {args.batch_size})")
+
+if __name__ == "__main__":
+    main()
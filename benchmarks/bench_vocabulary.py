@@ -0,0 +1,75 @@
+"""
+Throughput of the vocabulary matcher over a synthetic corpus of misspelled,
+dosage-suffixed terms, with the per-term result cache bypassed and enabled.
+
+Usage:
+    python -m benchmarks.bench_vocabulary [--terms 200000] [--typo-rate 0.5]
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+from src.config.vocabulary import VOCABULARY
+from src.services.vocabulary import VocabularyIndex
+
+DOSAGES = ["", "500mg", "10 mg daily", "1000mg twice daily", "as needed", "2000 IU", "200mg at night"]
+
+def add_typo(word):
+    if len(word) < 5:
+        return word
+    i = random.randrange(1, len(word) - 1)
+    edit = random.choice(("delete", "insert", "substitute", "transpose"))
+    if edit == "delete":
+        return word[:i] + word[i + 1:]
+    if edit == "insert":
+        return word[:i] + random.choice(string.ascii_lowercase) + word[i:]
+    if edit == "substitute":
+        return word[:i] + random.choice(string.ascii_lowercase) + word[i + 1:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+def make_corpus(size, typo_rate):
+    terms = [(kind, alias) for kind, entries in VOCABULARY.items()
+             for canonical, aliases in entries.items() for alias in (canonical, *aliases)]
+    corpus = []
+    for _ in range(size):
+        kind, term = random.choice(terms)
+        if random.random() < typo_rate:
+            term = add_typo(term)
+        corpus.append((f"{term} {random.choice(DOSAGES)}".strip(), kind))
+    return corpus
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", type=int, default=200_000)
+    parser.add_argument("--typo-rate", type=float, default=0.5)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = VocabularyIndex(VOCABULARY)
+    print(f"index build: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    corpus = make_corpus(args.terms, args.typo_rate)
+    timings = []
+    matched = suggested = 0
+    started = time.perf_counter()
+    for text, kind in corpus:
+        t0 = time.perf_counter()
+        result = index._match(text, kind)
+        timings.append(time.perf_counter() - t0)
+        matched += bool(result and result.canonical)
+        suggested += bool(result and result.suggestion)
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    print(f"uncached: {len(corpus) / elapsed:,.0f} terms/sec, p50 {statistics.median(timings) * 1e6:.1f} us, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us, matched {matched / len(corpus):.1%}, "
+          f"suggested {suggested / len(corpus):.1%}")
+
+    started = time.perf_counter()
+    for text, kind in corpus:
+        index.match(text, kind)
+    elapsed = time.perf_counter() - started
+    print(f"cached:   {len(corpus) / elapsed:,.0f} terms/sec ({index.match.cache_info().hits} cache hits)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Local stand-ins for the external services the benchmarks exercise."""
+import bisect
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class StubServer:
+    """Runs a ThreadingHTTPServer on a free localhost port in a background thread."""
+
+    def __init__(self, handler_class):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.server.stub = self
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def record(self, sent_bytes):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += sent_bytes
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+class JSONHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stub.record(len(body))
+
+class InteractionHandler(JSONHandler):
+    """RxNav-style interaction list: roughly one in five pairs interacts."""
+    latency = 0.05
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        names = [name for name in query.get("names", [""])[0].split(",") if name]
+        time.sleep(self.latency)
+        interactions = []
+        for a, b in itertools.combinations(sorted(names), 2):
+            digest = hashlib.sha1(f"{a}|{b}".encode()).digest()
+            if digest[0] % 5 == 0:
+                interactions.append({
+                    "pair": [a, b],
+                    "severity": ("minor", "moderate", "major")[digest[1] % 3],
+                    "description": f"{a} may interact with {b}.",
+                })
+        self.send_json({"interactions": interactions})
+
+def _iso(seconds):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+def _epoch(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+class FakeCatalog:
+    """
+    In-memory Shopify-style product catalog.
+
+    Products are kept sorted by (updated_at, id) so a time-window query is a bisect,
+    the way an index on updated_at would serve it.
+    """
+
+    PRODUCT_TYPES = ("Vitamins", "Minerals", "Herbal", "Probiotics", "Omega-3", "Protein", "Sleep", "Immune")
+    TAGS = ("vegan", "gluten-free", "non-gmo", "sugar-free", "organic", "kosher", "third-party-tested", "capsule",
+            "gummy", "powder", "liquid", "women", "men", "kids", "senior", "energy", "heart", "joint", "digestion")
+    INGREDIENTS = ("Vitamin D3", "Magnesium Glycinate", "Fish Oil", "Turmeric Curcumin", "Ashwagandha", "Melatonin",
+                   "CoQ10", "Probiotic", "Vitamin B12", "Iron", "Zinc", "Elderberry", "Collagen", "Biotin", "Creatine")
+    BENEFITS = ("restful sleep", "joint comfort", "heart health", "immune defense", "energy and focus", "stress relief",
+                "healthy digestion", "bone strength", "hair, skin and nails", "muscle recovery")
+
+    def __init__(self, size=100_000, seed=7):
+        rng = random.Random(seed)
+        now = int(time.time()) - 60
+        self.products = {}
+        self.keys = []
+        self._lock = threading.Lock()
+        for i in range(size):
+            product_id = 7_000_000_000 + i
+            updated = now - rng.randint(60, 365 * 24 * 3600)
+            ingredient = rng.choice(self.INGREDIENTS)
+            benefit = rng.choice(self.BENEFITS)
+            self.products[product_id] = {
+                "id": product_id,
+                "title": f"{ingredient} {rng.choice(('Capsules', 'Softgels', 'Gummies', 'Powder'))} {i}",
+                "handle": f"formula-{i}",
+                "vendor": rng.choice(("Nature's Way", "NOW Foods", "Thorne", "Garden of Life", "Pure Encapsulations")),
+                "product_type": rng.choice(self.PRODUCT_TYPES),
+                "body_html": f"<p>{ingredient} to support {benefit}. " + "Third-party tested for purity. " * rng.randint(1, 6) + "</p>",
+                "tags": ", ".join(rng.sample(self.TAGS, rng.randint(1, 5))),
+                "status": "active",
+                "created_at": _iso(updated - 3600),
+                "updated_at": _iso(updated),
+                "images": [{"src": f"https://cdn.example.com/{i}.jpg", "width": 1024, "height": 1024}],
+                "variants": [{"id": product_id * 10 + v, "price": f"{rng.uniform(5, 80):.2f}", "sku": f"NH-{i}-{v}",
+                              "inventory_quantity": rng.randint(0, 200)} for v in range(rng.randint(1, 3))],
+            }
+            self.keys.append((updated, product_id))
+        self.keys.sort()
+
+    def touch(self, count, archive=0, seed=None):
+        """Edits `count` random products (price, or title for some) and archives `archive` more."""
+        rng = random.Random(seed)
+        with self._lock:
+            now = max(int(time.time()), self.keys[-1][0] if self.keys else 0)
+            for i, product_id in enumerate(rng.sample(list(self.products), count + archive)):
+                product = self.products[product_id]
+                self.keys.pop(bisect.bisect_left(self.keys, (_epoch(product["updated_at"]), product_id)))
+                if i >= count:
+                    product["status"] = "archived"
+                elif i % 4 == 0:
+                    product["title"] += " (New Look)"
+                else:
+                    product["variants"][0]["price"] = f"{float(product['variants'][0]['price']) + 1:.2f}"
+                product["updated_at"] = _iso(now)
+                bisect.insort(self.keys, (now, product_id))
+
+    def window(self, query):
+        low = _epoch(query["updated_at_min"][0]) if "updated_at_min" in query else float("-inf")
+        high = _epoch(query["updated_at_max"][0]) if "updated_at_max" in query else float("inf")
+        start = bisect.bisect_left(self.keys, (low, 0))
+        end = bisect.bisect_right(self.keys, (high, float("inf")))
+        return self.keys[start:end]
+
+class CatalogHandler(JSONHandler):
+    """Shopify Admin REST products.json and products/count.json over a FakeCatalog."""
+    catalog: FakeCatalog = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        with self.catalog._lock:
+            keys = self.catalog.window(query)
+            if url.path.endswith("/products/count.json"):
+                self.send_json({"count": len(keys)})
+                return
+            since_id = int(query.get("since_id", ["0"])[0])
+            limit = min(int(query.get("limit", ["50"])[0]), 250)
+            ids = sorted(product_id for _, product_id in keys if product_id > since_id)[:limit]
+            fields = query["fields"][0].split(",") if "fields" in query else None
+            products = [self.catalog.products[product_id] for product_id in ids]
+            if fields:
+                products = [{key: product[key] for key in fields if key in product} for product in products]
+        self.send_json({"products": products})
@@ -2,12 +2,11 @@ import streamlit as st
 import datetime
 import json
 import uuid
-import random
-import string
 from streamlit_extras.stylable_container import stylable_container
-from src.utils.file_utils import get_base64_of_bin_file
+from src.utils.file_utils import read_bin_file
 from src.utils.session_utils import clear_form
-from src.utils.style_utils import inject_css, display_message
+from src.utils.draft_utils import discard_draft, restore_draft
+from src.utils.style_utils import inject_css, set_page_background, display_message, get_asset_payload_report
 from src.view.personal_info import personal_info_form
 from src.view.lifestyle import lifestyle_form
 from src.view.medical_history import medical_history_form
@@ -15,11 +14,37 @@ from src.view.medications_allergies import medications_allergies_form
 from src.view.health_goals import health_goals_form
 from src.view.additional_info import additional_info_form
 from src.view.security_questions import security_questions_form
-from src.utils.db_utils import init_connection, save_profile, load_profile_from_db, load_profile_by_security_questions
-from src.models.user_profile import UserProfile
+from src.utils.db_utils import init_connection, save_profile
+from src.utils.guard_utils import (
+    StoreUnavailableError, ThrottledError, UNAVAILABLE_MESSAGE, get_profile_guard, guarded_load_profile,
+    guarded_recover_profile, retry_message, session_clients,
+)
+from src.models.user_profile import UserProfile, error_messages
+from src.models.session_profile import SessionProfile
+from src.utils.security_utils import generate_profile_code
+from src.utils.metrics import ASSET_PAYLOAD_BYTES, VALIDATION_ERRORS, observe_rerun, start_metrics_server
+from src.services.vocabulary import FIELD_KINDS, parse_term_list
 from pydantic import ValidationError
 
-supabase = init_connection()
+store = init_connection()
+
+BACKGROUND_IMAGE = 'assets/background.png'
+LOGO_IMAGE = 'assets/NH_logo.png'
+STYLESHEET = 'src/style/style.css'
+SAVE_FAILED_MESSAGE = "Your profile could not be saved. Please try again in a moment."
+
+@st.cache_resource
+def metrics_server():
+    """Starts the Prometheus /metrics endpoint once per process."""
+    return start_metrics_server()
+
+@st.cache_resource
+def record_asset_payload():
+    """Records the per-rerun asset payload in nh_asset_payload_bytes once per process."""
+    report = get_asset_payload_report(BACKGROUND_IMAGE, STYLESHEET)
+    ASSET_PAYLOAD_BYTES.labels(delivery="inline").set(report["before"])
+    ASSET_PAYLOAD_BYTES.labels(delivery="current").set(report["after"])
+    return report
 
 def main():
     """
@@ -34,23 +59,12 @@ def main():
     )
 
     # --- Set Background Image ---
-    background_image_b64 = get_base64_of_bin_file('assets/background.png')
-    if background_image_b64:
-        page_bg_img = f"""
-        <style>
-        .stApp {{
-            background-image: url("data:image/png;base64,{background_image_b64}");
-            background-size: cover;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-        }}
-        </style>
-        """
-        st.markdown(page_bg_img, unsafe_allow_html=True)
+    set_page_background(BACKGROUND_IMAGE)
 
 
     # --- Custom CSS ---
-    inject_css('src/style/style.css')
+    inject_css(STYLESHEET)
+    record_asset_payload()
 
 
     # --- Header ---
@@ -63,7 +77,7 @@ def main():
         padding: 1rem;
     }
     '''):
-        st.image("assets/NH_logo.png")
+        st.image(read_bin_file(LOGO_IMAGE))
 
     st.markdown("""
     <div class="form-title-container">
@@ -91,16 +105,8 @@ def main():
 
     # --- Profile State Management ---
     if 'user_profile' not in st.session_state:
-        st.session_state.user_profile = {
-            "user_id": "", "age_range": "18-24", "sex": "Male", "height_ft": 5, "height_in": 6, "weight_lbs": "",
-            "physical_activity": "3-4 days", "energy_level": "Neutral", "diet": "I don't follow a specific diet",
-            "pregnant_or_breastfeeding": "Not Applicable", "medical_conditions": [],
-            "medications": [], "natural_supplements": [], "allergies": [], "health_goals": [], "other_health_goal": "",
-            "interested_supplements": [], "additional_info": "",
-            "security_question_1": "", "security_answer_1": "",
-            "security_question_2": "", "security_answer_2": "",
-            "security_question_3": "", "security_answer_3": ""
-        }
+        st.session_state.user_profile = SessionProfile()
+        restore_draft()
     if 'errors' not in st.session_state:
         st.session_state.errors = {}
     if 'recovery_mode' not in st.session_state:
@@ -119,20 +125,27 @@ def main():
                 security_questions_recovery = security_questions_form(st.session_state.user_profile, st.session_state.errors)
                 if st.button("Recover My Code", key="recover_code"):
                     with st.spinner("Recovering your profile code..."):
-                        profile = load_profile_by_security_questions(supabase, security_questions_recovery)
-                        if profile:
-                            with stylable_container(key="profile_code_container", css_styles='''
-                            {
-                                background-color: #FFFFFF;
-                                border-radius: 0.5rem;
-                                padding: 1rem;
-                            }
-                            '''):
-                                st.subheader("Your Nutrition House Profile Code")
-                                st.success(f"Your Profile Code is: {profile['user_id']}")
-                                st.info("Please save this code in a safe space to load your profile for future visits.")
+                        try:
+                            profile = guarded_recover_profile(
+                                get_profile_guard(), store, security_questions_recovery, session_clients())
+                        except ThrottledError as e:
+                            st.warning(retry_message(e))
+                        except StoreUnavailableError:
+                            st.error(UNAVAILABLE_MESSAGE)
                         else:
-                            st.error("Profile not found. Please check your security questions and answers.")
+                            if profile:
+                                with stylable_container(key="profile_code_container", css_styles='''
+                                {
+                                    background-color: #FFFFFF;
+                                    border-radius: 0.5rem;
+                                    padding: 1rem;
+                                }
+                                '''):
+                                    st.subheader("Your Nutrition House Profile Code")
+                                    st.success(f"Your Profile Code is: {profile['user_id']}")
+                                    st.info("Please save this code in a safe space to load your profile for future visits.")
+                            else:
+                                st.error("Profile not found. Please check your security questions and answers.")
                 if st.button("Back to Load Profile", key="back_to_load"):
                     st.session_state.recovery_mode = False
                     st.rerun()
@@ -141,13 +154,19 @@ def main():
                 st.write("")
                 if st.button("Load Profile", key="load_profile"):
                     with st.spinner("Loading your profile..."):
-                        profile = load_profile_from_db(supabase, user_id_input)
-                        if profile:
-                            st.session_state.user_profile = profile
-                            st.success("Profile loaded successfully!")
-                            st.rerun()
+                        try:
+                            profile = guarded_load_profile(get_profile_guard(), store, user_id_input, session_clients())
+                        except ThrottledError as e:
+                            st.warning(retry_message(e))
+                        except StoreUnavailableError:
+                            st.error(UNAVAILABLE_MESSAGE)
                         else:
-                            st.error("Profile not found. Please check the Unique ID or create a new profile.")
+                            if profile:
+                                st.session_state.user_profile = SessionProfile.from_profile(profile)
+                                st.success("Profile loaded successfully!")
+                                st.rerun()
+                            else:
+                                st.error("Profile not found. Please check the Unique ID or create a new profile.")
                 if st.button("Forgot your profile code?", key="forgot_code"):
                     st.session_state.recovery_mode = True
                     st.rerun()
@@ -192,9 +211,7 @@ def main():
                 }
                 '''):
                     with st.spinner("Creating Your Profile, please wait to get your profile code..."):
-                        chat_set = string.ascii_letters + string.digits
-                        user_id_raw = ''.join(random.choices(chat_set, k=9))
-                        user_id_formatted = f"{user_id_raw[:3]}-{user_id_raw[3:6]}-{user_id_raw[6:]}"
+                        user_id_formatted = generate_profile_code()
                         user_data = {
                             "user_id": user_id_formatted,
                             "age_range": personal_info["age_range"],
@@ -209,13 +226,13 @@ def main():
                             "sleep_quality": lifestyle["sleep_quality"],
                             "stress_level": lifestyle["stress_level"],
                             "pregnant_or_breastfeeding": medical_history["pregnant_or_breastfeeding"],
-                            "medical_conditions": [s.strip() for s in medical_history["medical_conditions"].split(',') if s.strip()],
-                            "current_medications": [s.strip() for s in medications_allergies["current_medications"].split(',') if s.strip()],
-                            "natural_supplements": [s.strip() for s in medications_allergies["natural_supplements"].split(',') if s.strip()],
-                            "allergies": [s.strip() for s in medications_allergies["allergies"].split(',') if s.strip()],
+                            "medical_conditions": parse_term_list(medical_history["medical_conditions"], FIELD_KINDS["medical_conditions"]),
+                            "current_medications": parse_term_list(medications_allergies["current_medications"], FIELD_KINDS["current_medications"]),
+                            "natural_supplements": parse_term_list(medications_allergies["natural_supplements"], FIELD_KINDS["natural_supplements"]),
+                            "allergies": parse_term_list(medications_allergies["allergies"], FIELD_KINDS["allergies"]),
                             "health_goals": health_goals["health_goals"],
                             "other_health_goal": health_goals["other_health_goal"],
-                            "interested_supplements": [s.strip() for s in health_goals["interested_supplements"].split(',') if s.strip()],
+                            "interested_supplements": parse_term_list(health_goals["interested_supplements"], FIELD_KINDS["interested_supplements"]),
                             "additional_info": additional_info["additional_info"],
                             "security_question_1": security_questions["security_question_1"],
                             "security_answer_1": security_questions["security_answer_1"],
@@ -226,11 +243,13 @@ def main():
                         }
                         
                         user_profile = UserProfile(**user_data)
-                        save_profile(supabase, user_profile.model_dump())
-
-                        st.header(f"**Your Profile Code is: {user_id_formatted}**")
-                        st.info("Please save this code in a safe space to load your profile for future visits.")
-                        st.session_state.errors = {}
+                        if save_profile(store, user_profile.model_dump()) is None:
+                            display_message("error", SAVE_FAILED_MESSAGE)
+                        else:
+                            discard_draft()
+                            st.header(f"**Your Profile Code is: {user_id_formatted}**")
+                            st.info("Please save this code in a safe space to load your profile for future visits.")
+                            st.session_state.errors = {}
             else:
                 # This is an update
                 if not st.session_state.user_profile.get("user_id"):
@@ -257,13 +276,13 @@ def main():
                         "sleep_quality": lifestyle["sleep_quality"],
                         "stress_level": lifestyle["stress_level"],
                         "pregnant_or_breastfeeding": medical_history["pregnant_or_breastfeeding"],
-                        "medical_conditions": [s.strip() for s in medical_history["medical_conditions"].split(',') if s.strip()],
-                        "current_medications": [s.strip() for s in medications_allergies["current_medications"].split(',') if s.strip()],
-                        "natural_supplements": [s.strip() for s in medications_allergies["natural_supplements"].split(',') if s.strip()],
-                        "allergies": [s.strip() for s in medications_allergies["allergies"].split(',') if s.strip()],
+                        "medical_conditions": parse_term_list(medical_history["medical_conditions"], FIELD_KINDS["medical_conditions"]),
+                        "current_medications": parse_term_list(medications_allergies["current_medications"], FIELD_KINDS["current_medications"]),
+                        "natural_supplements": parse_term_list(medications_allergies["natural_supplements"], FIELD_KINDS["natural_supplements"]),
+                        "allergies": parse_term_list(medications_allergies["allergies"], FIELD_KINDS["allergies"]),
                         "health_goals": health_goals["health_goals"],
                         "other_health_goal": health_goals["other_health_goal"],
-                        "interested_supplements": [s.strip() for s in health_goals["interested_supplements"].split(',') if s.strip()],
+                        "interested_supplements": parse_term_list(health_goals["interested_supplements"], FIELD_KINDS["interested_supplements"]),
                         "additional_info": additional_info["additional_info"],
                         "security_question_1": st.session_state.user_profile["security_question_1"],
                         "security_answer_1": st.session_state.user_profile["security_answer_1"],
@@ -273,18 +292,24 @@ def main():
                         "security_answer_3": st.session_state.user_profile["security_answer_3"],
                     }
                     user_profile = UserProfile(**user_data)
-                    save_profile(supabase, user_profile.model_dump())
-                    with stylable_container(key="success_container", css_styles='''
-                    {
-                        background-color: #FFFFFF;
-                        border-radius: 0.5rem;
-                        padding: 1rem;
-                    }
-                    '''):
-                        display_message("success", "Profile updated successfully!")
+                    if save_profile(store, user_profile.model_dump(), st.session_state.user_profile.to_dict()) is None:
+                        display_message("error", SAVE_FAILED_MESSAGE)
+                    else:
+                        st.session_state.user_profile = SessionProfile.from_profile(user_profile.model_dump())
+                        discard_draft()
+                        with stylable_container(key="success_container", css_styles='''
+                        {
+                            background-color: #FFFFFF;
+                            border-radius: 0.5rem;
+                            padding: 1rem;
+                        }
+                        '''):
+                            display_message("success", "Profile updated successfully!")
 
         except ValidationError as e:
-            st.session_state.errors = {err['loc'][0] if err['loc'] else 'general': err['msg'] for err in e.errors()}
+            st.session_state.errors = error_messages(e)
+            for field in st.session_state.errors:
+                VALIDATION_ERRORS.labels(field=field).inc()
             with stylable_container(key="validation_error_container", css_styles='''
             {
                 background-color: #FFFFFF;
@@ -296,4 +321,6 @@ def main():
                     display_message("error", f"{field.replace('_', ' ').title()}: {message}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    metrics_server()
+    with observe_rerun():
+        main()
\ No newline at end of file
@@ -0,0 +1,59 @@
+import os
+import pandas as pd
+import streamlit as st
+from src.config.analytics import LIST_DIMENSIONS, SCALAR_DIMENSIONS, TOTAL_DIMENSION
+from src.services.analytics import breakdown, cross_table
+from src.utils.db_utils import init_connection
+from src.utils.staff_utils import require_staff
+
+@st.cache_data(ttl=float(os.environ.get("ANALYTICS_CACHE_TTL", "60")), show_spinner=False)
+def load_counts():
+    """Reads the pre-aggregated counters; never touches the profile tables."""
+    return init_connection().load_analytics()
+
+def title(name):
+    return name.replace("_", " ").title()
+
+def counts_frame(counts, dimension, label, limit=None):
+    return pd.DataFrame(breakdown(counts, dimension, limit), columns=[label, "Profiles"]).set_index(label)
+
+def cross_frame(counts, first, second):
+    return pd.DataFrame(cross_table(counts, first, second)).fillna(0).astype(int).T.sort_index()
+
+def main():
+    st.set_page_config(page_title="Nutrition House Intake Analytics", page_icon="assets/NH_favicon.png", layout="wide")
+    st.title("Intake Analytics")
+    require_staff()
+
+    if st.button("Refresh", key="refresh_analytics"):
+        load_counts.clear()
+    counts = load_counts()
+    total = counts.get(TOTAL_DIMENSION, 0)
+    if not total:
+        st.info("No profiles counted yet. Run `python -m scripts.rebuild_analytics` if profiles exist.")
+        return
+
+    high_stress = counts.get(("stress_level", "High"), 0)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Profiles", f"{total:,}")
+    col2.metric("High stress", f"{high_stress:,}", f"{high_stress / total:.0%} of profiles", delta_color="off")
+    col3.metric("Pregnant or breastfeeding", f"{counts.get(('pregnant_or_breastfeeding', 'Yes'), 0):,}")
+
+    st.subheader("Most common health goals")
+    st.bar_chart(counts_frame(counts, "health_goals", "Health goal", limit=15), horizontal=True)
+
+    left, right = st.columns(2)
+    with left:
+        st.subheader("Diet by age range")
+        st.dataframe(cross_frame(counts, "age_range", "diet"), width="stretch")
+    with right:
+        st.subheader("Stress level by age range")
+        st.dataframe(cross_frame(counts, "age_range", "stress_level"), width="stretch")
+
+    st.subheader("Breakdown")
+    dimension = st.selectbox("Field", SCALAR_DIMENSIONS + LIST_DIMENSIONS, format_func=title, key="analytics_dimension")
+    frame = counts_frame(counts, dimension, title(dimension), limit=50)
+    frame["Share"] = (frame["Profiles"] / total).map("{:.1%}".format)
+    st.dataframe(frame, width="stretch")
+
+main()
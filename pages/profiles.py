@@ -0,0 +1,92 @@
+import os
+import pandas as pd
+import streamlit as st
+from src.services.analytics import breakdown
+from src.storage.base import BROWSE_COLUMNS, SEARCH_COLUMNS
+from src.utils.db_utils import browse_profiles, init_connection, search_profiles
+from src.utils.staff_utils import require_staff
+
+PAGE_SIZE = int(os.environ.get("STAFF_BROWSE_PAGE_SIZE", "50"))
+SEARCH_LIMIT = int(os.environ.get("STAFF_SEARCH_LIMIT", "50"))
+FILTERS = {
+    "medical_conditions": "Medical conditions",
+    "current_medications": "Medications",
+    "health_goals": "Health goals",
+    "allergies": "Allergies",
+    "natural_supplements": "Natural supplements",
+    "interested_supplements": "Interested supplements",
+}
+
+@st.cache_data(ttl=float(os.environ.get("ANALYTICS_CACHE_TTL", "60")), show_spinner=False)
+def filter_options():
+    """Known values of each filterable column, most common first, from the analytics counters."""
+    counts = init_connection().load_analytics()
+    return {column: [value for value, _ in breakdown(counts, column)] for column in FILTERS}
+
+def selected_filters():
+    options = filter_options()
+    filters = {}
+    columns = st.columns(3)
+    for i, (column, label) in enumerate(FILTERS.items()):
+        with columns[i % 3]:
+            values = st.multiselect(label, options.get(column, []), key=f"browse_{column}", accept_new_options=True)
+        if values:
+            filters[column] = values
+    return filters
+
+def profiles_frame(rows, columns):
+    frame = pd.DataFrame(rows, columns=columns).drop(columns="id")
+    for column in frame.columns:
+        if column in FILTERS:
+            frame[column] = frame[column].map(lambda values: ", ".join(values or []))
+    frame.columns = [column.replace("_", " ").capitalize() for column in frame.columns]
+    return frame
+
+def show_search(query):
+    rows = search_profiles(init_connection(), query, SEARCH_LIMIT)
+    if rows is None:
+        st.error("Unable to search profiles. Please try again.")
+    elif not rows:
+        st.info("No profiles match this search.")
+    else:
+        columns = ["score", *BROWSE_COLUMNS, *(column for column in SEARCH_COLUMNS if column not in BROWSE_COLUMNS)]
+        st.dataframe(profiles_frame(rows, columns), hide_index=True, width="stretch")
+
+def main():
+    st.set_page_config(page_title="Nutrition House Profiles", page_icon="assets/NH_favicon.png", layout="wide")
+    st.title("Profiles")
+    require_staff()
+
+    query = st.text_input("Search notes, goals, medications and supplements", key="profile_search")
+    if query.strip():
+        show_search(query)
+        return
+
+    filters = selected_filters()
+    # Keys of the last row of every page shown so far; a new filter starts over at page 1
+    if st.session_state.get("browse_filters") != filters:
+        st.session_state.browse_filters = filters
+        st.session_state.browse_cursors = [None]
+    cursors = st.session_state.browse_cursors
+
+    rows = browse_profiles(init_connection(), filters, cursors[-1], PAGE_SIZE + 1)
+    if rows is None:
+        st.error("Unable to load profiles. Please try again.")
+        return
+    has_next = len(rows) > PAGE_SIZE
+    rows = rows[:PAGE_SIZE]
+    if not rows:
+        st.info("No profiles match these filters.")
+    else:
+        st.dataframe(profiles_frame(rows, BROWSE_COLUMNS), hide_index=True, width="stretch")
+
+    previous, page, following = st.columns([1, 4, 1])
+    if previous.button("Previous", key="browse_previous", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    page.caption(f"Page {len(cursors)}")
+    if following.button("Next", key="browse_next", disabled=not has_next):
+        cursors.append((rows[-1]["created_at"], rows[-1]["id"]))
+        st.rerun()
+
+main()
@@ -1,4 +1,11 @@
-CREATE TABLE user_profiles (
+-- Schema and migration in one: every statement is idempotent, so this file creates a new
+-- database and brings an existing one up to date, and can be re-run. Steps run in order:
+-- user_profiles and its added columns, the user_profiles_latest projection and its
+-- backfill from the history, revisions, the analytics counters and their backfill from the
+-- projection, then search. Afterwards run scripts/backfill_recovery_keys.py, which fills in
+-- recovery_key in both tables for rows written before it existed.
+
+CREATE TABLE IF NOT EXISTS user_profiles (
     id SERIAL PRIMARY KEY,
     user_id TEXT NOT NULL,
     age_range TEXT,
@@ -27,5 +34,300 @@ CREATE TABLE user_profiles (
     security_answer_2 TEXT,
     security_question_3 TEXT,
     security_answer_3 TEXT,
+    recovery_key TEXT,
+    submission_id TEXT,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
+
+-- Columns added since the table was first deployed, in the order they were added:
+-- recovery_key (filled in by scripts/backfill_recovery_keys.py, which needs the app's
+-- RECOVERY_KEY_SECRET), and submission_id with the key insert_profiles' ON CONFLICT
+-- (user_id, submission_id) needs
+ALTER TABLE user_profiles ADD COLUMN IF NOT EXISTS recovery_key TEXT;
+ALTER TABLE user_profiles ADD COLUMN IF NOT EXISTS submission_id TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_profiles_user_submission ON user_profiles (user_id, submission_id);
+
+CREATE INDEX IF NOT EXISTS idx_user_profiles_user_created ON user_profiles (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_created_id ON user_profiles (created_at, id);
+
+-- Current state of each profile, maintained by trigger in the same transaction as the insert
+CREATE TABLE IF NOT EXISTS user_profiles_latest (
+    LIKE user_profiles,
+    PRIMARY KEY (user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_recovery_key ON user_profiles_latest (recovery_key);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_created_id ON user_profiles_latest (created_at, id);
+-- Containment filters of the staff browser, e.g. current_medications @> ARRAY['Metformin']
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_medical_conditions ON user_profiles_latest USING GIN (medical_conditions);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_current_medications ON user_profiles_latest USING GIN (current_medications);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_natural_supplements ON user_profiles_latest USING GIN (natural_supplements);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_allergies ON user_profiles_latest USING GIN (allergies);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_health_goals ON user_profiles_latest USING GIN (health_goals);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_interested_supplements ON user_profiles_latest USING GIN (interested_supplements);
+
+CREATE OR REPLACE FUNCTION refresh_user_profile_latest() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO user_profiles_latest SELECT NEW.*
+    ON CONFLICT (user_id) DO UPDATE SET
+        id = EXCLUDED.id,
+        age_range = EXCLUDED.age_range,
+        sex = EXCLUDED.sex,
+        height_ft = EXCLUDED.height_ft,
+        height_in = EXCLUDED.height_in,
+        weight_lbs = EXCLUDED.weight_lbs,
+        physical_activity = EXCLUDED.physical_activity,
+        energy_level = EXCLUDED.energy_level,
+        diet = EXCLUDED.diet,
+        meals_per_day = EXCLUDED.meals_per_day,
+        sleep_quality = EXCLUDED.sleep_quality,
+        stress_level = EXCLUDED.stress_level,
+        pregnant_or_breastfeeding = EXCLUDED.pregnant_or_breastfeeding,
+        medical_conditions = EXCLUDED.medical_conditions,
+        current_medications = EXCLUDED.current_medications,
+        natural_supplements = EXCLUDED.natural_supplements,
+        allergies = EXCLUDED.allergies,
+        health_goals = EXCLUDED.health_goals,
+        other_health_goal = EXCLUDED.other_health_goal,
+        interested_supplements = EXCLUDED.interested_supplements,
+        additional_info = EXCLUDED.additional_info,
+        security_question_1 = EXCLUDED.security_question_1,
+        security_answer_1 = EXCLUDED.security_answer_1,
+        security_question_2 = EXCLUDED.security_question_2,
+        security_answer_2 = EXCLUDED.security_answer_2,
+        security_question_3 = EXCLUDED.security_question_3,
+        security_answer_3 = EXCLUDED.security_answer_3,
+        recovery_key = EXCLUDED.recovery_key,
+        submission_id = EXCLUDED.submission_id,
+        created_at = EXCLUDED.created_at
+    -- created_at is stamped when the profile is submitted, not when it is inserted, so a
+    -- write-behind flush that arrives late can't replace a newer submission
+    WHERE (user_profiles_latest.created_at, user_profiles_latest.id) <= (EXCLUDED.created_at, EXCLUDED.id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_profiles_refresh_latest ON user_profiles;
+CREATE TRIGGER user_profiles_refresh_latest
+    AFTER INSERT ON user_profiles
+    FOR EACH ROW EXECUTE FUNCTION refresh_user_profile_latest();
+
+-- Backfill the projection from existing history
+INSERT INTO user_profiles_latest
+SELECT DISTINCT ON (user_id) * FROM user_profiles
+ORDER BY user_id, created_at DESC, id DESC
+ON CONFLICT (user_id) DO NOTHING;
+
+-- Updates to an existing profile: only the changed columns, numbered from the full
+-- user_profiles row they build on, with a full snapshot every few revisions
+CREATE TABLE IF NOT EXISTS profile_revisions (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    base_id INTEGER NOT NULL REFERENCES user_profiles (id),
+    revision INTEGER NOT NULL,
+    is_snapshot BOOLEAN NOT NULL DEFAULT FALSE,
+    fields JSONB NOT NULL,
+    submission_id TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (base_id, revision),
+    UNIQUE (user_id, submission_id)
+);
+
+-- Applies a revision to user_profiles_latest and records it, in one transaction; called
+-- directly by the Postgres store and through RPC by the Supabase store. p_created_at is
+-- the app's submission time, so revisions and full rows are ordered by the same clock.
+-- The four-argument version is dropped first, or calls would be ambiguous between the two
+DROP FUNCTION IF EXISTS append_profile_revision(TEXT, JSONB, TEXT, INTEGER);
+CREATE OR REPLACE FUNCTION append_profile_revision(
+    p_user_id TEXT, p_changes JSONB, p_submission_id TEXT, p_snapshot_every INTEGER DEFAULT 10,
+    p_created_at TIMESTAMPTZ DEFAULT NULL
+) RETURNS INTEGER AS $$
+DECLARE
+    latest user_profiles_latest;
+    merged user_profiles_latest;
+    next_revision INTEGER;
+    existing INTEGER;
+BEGIN
+    SELECT revision INTO existing FROM profile_revisions
+    WHERE user_id = p_user_id AND submission_id = p_submission_id;
+    IF FOUND THEN
+        RETURN existing;
+    END IF;
+    SELECT * INTO latest FROM user_profiles_latest WHERE user_id = p_user_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    SELECT COALESCE(MAX(revision), 0) + 1 INTO next_revision FROM profile_revisions WHERE base_id = latest.id;
+
+    p_changes := p_changes - 'id' - 'user_id' - 'submission_id' - 'created_at';
+    merged := jsonb_populate_record(latest, p_changes);
+    merged.submission_id := p_submission_id;
+    merged.created_at := COALESCE(p_created_at, NOW());
+    -- An UPDATE, not DELETE + INSERT, so the analytics trigger only moves the counters
+    -- of values that changed instead of removing and re-adding every one of them
+    UPDATE user_profiles_latest SET
+        age_range = merged.age_range,
+        sex = merged.sex,
+        height_ft = merged.height_ft,
+        height_in = merged.height_in,
+        weight_lbs = merged.weight_lbs,
+        physical_activity = merged.physical_activity,
+        energy_level = merged.energy_level,
+        diet = merged.diet,
+        meals_per_day = merged.meals_per_day,
+        sleep_quality = merged.sleep_quality,
+        stress_level = merged.stress_level,
+        pregnant_or_breastfeeding = merged.pregnant_or_breastfeeding,
+        medical_conditions = merged.medical_conditions,
+        current_medications = merged.current_medications,
+        natural_supplements = merged.natural_supplements,
+        allergies = merged.allergies,
+        health_goals = merged.health_goals,
+        other_health_goal = merged.other_health_goal,
+        interested_supplements = merged.interested_supplements,
+        additional_info = merged.additional_info,
+        security_question_1 = merged.security_question_1,
+        security_answer_1 = merged.security_answer_1,
+        security_question_2 = merged.security_question_2,
+        security_answer_2 = merged.security_answer_2,
+        security_question_3 = merged.security_question_3,
+        security_answer_3 = merged.security_answer_3,
+        recovery_key = merged.recovery_key,
+        submission_id = merged.submission_id,
+        created_at = merged.created_at
+    WHERE user_id = p_user_id;
+
+    INSERT INTO profile_revisions (user_id, base_id, revision, is_snapshot, fields, submission_id, created_at)
+    VALUES (
+        p_user_id, latest.id, next_revision, next_revision % p_snapshot_every = 0,
+        CASE WHEN next_revision % p_snapshot_every = 0
+             THEN to_jsonb(merged) - 'id' - 'user_id' - 'submission_id' - 'created_at'
+             ELSE p_changes END,
+        p_submission_id, merged.created_at
+    );
+    RETURN next_revision;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Aggregate counts over the current profiles, maintained by trigger on user_profiles_latest.
+-- profile_analytics_keys() mirrors src/config/analytics.py: each profile counts once per
+-- value it has, plus cross tabulations and a total.
+CREATE TABLE IF NOT EXISTS profile_analytics (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+);
+
+CREATE OR REPLACE FUNCTION profile_analytics_keys(p user_profiles_latest)
+RETURNS TABLE (dimension TEXT, value TEXT) AS $$
+    SELECT 'profiles', 'all'
+    UNION
+    SELECT d, v FROM (VALUES
+        ('age_range', p.age_range), ('sex', p.sex), ('physical_activity', p.physical_activity),
+        ('energy_level', p.energy_level), ('diet', p.diet), ('meals_per_day', p.meals_per_day),
+        ('sleep_quality', p.sleep_quality), ('stress_level', p.stress_level),
+        ('pregnant_or_breastfeeding', p.pregnant_or_breastfeeding),
+        ('age_range:diet', p.age_range || ' | ' || p.diet),
+        ('age_range:stress_level', p.age_range || ' | ' || p.stress_level)
+    ) AS scalars (d, v) WHERE COALESCE(v, '') <> ''
+    UNION
+    SELECT d, trim(v) FROM (
+        SELECT 'health_goals', unnest(p.health_goals)
+        UNION ALL SELECT 'interested_supplements', unnest(p.interested_supplements)
+        UNION ALL SELECT 'medical_conditions', unnest(p.medical_conditions)
+        UNION ALL SELECT 'current_medications', unnest(p.current_medications)
+        UNION ALL SELECT 'natural_supplements', unnest(p.natural_supplements)
+        UNION ALL SELECT 'allergies', unnest(p.allergies)
+    ) AS lists (d, v) WHERE trim(v) <> ''
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Applies only the difference between the old and new row, so each profile is counted once
+CREATE OR REPLACE FUNCTION refresh_profile_analytics() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        INSERT INTO profile_analytics AS a (dimension, value, count)
+        SELECT k.dimension, k.value, -1 FROM profile_analytics_keys(OLD) k
+        WHERE TG_OP = 'DELETE' OR (k.dimension, k.value) NOT IN (SELECT * FROM profile_analytics_keys(NEW))
+        ON CONFLICT (dimension, value) DO UPDATE SET count = a.count + EXCLUDED.count;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO profile_analytics AS a (dimension, value, count)
+        SELECT k.dimension, k.value, 1 FROM profile_analytics_keys(NEW) k
+        WHERE TG_OP = 'INSERT' OR (k.dimension, k.value) NOT IN (SELECT * FROM profile_analytics_keys(OLD))
+        ON CONFLICT (dimension, value) DO UPDATE SET count = a.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_profiles_latest_analytics ON user_profiles_latest;
+CREATE TRIGGER user_profiles_latest_analytics
+    AFTER INSERT OR UPDATE OR DELETE ON user_profiles_latest
+    FOR EACH ROW EXECUTE FUNCTION refresh_profile_analytics();
+
+-- Used by scripts/rebuild_analytics.py; p_counts is [[dimension, value, count], ...]
+CREATE OR REPLACE FUNCTION replace_profile_analytics(p_counts JSONB) RETURNS INTEGER AS $$
+BEGIN
+    LOCK TABLE profile_analytics IN EXCLUSIVE MODE;
+    DELETE FROM profile_analytics;
+    INSERT INTO profile_analytics (dimension, value, count)
+    SELECT c->>0, c->>1, (c->>2)::INTEGER FROM jsonb_array_elements(p_counts) AS c;
+    RETURN jsonb_array_length(p_counts);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill the counters from existing profiles
+INSERT INTO profile_analytics (dimension, value, count)
+SELECT k.dimension, k.value, COUNT(*) FROM user_profiles_latest l CROSS JOIN LATERAL profile_analytics_keys(l) k
+GROUP BY k.dimension, k.value
+ON CONFLICT (dimension, value) DO NOTHING;
+
+-- Typo-tolerant search over the current profiles' free text. profile_search_text() mirrors
+-- SEARCH_COLUMNS in src/storage/base.py; the index expression must match the one queried.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION profile_search_text(
+    additional_info TEXT, other_health_goal TEXT, current_medications TEXT[], natural_supplements TEXT[]
+) RETURNS TEXT AS $$
+    SELECT concat_ws(' | ', additional_info, other_health_goal,
+                     array_to_string(current_medications, ' | '), array_to_string(natural_supplements, ' | '))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_search ON user_profiles_latest USING GIN (
+    profile_search_text(additional_info, other_health_goal, current_medications, natural_supplements) gin_trgm_ops
+);
+
+-- Ranked by pg_trgm word similarity, the best match of the query within the text;
+-- called directly by the Postgres store and through RPC by the Supabase store
+CREATE OR REPLACE FUNCTION search_profiles(p_query TEXT, p_limit INTEGER DEFAULT 20, p_threshold REAL DEFAULT 0.3)
+RETURNS TABLE (
+    id INTEGER, user_id TEXT, age_range TEXT, sex TEXT, medical_conditions TEXT[], current_medications TEXT[],
+    health_goals TEXT[], created_at TIMESTAMPTZ, additional_info TEXT, other_health_goal TEXT,
+    natural_supplements TEXT[], score REAL
+) AS $$
+#variable_conflict use_column
+BEGIN
+    PERFORM set_config('pg_trgm.word_similarity_threshold', p_threshold::TEXT, true);
+    RETURN QUERY
+    SELECT l.id, l.user_id, l.age_range, l.sex, l.medical_conditions, l.current_medications, l.health_goals,
+           l.created_at, l.additional_info, l.other_health_goal, l.natural_supplements,
+           word_similarity(p_query, profile_search_text(
+               l.additional_info, l.other_health_goal, l.current_medications, l.natural_supplements)) AS score
+    FROM user_profiles_latest l
+    WHERE p_query <% profile_search_text(l.additional_info, l.other_health_goal, l.current_medications, l.natural_supplements)
+    ORDER BY 12 DESC, l.created_at DESC
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Product safety rules read by the contraindication engine
+CREATE TABLE IF NOT EXISTS product_compatibility (
+    product_id VARCHAR PRIMARY KEY,
+    contraindicated_conditions JSONB DEFAULT '[]'::jsonb,
+    interacting_medications JSONB DEFAULT '[]'::jsonb,
+    contraindicated_allergens JSONB DEFAULT '[]'::jsonb,
+    avoid_when_pregnant BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
@@ -0,0 +1,56 @@
+"""
+Backfills `recovery_key` for rows written before the column existed, in both the
+user_profiles history and the user_profiles_latest projection that recovery reads.
+Runs against the Supabase project configured by SUPABASE_URL and SUPABASE_KEY, after
+schema.sql has added the column and created the projection. Re-running it only
+touches rows still missing a key.
+
+Usage:
+    python -m scripts.backfill_recovery_keys [--batch-size 500] [--dry-run]
+"""
+import argparse
+from src.storage.supabase_store import create_supabase_client
+from src.utils.security_utils import SECURITY_PAIRS, compute_recovery_key, recovery_key_secret
+
+SELECT_COLUMNS = "id,user_id," + ",".join(field for pair in SECURITY_PAIRS for field in pair)
+
+def backfill_recovery_keys(supabase, table='user_profiles', batch_size=500, dry_run=False):
+    """Pages through rows without a recovery key by id and writes the key in batches."""
+    conflict_column = 'user_id' if table == 'user_profiles_latest' else 'id'
+    last_id = 0
+    updated = skipped = 0
+    while True:
+        response = supabase.table(table).select(SELECT_COLUMNS)\
+            .is_('recovery_key', 'null').gt('id', last_id)\
+            .order('id').limit(batch_size).execute()
+        rows = response.data or []
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+
+        updates = []
+        for row in rows:
+            recovery_key = compute_recovery_key(row)
+            if recovery_key is None:
+                skipped += 1
+                continue
+            updates.append({"id": row["id"], "user_id": row["user_id"], "recovery_key": recovery_key})
+
+        if updates and not dry_run:
+            supabase.table(table).upsert(updates, on_conflict=conflict_column).execute()
+        updated += len(updates)
+        print(f"{table}: backfilled {updated} rows ({skipped} skipped), last id {last_id}")
+    return updated, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    recovery_key_secret()
+    supabase = create_supabase_client()
+    for table in ('user_profiles', 'user_profiles_latest'):
+        backfill_recovery_keys(supabase, table, args.batch_size, args.dry_run)
+
+if __name__ == "__main__":
+    main()
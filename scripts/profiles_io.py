@@ -0,0 +1,166 @@
+"""
+Streams user_profiles out to NDJSON or Parquet, and bulk-loads such files back in.
+
+Export walks the table with keyset pagination on (created_at, id), so memory stays
+at one page regardless of table size. The full history export writes each row
+followed by every revision recorded on it, rebuilt as a complete profile and
+numbered in a `revision` column (0 for the row itself); --latest-only writes just
+the current state of each profile. Import validates rows through UserProfile in
+chunks and inserts each chunk as a single batch.
+
+Usage:
+    python -m scripts.profiles_io export profiles.ndjson [--format parquet] [--latest-only]
+    python -m scripts.profiles_io import profiles.ndjson [--format parquet] [--dry-run]
+"""
+import argparse
+import json
+import sys
+import time
+from src.models.user_profile import validate_many
+from src.storage.base import LIST_COLUMNS, PROFILE_COLUMNS
+from src.storage.factory import create_store
+from src.utils.security_utils import compute_recovery_key
+
+EXPORT_COLUMNS = ("id",) + PROFILE_COLUMNS + ("created_at", "revision")
+PRESERVED_COLUMNS = ("submission_id", "created_at")
+
+def parquet_schema():
+    """Arrow schema for exported profiles; TEXT[] columns become list<string>."""
+    import pyarrow as pa
+    types = {"id": pa.int64(), "revision": pa.int64(), "height_ft": pa.int64(), "height_in": pa.int64(), "weight_lbs": pa.float64()}
+    return pa.schema([
+        (column, pa.list_(pa.string()) if column in LIST_COLUMNS else types.get(column, pa.string()))
+        for column in EXPORT_COLUMNS
+    ])
+
+class ProgressReporter:
+    """Prints rows/sec to stderr at most once per `interval` seconds."""
+
+    def __init__(self, label, interval=2.0):
+        self.label = label
+        self.interval = interval
+        self.started = self.last_report = time.perf_counter()
+        self.rows = 0
+
+    def add(self, count):
+        self.rows += count
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.rows / elapsed if elapsed else 0.0
+        print(f"{self.label}: {self.rows} rows in {elapsed:.1f}s ({rate:.0f} rows/sec)", file=sys.stderr)
+
+def iter_pages(store, page_size, latest_only):
+    page = []
+    rows = store.iter_rows(page_size=page_size, latest_only=True) if latest_only else store.iter_history(page_size)
+    for row in rows:
+        page.append({column: row.get(column) for column in EXPORT_COLUMNS})
+        if len(page) == page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+def export_profiles(store, path, fmt="ndjson", latest_only=False, page_size=5000):
+    """Writes every version of every profile (or only the latest of each) to `path`."""
+    progress = ProgressReporter("export")
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = parquet_schema()
+        with pq.ParquetWriter(path, schema) as writer:
+            for page in iter_pages(store, page_size, latest_only):
+                writer.write_table(pa.Table.from_pylist(page, schema=schema))
+                progress.add(len(page))
+    else:
+        with open(path, "w") as f:
+            for page in iter_pages(store, page_size, latest_only):
+                f.writelines(json.dumps(row, default=str) + "\n" for row in page)
+                progress.add(len(page))
+    progress.report()
+    return progress.rows
+
+def read_chunks(path, fmt="ndjson", chunk_size=1000):
+    """Yields lists of row dicts from an NDJSON or Parquet file without loading it whole."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+    chunk = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                chunk.append(json.loads(line))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def validate_chunk(rows):
+    """Returns (valid rows ready to insert, list of (index, errors)) for a chunk."""
+    # NULL arrays in the table mean "nothing listed"
+    rows = [
+        {key: [] if key in LIST_COLUMNS and value is None else value for key, value in row.items()}
+        for row in rows
+    ]
+    profiles, errors = validate_many(rows)
+    valid = []
+    for row, profile in zip(rows, profiles):
+        if profile is None:
+            continue
+        profile = profile.model_dump()
+        for column in PRESERVED_COLUMNS:
+            if row.get(column) is not None:
+                profile[column] = row[column]
+        profile["recovery_key"] = row.get("recovery_key") or compute_recovery_key(profile)
+        valid.append(profile)
+    return valid, sorted(errors.items())
+
+def import_profiles(store, path, fmt="ndjson", chunk_size=1000, dry_run=False):
+    """Validates and batch-inserts every row of `path`; returns (inserted, rejected)."""
+    progress = ProgressReporter("import")
+    inserted = rejected = offset = 0
+    for chunk in read_chunks(path, fmt, chunk_size):
+        valid, invalid = validate_chunk(chunk)
+        for index, errors in invalid:
+            messages = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'general'}: {err['msg']}" for err in errors)
+            print(f"Row {offset + index + 1} rejected: {messages}", file=sys.stderr)
+        rejected += len(invalid)
+        if valid and not dry_run:
+            inserted += store.insert_profiles(valid)
+        offset += len(chunk)
+        progress.add(len(chunk))
+    progress.report()
+    print(f"import: {inserted} inserted, {rejected} rejected", file=sys.stderr)
+    return inserted, rejected
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("ndjson", "parquet"), default=None,
+                        help="defaults to parquet for .parquet paths, otherwise ndjson")
+    parser.add_argument("--latest-only", action="store_true", help="export only the current version of each profile")
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--backend", default=None, help="overrides STORAGE_BACKEND")
+    parser.add_argument("--dry-run", action="store_true", help="validate an import without inserting")
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if args.path.endswith(".parquet") else "ndjson")
+    store = create_store(args.backend)
+    try:
+        if args.command == "export":
+            export_profiles(store, args.path, fmt, args.latest_only, args.page_size)
+        else:
+            import_profiles(store, args.path, fmt, args.page_size, args.dry_run)
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
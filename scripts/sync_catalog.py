@@ -0,0 +1,52 @@
+"""
+Syncs the Shopify product catalog into the local catalog store. By default only
+products changed since the last run are fetched; --full re-reads everything and
+also drops products deleted upstream. With --update-index the product embedding
+index (PRODUCT_INDEX_PATH) is brought up to date from the changes; --rebuild-index
+re-embeds the whole local catalog instead. Configured by SHOPIFY_STORE_URL,
+SHOPIFY_ACCESS_TOKEN, SHOPIFY_API_VERSION and CATALOG_DB_PATH.
+
+Usage:
+    python -m scripts.sync_catalog [--full] [--workers 8] [--window-size 2000] [--update-index | --rebuild-index]
+"""
+import argparse
+import os
+from src.services.catalog_sync import CatalogSync, ShopifyCatalogClient
+from src.storage.catalog_store import CatalogStore
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--window-size", type=int, default=2000)
+    parser.add_argument("--show-changes", action="store_true", help="print the changed product ids")
+    index_group = parser.add_mutually_exclusive_group()
+    index_group.add_argument("--update-index", action="store_true")
+    index_group.add_argument("--rebuild-index", action="store_true")
+    args = parser.parse_args()
+
+    store = CatalogStore(os.environ.get("CATALOG_DB_PATH", "catalog.db"))
+    sync = CatalogSync(ShopifyCatalogClient(), store, max_workers=args.workers, window_size=args.window_size)
+    report = sync.run(full=args.full)
+    print(report.summary())
+    if args.show_changes:
+        for product_id in report.added:
+            print(f"added {product_id}")
+        for product_id, fields in report.updated.items():
+            print(f"updated {product_id}: {', '.join(fields)}")
+        for product_id in report.removed:
+            print(f"removed {product_id}")
+
+    if args.update_index or args.rebuild_index:
+        from src.services.product_index import ProductIndex
+        index = ProductIndex()
+        if args.rebuild_index:
+            print(f"product index: embedded {index.rebuild(store)} products")
+        else:
+            changes = index.apply_sync(report, store)
+            print(f"product index: {changes['embedded']} embedded, {changes['metadata_only']} metadata updates, "
+                  f"{changes['deleted']} deleted")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Headless intake API: the same profile model, term canonicalization and storage as
+the Streamlit form, over HTTP.
+
+Run with:
+    uvicorn src.api.app:app --workers 4
+"""
+import os
+import math
+import uuid
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Dict, Optional
+import anyio
+from fastapi import Body, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from prometheus_client import make_asgi_app
+from pydantic import BaseModel, ValidationError, create_model
+from src.models.user_profile import UserProfile, error_messages
+from src.services.vocabulary import canonicalize_profile_terms
+from src.storage.factory import create_store
+from src.utils.db_utils import save_profile
+from src.utils.guard_utils import (
+    StoreUnavailableError, ThrottledError, client_address, create_profile_guard, guarded_load_profile,
+    guarded_recover_profile,
+)
+from src.utils.metrics import metrics_registry
+from src.utils.security_utils import SECURITY_PAIRS, generate_profile_code, recovery_key_secret
+
+SECURITY_ANSWERS = tuple(answer for _, answer in SECURITY_PAIRS)
+
+# Loaded profiles are returned without security answers; every field is optional so
+# rows saved before a field existed still serialize
+ProfileResponse = create_model(
+    "ProfileResponse",
+    **{name: (Optional[field.annotation], None) for name, field in UserProfile.model_fields.items()
+       if name not in SECURITY_ANSWERS},
+    created_at=(Optional[Any], None),
+)
+
+class ProfileCodeResponse(BaseModel):
+    user_id: str
+    submission_id: Optional[str] = None
+
+class RecoveryRequest(BaseModel):
+    security_question_1: str
+    security_answer_1: str
+    security_question_2: str
+    security_answer_2: str
+    security_question_3: str
+    security_answer_3: str
+
+class ProfileValidationError(Exception):
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    recovery_key_secret()
+    app.state.store = create_store()
+    # Store calls block, so they run on worker threads; the limiter keeps the number
+    # in flight at the connection pool size so requests queue here, not in the pool
+    app.state.db_limiter = anyio.CapacityLimiter(int(os.environ.get("DATABASE_POOL_MAX", "10")))
+    app.state.guard = create_profile_guard()
+    yield
+    app.state.store.close()
+
+app = FastAPI(title="Nutrition House Intake API", lifespan=lifespan)
+# Store call latency, errors and payload sizes are recorded in db_utils; with several
+# workers, set PROMETHEUS_MULTIPROC_DIR so /metrics aggregates all of them
+app.mount("/metrics", make_asgi_app(registry=metrics_registry()))
+
+@app.exception_handler(ProfileValidationError)
+async def profile_validation_error(request: Request, exc: ProfileValidationError):
+    return JSONResponse(status_code=422, content={"errors": exc.errors})
+
+@app.exception_handler(ThrottledError)
+async def throttled(request: Request, exc: ThrottledError):
+    retry_after = math.ceil(exc.retry_after)
+    return JSONResponse(status_code=429, headers={"Retry-After": str(retry_after)},
+                        content={"detail": f"Too many attempts, retry in {retry_after}s."})
+
+@app.exception_handler(StoreUnavailableError)
+async def store_unavailable(request: Request, exc: StoreUnavailableError):
+    return JSONResponse(status_code=503, content={"detail": "The profile store is unavailable, please try again."})
+
+async def run_db(request: Request, fn, *args):
+    return await anyio.to_thread.run_sync(fn, request.app.state.store, *args,
+                                          limiter=request.app.state.db_limiter)
+
+def request_clients(request: Request) -> Dict[str, Optional[str]]:
+    """API callers have no session, so they are throttled by IP address only."""
+    address = request.client.host if request.client else None
+    return {"ip": client_address(address, request.headers.get("X-Forwarded-For"))}
+
+async def load_profile(request: Request, user_id: str):
+    """
+    Loads a profile by code through the guard. The throttle check runs here, before the
+    request queues for a database thread, so rejected attempts never take one.
+    """
+    clients = request_clients(request)
+    request.app.state.guard.check("load_profile", clients)
+    return await run_db(request, partial(guarded_load_profile, request.app.state.guard), user_id, clients, True)
+
+def build_profile(data: dict) -> UserProfile:
+    """Canonicalizes term lists and validates, raising ProfileValidationError with the form's messages."""
+    fields = {key: value for key, value in data.items() if key in UserProfile.model_fields}
+    try:
+        return UserProfile(**canonicalize_profile_terms(fields))
+    except ValidationError as e:
+        raise ProfileValidationError(error_messages(e))
+
+async def store_profile(request: Request, profile: UserProfile, previous: dict = None) -> ProfileCodeResponse:
+    submission_id = uuid.uuid4().hex
+    saved = await run_db(request, save_profile, dict(profile.model_dump(), submission_id=submission_id), previous)
+    if saved is None:
+        raise HTTPException(status_code=503, detail="The profile could not be saved, please try again.")
+    return ProfileCodeResponse(user_id=profile.user_id, submission_id=submission_id)
+
+@app.post("/profiles", status_code=201)
+async def create_profile(request: Request, data: Dict[str, Any] = Body(...)) -> ProfileCodeResponse:
+    """Creates a profile and returns its new profile code."""
+    profile = build_profile(dict(data, user_id=generate_profile_code()))
+    return await store_profile(request, profile)
+
+@app.put("/profiles/{user_id}")
+async def update_profile(request: Request, user_id: str, data: Dict[str, Any] = Body(...)) -> ProfileCodeResponse:
+    """
+    Saves a new revision of an existing profile. Fields left out keep their current
+    values, and the security questions can't be changed, as in the form.
+    """
+    current = await load_profile(request, user_id)
+    if not current:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    locked = {field for pair in SECURITY_PAIRS for field in pair} | {"user_id"}
+    changes = {key: value for key, value in data.items() if key not in locked}
+    return await store_profile(request, build_profile(dict(current, **changes)), current)
+
+@app.get("/profiles/{user_id}")
+async def get_profile(request: Request, user_id: str) -> ProfileResponse:
+    profile = await load_profile(request, user_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return profile
+
+@app.post("/profiles/recover", response_model_exclude_none=True)
+async def recover_profile_code(request: Request, answers: RecoveryRequest) -> ProfileCodeResponse:
+    """Returns the profile code for a set of security questions and answers."""
+    clients = request_clients(request)
+    request.app.state.guard.check("recover_profile", clients)
+    profile = await run_db(request, partial(guarded_recover_profile, request.app.state.guard),
+                           answers.model_dump(), clients, True)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return ProfileCodeResponse(user_id=profile["user_id"])
+
+@app.get("/health")
+async def health() -> Dict[str, str]:
+    return {"status": "ok"}
@@ -0,0 +1,18 @@
+# Profile fields counted by the intake analytics. Each profile counts once per value it
+# has, so "health_goals / Better Sleep" is the number of profiles with that goal.
+# schema.sql mirrors these in profile_analytics_keys(); keep the two in step.
+SCALAR_DIMENSIONS = (
+    "age_range", "sex", "physical_activity", "energy_level", "diet",
+    "meals_per_day", "sleep_quality", "stress_level", "pregnant_or_breastfeeding",
+)
+LIST_DIMENSIONS = (
+    "health_goals", "interested_supplements", "medical_conditions",
+    "current_medications", "natural_supplements", "allergies",
+)
+# Cross tabulations, counted under "first:second" with values "first value | second value"
+CROSS_DIMENSIONS = (
+    ("age_range", "diet"),
+    ("age_range", "stress_level"),
+)
+TOTAL_DIMENSION = ("profiles", "all")
+CROSS_SEPARATOR = " | "
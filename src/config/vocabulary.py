@@ -0,0 +1,132 @@
+VOCABULARY = {
+    "medication": {
+        "Acetaminophen": ["tylenol", "paracetamol"],
+        "Albuterol": ["ventolin", "proair", "salbutamol"],
+        "Alprazolam": ["xanax"],
+        "Amlodipine": ["norvasc"],
+        "Amoxicillin": ["amoxil"],
+        "Aspirin": ["asa", "acetylsalicylic acid", "baby aspirin"],
+        "Atorvastatin": ["lipitor"],
+        "Bupropion": ["wellbutrin"],
+        "Cetirizine": ["zyrtec"],
+        "Citalopram": ["celexa"],
+        "Clopidogrel": ["plavix"],
+        "Diphenhydramine": ["benadryl"],
+        "Escitalopram": ["lexapro"],
+        "Fluoxetine": ["prozac"],
+        "Gabapentin": ["neurontin"],
+        "Hydrochlorothiazide": ["hctz"],
+        "Ibuprofen": ["advil", "motrin"],
+        "Levothyroxine": ["synthroid", "levoxyl"],
+        "Lisinopril": ["zestril", "prinivil"],
+        "Loratadine": ["claritin"],
+        "Losartan": ["cozaar"],
+        "Metformin": ["glucophage"],
+        "Metoprolol": ["lopressor", "toprol"],
+        "Montelukast": ["singulair"],
+        "Naproxen": ["aleve"],
+        "Omeprazole": ["prilosec"],
+        "Oral Contraceptive": ["birth control", "birth control pill", "the pill"],
+        "Pantoprazole": ["protonix"],
+        "Prednisone": ["deltasone"],
+        "Rosuvastatin": ["crestor"],
+        "Sertraline": ["zoloft"],
+        "Simvastatin": ["zocor"],
+        "Tramadol": ["ultram"],
+        "Warfarin": ["coumadin", "jantoven"],
+    },
+    "supplement": {
+        "Ashwagandha": ["withania somnifera"],
+        "Biotin": ["vitamin b7"],
+        "Calcium": ["calcium carbonate", "calcium citrate"],
+        "Coenzyme Q10": ["coq10", "ubiquinol", "ubiquinone"],
+        "Collagen": ["collagen peptides"],
+        "Creatine": ["creatine monohydrate"],
+        "Echinacea": [],
+        "Elderberry": ["sambucus"],
+        "Fish Oil": ["omega-3 fish oil", "omega 3 fish oil"],
+        "Garlic": ["garlic extract"],
+        "Ginger": ["ginger root"],
+        "Ginkgo Biloba": ["ginkgo"],
+        "Ginseng": ["panax ginseng"],
+        "Glucosamine": ["glucosamine chondroitin"],
+        "Iron": ["ferrous sulfate"],
+        "Magnesium": ["magnesium glycinate", "magnesium citrate"],
+        "Melatonin": [],
+        "Milk Thistle": ["silymarin"],
+        "Multivitamin": ["multi vitamin", "multi-vitamin", "prenatal vitamin", "prenatal"],
+        "Omega-3": ["omega 3", "omega-3 fatty acids", "epa dha", "algae oil"],
+        "Probiotics": ["probiotic", "lactobacillus"],
+        "Protein Powder": ["whey protein", "whey"],
+        "St. John's Wort": ["st johns wort", "saint johns wort", "hypericum"],
+        "Turmeric": ["curcumin", "turmeric curcumin", "tumeric curcumin"],
+        "Valerian Root": ["valerian"],
+        "Vitamin B12": ["b12", "cobalamin", "methylcobalamin"],
+        "Vitamin B Complex": ["b complex"],
+        "Vitamin C": ["ascorbic acid"],
+        "Vitamin D": [],
+        "Vitamin D3": ["d3", "cholecalciferol"],
+        "Vitamin E": ["tocopherol"],
+        "Vitamin K": [],
+        "Vitamin K2": ["k2", "menaquinone"],
+        "Zinc": ["zinc gluconate"],
+    },
+    "allergen": {
+        "Peanuts": ["peanut", "peanut butter"],
+        "Tree Nuts": ["tree nut", "almonds", "walnuts", "cashews"],
+        "Shellfish": ["shrimp", "crab", "lobster"],
+        "Fish": [],
+        "Milk": ["dairy", "lactose"],
+        "Eggs": ["egg"],
+        "Wheat": ["gluten"],
+        "Soy": ["soya", "soybeans"],
+        "Sesame": [],
+        "Penicillin": ["penicillins", "amoxicillin allergy"],
+        "Sulfa": ["sulfa drugs", "sulfonamides", "sulfonamide"],
+        "Latex": [],
+        "Bee Stings": ["bees", "bee venom"],
+        "Pollen": ["hay fever", "seasonal allergies"],
+        "NSAIDs": ["nsaid"],
+    },
+    "condition": {
+        "Anxiety": ["generalized anxiety disorder", "gad"],
+        "Arthritis": ["osteoarthritis", "rheumatoid arthritis"],
+        "Asthma": [],
+        "Atrial Fibrillation": ["afib", "a-fib"],
+        "Bleeding Disorder": ["hemophilia"],
+        "Celiac Disease": ["celiac"],
+        "Chronic Kidney Disease": ["ckd", "kidney disease"],
+        "Depression": ["major depressive disorder", "mdd"],
+        "Diabetes": ["diabetes mellitus"],
+        "GERD": ["acid reflux", "reflux", "heartburn"],
+        "Gout": [],
+        "Heart Disease": ["coronary artery disease", "cad"],
+        "High Cholesterol": ["hyperlipidemia", "hypercholesterolemia"],
+        "Hypertension": ["high blood pressure", "hbp"],
+        "Hypothyroidism": ["underactive thyroid", "hashimoto's", "hashimotos"],
+        "Hyperthyroidism": ["overactive thyroid", "graves disease"],
+        "Insomnia": ["trouble sleeping"],
+        "Irritable Bowel Syndrome": ["ibs"],
+        "Liver Disease": ["fatty liver", "cirrhosis"],
+        "Migraine": ["migraines", "chronic headaches"],
+        "Osteoporosis": ["osteopenia"],
+        "PCOS": ["polycystic ovary syndrome"],
+        "Type 1 Diabetes": ["t1d", "type i diabetes", "juvenile diabetes"],
+        "Type 2 Diabetes": ["t2d", "type ii diabetes"],
+    },
+}
+
+# Subtypes are terms of their own, so "Type 2 Diabetes" is stored and counted as typed,
+# but they also count as the broader term when a profile is screened or products are
+# matched. Omega-3 supplements are mostly fish oil, so they are screened as it too.
+BROADER_TERMS = {
+    "condition": {
+        "Type 1 Diabetes": "Diabetes",
+        "Type 2 Diabetes": "Diabetes",
+    },
+    "supplement": {
+        "Omega-3": "Fish Oil",
+        "Vitamin D3": "Vitamin D",
+        "Vitamin K2": "Vitamin K",
+    },
+}
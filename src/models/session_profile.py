@@ -0,0 +1,87 @@
+import typing
+from functools import lru_cache
+from typing import Any, Dict, Iterator
+from src.config.form_defaults import FORM_FIELDS
+from src.models.user_profile import UserProfile
+
+PROFILE_FIELDS = tuple(UserProfile.model_fields)
+FIELD_INDEX = {name: index for index, name in enumerate(PROFILE_FIELDS)}
+LIST_FIELDS = frozenset(
+    name for name, field in UserProfile.model_fields.items() if typing.get_origin(field.annotation) is list
+)
+# Fields whose values come from a fixed set of widget options, so equal values can share one object
+CHOICE_FIELDS = frozenset(
+    name for name, value in FORM_FIELDS.items() if name in FIELD_INDEX and isinstance(value, str) and value
+) | {"security_question_1", "security_question_2", "security_question_3"}
+
+def _default(name: str):
+    if name in LIST_FIELDS:
+        return ()
+    if name in FORM_FIELDS:
+        return FORM_FIELDS[name]
+    field = UserProfile.model_fields[name]
+    return "" if field.is_required() or field.default is None else field.default
+
+PROFILE_DEFAULTS = tuple(_default(name) for name in PROFILE_FIELDS)
+
+@lru_cache(maxsize=8192)
+def _shared(value: str) -> str:
+    """Returns one shared object per distinct value, so sessions don't each hold a copy of "Hypertension"."""
+    return value
+
+def _compact(name: str, value):
+    if value is None:
+        return PROFILE_DEFAULTS[FIELD_INDEX[name]]
+    if name in LIST_FIELDS:
+        return tuple(_shared(term) if isinstance(term, str) else term for term in value)
+    if name in CHOICE_FIELDS and isinstance(value, str):
+        return _shared(value)
+    return value
+
+class SessionProfile:
+    """
+    The profile a Streamlit session is editing, stored as one tuple ordered like UserProfile.
+
+    A fresh or reset profile shares the module-level PROFILE_DEFAULTS tuple, so it costs
+    a single small object. A loaded profile keeps only the schema fields (not row
+    metadata such as recovery_key), holds list fields as tuples and shares repeated
+    option and term strings across sessions. Reads go through the same `get` and `[]`
+    the form sections already use; list fields come back as new lists, as they would
+    from the store.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: tuple = PROFILE_DEFAULTS):
+        self._values = values
+
+    @classmethod
+    def from_profile(cls, profile: Dict[str, Any]) -> "SessionProfile":
+        return cls(tuple(_compact(name, profile.get(name)) for name in PROFILE_FIELDS))
+
+    def reset(self):
+        self._values = PROFILE_DEFAULTS
+
+    def get(self, key: str, default=None):
+        index = FIELD_INDEX.get(key)
+        if index is None:
+            return default
+        value = self._values[index]
+        return list(value) if key in LIST_FIELDS else value
+
+    def __getitem__(self, key: str):
+        if key not in FIELD_INDEX:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __contains__(self, key) -> bool:
+        return key in FIELD_INDEX
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(PROFILE_FIELDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self.get(name) for name in PROFILE_FIELDS}
+
+    def __repr__(self):
+        return f"SessionProfile(user_id={self._values[FIELD_INDEX['user_id']]!r})"
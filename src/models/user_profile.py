@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, validator, root_validator
-from typing import List, Optional, Union
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator, model_validator
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 class UserProfile(BaseModel):
     user_id: str
@@ -30,7 +30,8 @@ class UserProfile(BaseModel):
     security_question_3: str
     security_answer_3: str
 
-    @validator('weight_lbs', pre=True, allow_reuse=True)
+    @field_validator('weight_lbs', mode='before')
+    @classmethod
     def validate_weight(cls, v):
         if v is None or v == '':
             return None
@@ -42,17 +43,50 @@ class UserProfile(BaseModel):
         except (ValueError, TypeError):
             raise ValueError('Please enter a valid number for weight.')
 
-    @validator('security_answer_1', 'security_answer_2', 'security_answer_3', pre=True, allow_reuse=True)
+    @field_validator('security_answer_1', 'security_answer_2', 'security_answer_3', mode='before')
+    @classmethod
     def validate_security_answers(cls, v):
         if not v or not v.strip():
             raise ValueError('Please answer all three security questions.')
         return v
 
-    @root_validator(pre=True)
+    @model_validator(mode='before')
+    @classmethod
     def validate_unique_security_questions(cls, values):
+        if not isinstance(values, dict):
+            return values
         q1 = values.get('security_question_1')
         q2 = values.get('security_question_2')
         q3 = values.get('security_question_3')
         if len({q1, q2, q3}) != 3:
             raise ValueError('Security Questions: You cannot choose the same question multiple times. Please select three unique security questions.')
         return values
+
+_PROFILE_LIST_ADAPTER = TypeAdapter(List[UserProfile])
+
+def validate_many(rows: Sequence[dict]) -> Tuple[List[Optional[UserProfile]], Dict[int, list]]:
+    """
+    Validates a batch of profile dicts in one call without stopping at the first bad row.
+
+    Returns a list aligned with `rows` holding a UserProfile or None for each row, and a
+    dict mapping the index of every invalid row to its errors (`loc` is relative to the row).
+    """
+    rows = list(rows)
+    try:
+        return _PROFILE_LIST_ADAPTER.validate_python(rows), {}
+    except ValidationError as e:
+        errors = {}
+        for error in e.errors():
+            index, *loc = error['loc']
+            errors.setdefault(index, []).append(dict(error, loc=tuple(loc)))
+
+    valid_indexes = [i for i in range(len(rows)) if i not in errors]
+    valid_profiles = _PROFILE_LIST_ADAPTER.validate_python([rows[i] for i in valid_indexes])
+    profiles = [None] * len(rows)
+    for index, profile in zip(valid_indexes, valid_profiles):
+        profiles[index] = profile
+    return profiles, errors
+
+def error_messages(error: ValidationError) -> Dict[str, str]:
+    """Maps a UserProfile ValidationError to {field: message}, as shown next to form fields."""
+    return {err['loc'][0] if err['loc'] else 'general': err['msg'] for err in error.errors()}
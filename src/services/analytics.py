@@ -0,0 +1,48 @@
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+from src.config.analytics import CROSS_DIMENSIONS, CROSS_SEPARATOR, LIST_DIMENSIONS, SCALAR_DIMENSIONS, TOTAL_DIMENSION
+from src.storage.base import ProfileStore
+
+ANALYTICS_COLUMNS = sorted({"user_id", *SCALAR_DIMENSIONS, *LIST_DIMENSIONS, *(c for pair in CROSS_DIMENSIONS for c in pair)})
+
+def analytics_keys(profile: dict) -> Set[Tuple[str, str]]:
+    """The (dimension, value) pairs a profile counts under; the Python twin of the database triggers."""
+    keys = {TOTAL_DIMENSION}
+    for column in SCALAR_DIMENSIONS:
+        if profile.get(column):
+            keys.add((column, str(profile[column])))
+    for first, second in CROSS_DIMENSIONS:
+        if profile.get(first) and profile.get(second):
+            keys.add((f"{first}:{second}", f"{profile[first]}{CROSS_SEPARATOR}{profile[second]}"))
+    for column in LIST_DIMENSIONS:
+        for value in profile.get(column) or []:
+            if isinstance(value, str) and value.strip():
+                keys.add((column, value.strip()))
+    return keys
+
+def rebuild_analytics(store: ProfileStore, page_size: int = 1000) -> Tuple[int, int]:
+    """
+    Recomputes every counter in one streaming pass over user_profiles_latest and swaps
+    them in. Saves made during the pass aren't reflected, so run it when writes are
+    quiet. Returns (profiles read, counters written).
+    """
+    counts = Counter()
+    profiles = 0
+    for row in store.iter_rows(page_size=page_size, latest_only=True, columns=ANALYTICS_COLUMNS):
+        counts.update(analytics_keys(row))
+        profiles += 1
+    return profiles, store.replace_analytics(dict(counts))
+
+def breakdown(counts: Dict[Tuple[str, str], int], dimension: str, limit: int = None) -> List[Tuple[str, int]]:
+    """(value, count) pairs for one dimension, most common first."""
+    values = sorted(((value, count) for (name, value), count in counts.items() if name == dimension and count > 0),
+                    key=lambda item: (-item[1], item[0]))
+    return values[:limit] if limit else values
+
+def cross_table(counts: Dict[Tuple[str, str], int], first: str, second: str) -> Dict[str, Dict[str, int]]:
+    """{first value: {second value: count}} from a cross tabulation."""
+    table: Dict[str, Dict[str, int]] = {}
+    for value, count in breakdown(counts, f"{first}:{second}"):
+        row, _, column = value.partition(CROSS_SEPARATOR)
+        table.setdefault(row, {})[column] = count
+    return table
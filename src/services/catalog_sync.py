@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import requests
+from src.storage.catalog_store import CatalogStore
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+SYNC_FIELDS = "id,title,handle,vendor,product_type,body_html,tags,status,updated_at,variants"
+
+def parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+def format_timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+class ShopifyCatalogClient:
+    """
+    Minimal Shopify Admin REST client for product sync.
+
+    Only the `fields` the catalog store needs are requested, and byte and request
+    counters are kept so a sync can report what it transferred. Each thread gets
+    its own HTTP session.
+    """
+
+    def __init__(self, store_url: str = None, access_token: str = None, api_version: str = None,
+                 page_size: int = 250, timeout: float = 30.0):
+        store_url = store_url or os.environ.get("SHOPIFY_STORE_URL", "")
+        api_version = api_version or os.environ.get("SHOPIFY_API_VERSION", "2024-01")
+        self.base_url = f"{store_url.rstrip('/')}/admin/api/{api_version}"
+        self.access_token = access_token or os.environ.get("SHOPIFY_ACCESS_TOKEN")
+        self.page_size = page_size
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_received = 0
+
+    def _get(self, path: str, params: dict) -> requests.Response:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            if self.access_token:
+                session.headers["X-Shopify-Access-Token"] = self.access_token
+        response = session.get(f"{self.base_url}/{path}", params=params, timeout=self.timeout)
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += len(response.content)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _window(updated_min: Optional[datetime], updated_max: Optional[datetime]) -> dict:
+        params = {}
+        if updated_min is not None:
+            params["updated_at_min"] = format_timestamp(updated_min)
+        if updated_max is not None:
+            params["updated_at_max"] = format_timestamp(updated_max)
+        return params
+
+    def count(self, updated_min: Optional[datetime] = None, updated_max: Optional[datetime] = None) -> int:
+        """Returns the number of products updated in a time window."""
+        return self._get("products/count.json", self._window(updated_min, updated_max)).json()["count"]
+
+    def page(self, updated_min: Optional[datetime], updated_max: Optional[datetime], since_id: int = 0,
+             fields: str = SYNC_FIELDS) -> List[dict]:
+        """Returns up to page_size products in the window with ids above `since_id`, in id order."""
+        params = self._window(updated_min, updated_max)
+        params.update({"since_id": since_id, "limit": self.page_size, "fields": fields})
+        return self._get("products.json", params).json()["products"]
+
+@dataclass
+class SyncReport:
+    """What a sync run changed, for logging and selective cache invalidation downstream."""
+    full: bool
+    added: List[str] = field(default_factory=list)
+    updated: Dict[str, List[str]] = field(default_factory=dict)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    not_modified: bool = False
+    windows: int = 0
+    requests: int = 0
+    bytes_received: int = 0
+    duration: float = 0.0
+    cursor: Optional[str] = None
+
+    @property
+    def changed_ids(self) -> List[str]:
+        return self.added + list(self.updated) + self.removed
+
+    def ids_with_changed(self, *fields) -> List[str]:
+        """Ids whose listed fields changed (plus added and removed ids), e.g. ("title", "body_html")."""
+        touched = [product_id for product_id, changed in self.updated.items() if set(changed) & set(fields)]
+        return self.added + touched + self.removed
+
+    def summary(self) -> str:
+        if self.not_modified:
+            return f"catalog not modified since {self.cursor} ({self.requests} request, {self.duration:.2f}s)"
+        return (
+            f"{'full' if self.full else 'incremental'} sync: {len(self.added)} added, {len(self.updated)} updated, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged in {self.windows} windows; "
+            f"{self.requests} requests, {self.bytes_received / 1e6:.1f} MB, {self.duration:.1f}s"
+        )
+
+class CatalogSync:
+    """
+    Pulls products changed since the stored cursor into a CatalogStore.
+
+    The cursor is the newest `updated_at` seen by the previous run. A run first asks
+    for the ids and `updated_at` of the products updated since the cursor, which for
+    an unchanged catalog are just the ones at the cursor, already stored with the same
+    timestamps: one small request. Otherwise the window from the cursor to now is split in
+    half until each piece holds at most `window_size` products, and up to
+    `max_workers` windows are paged concurrently (each one sequentially by since_id,
+    as the API requires). Pages are applied on the calling thread as windows finish.
+
+    Incremental runs can't see deletions, which the API doesn't report; a full run
+    removes every local product it didn't receive.
+    """
+
+    def __init__(self, client: ShopifyCatalogClient, store: CatalogStore, name: str = "shopify",
+                 max_workers: int = 8, window_size: int = 2000):
+        self.client = client
+        self.store = store
+        self.name = name
+        self.max_workers = max_workers
+        self.window_size = window_size
+
+    def run(self, full: bool = False) -> SyncReport:
+        started = time.perf_counter()
+        requests_before, bytes_before = self.client.requests, self.client.bytes_received
+        state = self.store.get_state(self.name)
+        cursor = None if full or not state["cursor"] else parse_timestamp(state["cursor"])
+        report = SyncReport(full=full or cursor is None, cursor=state["cursor"])
+
+        if cursor is not None:
+            report.not_modified = self._unchanged_since(cursor)
+        if not report.not_modified:
+            newest = self._sync(cursor, report)
+            if newest is not None:
+                report.cursor = format_timestamp(newest)
+            self.store.set_state(self.name, report.cursor, None, format_timestamp(datetime.now(timezone.utc)))
+
+        report.requests = self.client.requests - requests_before
+        report.bytes_received = self.client.bytes_received - bytes_before
+        report.duration = time.perf_counter() - started
+        return report
+
+    def _unchanged_since(self, cursor: datetime) -> bool:
+        """
+        True if every active product updated at or after the cursor is stored locally with
+        the same `updated_at`. A product edited again after the last run has a newer one; a
+        full page means there is too much to compare and something surely changed.
+        """
+        page = self.client.page(cursor, None, fields="id,updated_at,status")
+        if len(page) >= self.client.page_size:
+            return False
+        stored = {product["product_id"]: product["updated_at"]
+                  for product in self.store.get_products([str(product["id"]) for product in page])}
+        return all(
+            parse_timestamp(stored[str(product["id"])]) == parse_timestamp(product["updated_at"])
+            if str(product["id"]) in stored else product.get("status", "active") != "active"
+            for product in page
+        )
+
+    def _sync(self, cursor: Optional[datetime], report: SyncReport) -> Optional[datetime]:
+        # Window bounds are inclusive, so anything updated later in this second is picked
+        # up again by the next run, which starts from the newest timestamp seen here
+        until = datetime.now(timezone.utc).replace(microsecond=0)
+        seen = set()
+        newest = None
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="catalog-sync") as pool:
+            windows = self._plan(pool, cursor or EPOCH, until)
+            report.windows = len(windows)
+            futures = [pool.submit(self._fetch_window, start, end) for start, end in windows]
+            for future in as_completed(futures):
+                # A product updated exactly on a split point appears in both windows
+                products = [p for p in future.result() if str(p["id"]) not in seen]
+                seen.update(str(p["id"]) for p in products)
+                for product in products:
+                    updated_at = parse_timestamp(product["updated_at"])
+                    newest = updated_at if newest is None or updated_at > newest else newest
+                added, updated, removed, unchanged = self.store.apply(products)
+                report.added += added
+                report.updated.update(updated)
+                report.removed += removed
+                report.unchanged += unchanged
+        if report.full:
+            report.removed += self.store.remove_missing(seen)
+        return newest
+
+    def _plan(self, pool: ThreadPoolExecutor, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Bisects [start, end] by product count until every window fits in window_size."""
+        windows, pending = [], [(start, end)]
+        while pending:
+            counts = list(pool.map(lambda window: self.client.count(*window), pending))
+            split = []
+            for (low, high), count in zip(pending, counts):
+                if not count:
+                    continue
+                if count <= self.window_size or high - low <= timedelta(seconds=1):
+                    windows.append((low, high))
+                else:
+                    middle = (low + (high - low) / 2).replace(microsecond=0)
+                    split += [(low, middle), (middle, high)]
+            pending = split
+        return windows
+
+    def _fetch_window(self, start: datetime, end: datetime) -> List[dict]:
+        products, since_id = [], 0
+        while True:
+            page = self.client.page(start, end, since_id)
+            products += page
+            if len(page) < self.client.page_size:
+                return products
+            since_id = page[-1]["id"]
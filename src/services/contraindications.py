@@ -0,0 +1,173 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from src.services.vocabulary import broader_term, get_vocabulary_index, normalize_text
+
+PREGNANCY_FEATURE = "pregnancy"
+# Profile term lists screened against the rules, with the namespace and vocabulary kind of each
+PROFILE_TERM_FIELDS = (
+    ("medical_conditions", "condition", "condition"),
+    ("current_medications", "substance", "medication"),
+    ("natural_supplements", "substance", "supplement"),
+    ("allergies", "allergen", "allergen"),
+)
+
+@lru_cache(maxsize=65536)
+def term_feature(namespace: str, term: str, kind: Optional[str] = None) -> Optional[str]:
+    """
+    Maps a raw or stored term to a feature key such as "substance:warfarin". Only exact
+    and alias matches share a key with the vocabulary term; anything else, including
+    negated entries like "no diabetes", keys on its own name.
+    """
+    matched = get_vocabulary_index().match(term, kind) if str(term).strip() else None
+    if matched is None:
+        return None
+    key = normalize_text(matched.canonical or matched.name)
+    if not key:
+        return None
+    if namespace == "condition" and key.startswith("pregnan"):
+        return PREGNANCY_FEATURE
+    return f"{namespace}:{key}"
+
+@lru_cache(maxsize=65536)
+def suggested_feature(namespace: str, term: str, kind: Optional[str] = None) -> Optional[str]:
+    """The feature key of the known term a near miss such as "Warfrin" was probably meant as."""
+    matched = get_vocabulary_index().match(term, kind) if str(term).strip() else None
+    if matched is None or matched.canonical or not matched.suggestion:
+        return None
+    return term_feature(namespace, matched.suggestion, kind)
+
+@lru_cache(maxsize=65536)
+def broader_feature(namespace: str, term: str, kind: Optional[str] = None) -> Optional[str]:
+    """The feature key of the broader term a subtype such as "Type 2 Diabetes" also counts as."""
+    matched = get_vocabulary_index().match(term, kind) if str(term).strip() else None
+    if matched is None:
+        return None
+    broader = broader_term(matched.kind, matched.canonical or matched.suggestion)
+    return term_feature(namespace, broader, kind) if broader else None
+
+def unresolved_terms(profile: dict) -> List[Tuple[str, str, str]]:
+    """(field, entry, suggestion) for the profile's entries that only nearly match a known term."""
+    unresolved = []
+    index = get_vocabulary_index()
+    for field, _, kind in PROFILE_TERM_FIELDS:
+        for term in profile.get(field) or []:
+            matched = index.match(term, kind) if str(term).strip() else None
+            if matched is not None and not matched.canonical and matched.suggestion:
+                unresolved.append((field, term, matched.suggestion))
+    return unresolved
+
+def rule_features(rule: dict) -> List[str]:
+    """Feature keys that make a product unsafe, from a product_compatibility row."""
+    features = []
+    for term in rule.get("contraindicated_conditions") or []:
+        features.append(term_feature("condition", term, "condition"))
+    for term in rule.get("interacting_medications") or []:
+        features.append(term_feature("substance", term, "medication"))
+    for term in rule.get("contraindicated_allergens") or []:
+        features.append(term_feature("allergen", term, "allergen"))
+    if rule.get("avoid_when_pregnant"):
+        features.append(PREGNANCY_FEATURE)
+    return [feature for feature in features if feature]
+
+def profile_features(profile: dict) -> List[str]:
+    """
+    Feature keys present on a profile: conditions, medications and supplements, allergies,
+    pregnancy. An entry that only nearly matches a known term also counts as that term,
+    so a misspelled "Warfrin" is screened as warfarin instead of ruling nothing out, and
+    a subtype also counts as its broader term, so "Type 2 Diabetes" is screened as diabetes.
+    """
+    features = []
+    for field, namespace, kind in PROFILE_TERM_FIELDS:
+        for term in profile.get(field) or []:
+            features.append(term_feature(namespace, term, kind))
+            features.append(suggested_feature(namespace, term, kind))
+            features.append(broader_feature(namespace, term, kind))
+    if profile.get("pregnant_or_breastfeeding") == "Yes":
+        features.append(PREGNANCY_FEATURE)
+    return [feature for feature in features if feature]
+
+class ContraindicationEngine:
+    """
+    Product safety rules compiled into bitsets.
+
+    For every feature (a condition, a medication or supplement, an allergen, or
+    pregnancy) the engine keeps a packed bitset over the catalog with a bit set for
+    each product that feature rules out. A profile's unsafe set is the OR of the rows
+    for its features, and the safe set is its complement, so scoring costs a few
+    vectorized ORs over catalog_size / 8 bytes regardless of how many rules exist.
+    """
+
+    def __init__(self, rules: Iterable[dict]):
+        rules = list(rules)
+        self.product_ids = [rule["product_id"] for rule in rules]
+        self.positions = {product_id: i for i, product_id in enumerate(self.product_ids)}
+        self.feature_index: Dict[str, int] = {}
+        rows, cols = [], []
+        for product, rule in enumerate(rules):
+            for feature in rule_features(rule):
+                rows.append(self.feature_index.setdefault(feature, len(self.feature_index)))
+                cols.append(product)
+
+        size = len(self.product_ids)
+        unpacked = np.zeros((len(self.feature_index) + 1, size), dtype=bool)
+        unpacked[rows, cols] = True
+        # The extra all-zero row stands in for profiles with no known features
+        self.feature_bits = np.packbits(unpacked, axis=1, bitorder="little")
+        self.empty_feature = len(self.feature_index)
+        self.catalog_mask = np.packbits(np.ones(size, dtype=bool), bitorder="little")
+
+    def encode(self, profile: dict) -> np.ndarray:
+        """Returns the feature indices for a profile; unknown features are dropped."""
+        indexes = {self.feature_index[f] for f in profile_features(profile) if f in self.feature_index}
+        return np.fromiter(sorted(indexes), dtype=np.intp, count=len(indexes))
+
+    def unsafe_bits(self, features: np.ndarray) -> np.ndarray:
+        if len(features) == 0:
+            return self.feature_bits[self.empty_feature]
+        return np.bitwise_or.reduce(self.feature_bits[features], axis=0)
+
+    def safe_bits(self, profile: dict) -> np.ndarray:
+        """Packed bitset of products that are safe for the profile."""
+        return ~self.unsafe_bits(self.encode(profile)) & self.catalog_mask
+
+    def safe_mask(self, profile: dict) -> np.ndarray:
+        return np.unpackbits(self.safe_bits(profile), count=len(self.product_ids), bitorder="little").astype(bool)
+
+    def safe_products(self, profile: dict) -> List[str]:
+        """Product ids that are safe for the profile, in catalog order."""
+        return [self.product_ids[i] for i in np.flatnonzero(self.safe_mask(profile))]
+
+    def unsafe_products(self, profile: dict) -> List[str]:
+        unsafe = np.unpackbits(self.unsafe_bits(self.encode(profile)), count=len(self.product_ids), bitorder="little")
+        return [self.product_ids[i] for i in np.flatnonzero(unsafe)]
+
+    def filter_safe(self, bits: np.ndarray, product_ids: Iterable[str]) -> List[str]:
+        """
+        Keeps the product ids whose bit is set in a packed safe bitset, in the given order.
+        Products without a compatibility rule are dropped, since they were never checked.
+        """
+        safe = []
+        for product_id in product_ids:
+            position = self.positions.get(product_id)
+            if position is not None and bits[position >> 3] >> (position & 7) & 1:
+                safe.append(product_id)
+        return safe
+
+    def batch_safe_bits(self, profiles: Sequence[dict]) -> np.ndarray:
+        """
+        Scores many profiles in one call and returns a (profiles, catalog_size / 8) packed array.
+
+        Each profile's OR stays within its own few feature rows; gathering every profile's
+        rows into one array and reducing with np.bitwise_or.reduceat measured slower, since
+        the temporary doesn't fit in cache at catalog sizes in the tens of thousands.
+        """
+        output = np.empty((len(profiles), self.feature_bits.shape[1]), dtype=np.uint8)
+        for row, profile in enumerate(profiles):
+            np.bitwise_and(~self.unsafe_bits(self.encode(profile)), self.catalog_mask, out=output[row])
+        return output
+
+    def batch_safe_products(self, profiles: Sequence[dict]) -> List[List[str]]:
+        bits = self.batch_safe_bits(profiles)
+        masks = np.unpackbits(bits, axis=1, count=len(self.product_ids), bitorder="little")
+        return [[self.product_ids[i] for i in np.flatnonzero(mask)] for mask in masks]
@@ -0,0 +1,261 @@
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import requests
+from src.utils.cache_utils import TTLCache
+from src.services.vocabulary import get_vocabulary_index, normalize_text
+
+class InteractionLookupError(Exception):
+    """Raised when the upstream interaction service can't answer for some pairs."""
+
+def substance_name(term: str) -> str:
+    """Canonical, normalized substance name for a stored medication or supplement entry."""
+    matched = get_vocabulary_index().match(term) if str(term).strip() else None
+    return normalize_text(matched.canonical or matched.name) if matched else ""
+
+def pair_key(a: str, b: str) -> Tuple[str, str]:
+    return tuple(sorted((a, b)))
+
+class InteractionCache:
+    """
+    Persistent pair -> result cache in SQLite with a TTL and an LRU size limit.
+
+    A result is the interaction dict returned upstream, or None for "no known
+    interaction"; both are cached so repeat checks never go back upstream. Hot pairs
+    are also held in an in-process LRU so warm lookups don't touch the disk.
+    """
+
+    def __init__(self, path="interaction_cache.db", ttl=7 * 24 * 3600, max_entries=200_000, memory_entries=20_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory = TTLCache(max_entries=memory_entries, ttl=ttl)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS interaction_pairs (
+                substance_a TEXT NOT NULL,
+                substance_b TEXT NOT NULL,
+                result TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (substance_a, substance_b)
+            );
+            CREATE INDEX IF NOT EXISTS idx_interaction_pairs_last_access ON interaction_pairs (last_access);
+        """)
+
+    def get_many(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[dict]]:
+        """Returns cached results for the keys that are present and not expired."""
+        found = {}
+        remaining = []
+        for key in keys:
+            # Results are stored wrapped so a cached "no interaction" isn't mistaken for a miss
+            entry = self.memory.get(key)
+            if entry is None:
+                remaining.append(key)
+            else:
+                found[key] = entry[0]
+        keys = remaining
+        if not keys:
+            return found
+        now = time.time()
+        disk_found = {}
+        with self._lock:
+            for start in range(0, len(keys), 400):
+                chunk = keys[start:start + 400]
+                clause = " OR ".join("(substance_a = ? AND substance_b = ?)" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT substance_a, substance_b, result FROM interaction_pairs "
+                    f"WHERE fetched_at > ? AND ({clause})",
+                    [now - self.ttl] + [part for key in chunk for part in key],
+                ).fetchall()
+                for a, b, result in rows:
+                    disk_found[(a, b)] = json.loads(result) if result else None
+            if disk_found:
+                self._conn.executemany(
+                    "UPDATE interaction_pairs SET last_access = ? WHERE substance_a = ? AND substance_b = ?",
+                    [(now, a, b) for a, b in disk_found],
+                )
+        for key, result in disk_found.items():
+            self.memory.set(key, (result,))
+        found.update(disk_found)
+        return found
+
+    def peek(self, key: Tuple[str, str]):
+        """Returns the in-process entry for key, wrapped as `(result,)`, without going to disk."""
+        return self.memory.get(key)
+
+    def put_many(self, results: Dict[Tuple[str, str], Optional[dict]]):
+        for key, result in results.items():
+            self.memory.set(key, (result,))
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO interaction_pairs VALUES (?, ?, ?, ?, ?)",
+                [(a, b, json.dumps(result) if result else None, now, now) for (a, b), result in results.items()],
+            )
+            self._conn.execute(
+                "DELETE FROM interaction_pairs WHERE rowid IN ("
+                "SELECT rowid FROM interaction_pairs ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.execute("COMMIT")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM interaction_pairs").fetchone()[0]
+
+class InteractionClient:
+    """
+    Drug/supplement interaction lookups against an RxNav-style service.
+
+    Lookups are answered from the persistent cache first. Misses from every caller
+    are queued to a dispatcher that waits `batch_window` seconds to collect them and
+    sends each batch of substances as one `interaction/list.json?names=...` request,
+    which returns all interactions among them. A pair already being fetched is
+    never requested twice; later callers wait on the same in-flight future. The
+    client lock only covers that in-flight bookkeeping, never the SQLite cache. A fetch
+    leaves the in-flight map only after its results are cached, so a caller whose cache
+    lookup missed and who then finds no in-flight future checks the in-process cache
+    again before registering one, and can't miss both.
+    """
+
+    def __init__(self, base_url: str, cache: InteractionCache = None, batch_window=0.01,
+                 max_batch_pairs=100, max_workers=4, timeout=10.0, session: requests.Session = None):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache if cache is not None else InteractionCache()
+        self.batch_window = batch_window
+        self.max_batch_pairs = max_batch_pairs
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._queue: List[Tuple[str, str]] = []
+        self._queued = threading.Condition(self._lock)
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="interaction-fetch")
+        self._dispatcher = threading.Thread(target=self._dispatch, name="interaction-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_pairs = 0
+        self.upstream_errors = 0
+
+    def check_pairs(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[dict]]:
+        """Returns the interaction (or None) for every pair of normalized substance names."""
+        keys = list(dict.fromkeys(pair_key(a, b) for a, b in pairs if a != b))
+        results = self.cache.get_many(keys)
+        misses = [key for key in keys if key not in results]
+        futures = {}
+        with self._lock:
+            for key in misses:
+                future = self._inflight.get(key)
+                if future is None:
+                    # A fetch may have cached this key and finished since the lookup above
+                    entry = self.cache.peek(key)
+                    if entry is not None:
+                        results[key] = entry[0]
+                        continue
+                    future = self._inflight[key] = Future()
+                    self._queue.append(key)
+                else:
+                    self.coalesced += 1
+                futures[key] = future
+            self.hits += len(keys) - len(futures)
+            self.misses += len(futures)
+            if futures:
+                self._queued.notify()
+
+        failed = []
+        for key, future in futures.items():
+            try:
+                results[key] = future.result(timeout=self.timeout * 2)
+            except Exception:
+                failed.append(key)
+        if failed:
+            raise InteractionLookupError(f"Could not check {len(failed)} interaction pairs, e.g. {failed[0]}")
+        return results
+
+    def check_substances(self, terms: Iterable[str]) -> List[dict]:
+        """Returns every known interaction among a profile's medications and supplements."""
+        names = sorted({substance_name(term) for term in terms if term and term.strip()} - {""})
+        results = self.check_pairs(itertools.combinations(names, 2))
+        return [result for result in results.values() if result]
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._queued.wait()
+            time.sleep(self.batch_window)
+            with self._lock:
+                batch, self._queue = self._queue[:self.max_batch_pairs], self._queue[self.max_batch_pairs:]
+            if batch:
+                self._workers.submit(self._fetch, batch)
+
+    def _fetch(self, keys: List[Tuple[str, str]]):
+        names = sorted({name for key in keys for name in key})
+        with self._lock:
+            self.upstream_calls += 1
+            self.upstream_pairs += len(keys)
+        try:
+            response = self.session.get(
+                f"{self.base_url}/interaction/list.json",
+                params={"names": ",".join(names)},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            found = {}
+            for interaction in response.json().get("interactions", []):
+                a, b = (normalize_text(name) for name in interaction["pair"])
+                found[pair_key(a, b)] = interaction
+            results = {key: found.get(key) for key in keys}
+            # The service answers for every pair among the names, so cache all of them
+            for a, b in itertools.combinations(names, 2):
+                results.setdefault(pair_key(a, b), found.get(pair_key(a, b)))
+        except Exception as e:
+            with self._lock:
+                self.upstream_errors += 1
+            print(f"Error fetching drug interactions: {e}")
+            self._resolve(keys, error=e)
+            return
+        self._resolve(keys, results=results)
+
+    def _resolve(self, keys, results=None, error=None):
+        if results is not None:
+            try:
+                self.cache.put_many(results)
+            except Exception as e:
+                print(f"Error caching drug interactions: {e}")
+        with self._lock:
+            futures = [(key, self._inflight.pop(key, None)) for key in keys]
+        for key, future in futures:
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[key])
+
+    def stats(self) -> dict:
+        """Returns cache hit rate and upstream call counters."""
+        with self._lock:
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "upstream_calls": self.upstream_calls,
+                "upstream_pairs": self.upstream_pairs,
+                "upstream_errors": self.upstream_errors,
+            }
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["cached_pairs"] = len(self.cache)
+        return stats
@@ -0,0 +1,263 @@
+import math
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import chromadb
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions import register_embedding_function
+from src.config.vocabulary import VOCABULARY
+from src.services.vocabulary import broader_term, normalize_text
+
+EMBEDDED_FIELDS = ("title", "product_type", "tags", "body_html")
+METADATA_FIELDS = ("product_type", "vendor", "price", "available")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from i im in is it its me my of on or so that the this to want with "
+    "would like some something also any am have has looking help get".split()
+)
+HTML_TAG = re.compile(r"<[^>]+>")
+
+@lru_cache(maxsize=None)
+def _alias_map() -> Dict[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Normalized vocabulary aliases as token tuples -> canonical features, e.g. ("coq10",) ->
+    ("coenzyme q10",); a subtype also maps to its broader term, ("d3",) -> ("vitamin d3", "vitamin d").
+    """
+    aliases = {}
+    for kind, entries in VOCABULARY.items():
+        for canonical, names in entries.items():
+            features = tuple(normalize_text(term) for term in (canonical, broader_term(kind, canonical)) if term)
+            for name in (canonical, *names):
+                aliases[tuple(normalize_text(name).split())] = features
+    return aliases
+
+@lru_cache(maxsize=262144)
+def _bucket(feature: str, dimensions: int) -> int:
+    """Signed bucket for a feature: the index is the hash mod dimensions, the sign its top bit."""
+    digest = zlib.crc32(feature.encode())
+    index = digest % dimensions
+    return index if digest & 0x80000000 else -index - 1
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """Strips one common English suffix so "sleeping", "sleeps" and "sleep" share a feature."""
+    if len(token) <= 4 or token.endswith("ss"):
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    for suffix in ("ing", "ed", "ly", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+def text_features(text: str) -> Dict[str, float]:
+    """Weighted unigram, bigram and canonical-vocabulary features for a piece of text."""
+    tokens = [token for token in normalize_text(HTML_TAG.sub(" ", text or "")).split() if token not in STOPWORDS]
+    stems = [stem(token) for token in tokens]
+    counts: Dict[str, float] = {}
+    for token in stems:
+        counts[token] = counts.get(token, 0) + 1
+    for first, second in zip(stems, stems[1:]):
+        key = f"{first} {second}"
+        counts[key] = counts.get(key, 0) + 1
+    # Brand names and aliases count as their canonical ingredient, so "coq10" matches "Coenzyme Q10"
+    aliases = _alias_map()
+    for length in (3, 2, 1):
+        for start in range(len(tokens) - length + 1):
+            for canonical in aliases.get(tuple(tokens[start:start + length]), ()):
+                key = f"={canonical}"
+                counts[key] = counts.get(key, 0) + 2
+    return {feature: 1 + math.log(count) for feature, count in counts.items()}
+
+@register_embedding_function
+class HashingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Offline embedding by feature hashing; needs no model download or network.
+
+    Texts are reduced to sublinear-weighted word, bigram and vocabulary features that
+    are hashed into a fixed number of signed buckets and L2-normalized, so cosine
+    similarity behaves like TF-weighted keyword overlap with synonym folding.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def __call__(self, input: Documents) -> Embeddings:
+        matrix = np.zeros((len(input), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(input):
+            for feature, weight in text_features(text).items():
+                bucket = _bucket(feature, self.dimensions)
+                if bucket >= 0:
+                    matrix[row, bucket] += weight
+                else:
+                    matrix[row, -bucket - 1] -= weight
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return list(matrix)
+
+    @staticmethod
+    def name() -> str:
+        return "nh_hashing"
+
+    def default_space(self) -> str:
+        return "cosine"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"dimensions": self.dimensions}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "HashingEmbeddingFunction":
+        return HashingEmbeddingFunction(config.get("dimensions", 256))
+
+def get_embedding_function() -> EmbeddingFunction:
+    """
+    The hashing function by default. Set PRODUCT_EMBEDDING_MODEL to a locally cached
+    sentence-transformers model to use it instead.
+    """
+    model = os.environ.get("PRODUCT_EMBEDDING_MODEL")
+    if model:
+        from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+        return SentenceTransformerEmbeddingFunction(model_name=model)
+    return HashingEmbeddingFunction(int(os.environ.get("PRODUCT_EMBEDDING_DIMENSIONS", "256")))
+
+def product_document(product: dict) -> str:
+    """The text embedded for a catalog product."""
+    tags = " ".join(product.get("tags") or [])
+    return f"{product.get('title', '')}. {product.get('product_type') or ''}. {tags}. {product.get('body_html') or ''}"
+
+def product_metadata(product: dict) -> dict:
+    metadata = {field: product[field] for field in METADATA_FIELDS if product.get(field) is not None}
+    metadata["available"] = bool(product.get("available"))
+    return metadata
+
+def profile_query_text(profile: dict) -> str:
+    """The free-text signal on a profile: goals, supplements of interest and additional notes."""
+    parts = list(profile.get("health_goals") or [])
+    parts += [profile.get("other_health_goal") or "", profile.get("additional_info") or ""]
+    parts += list(profile.get("interested_supplements") or [])
+    return ". ".join(part for part in parts if part)
+
+class ProductIndex:
+    """
+    Persistent chromadb collection of product embeddings for free-text matching.
+
+    Products are embedded in batches and upserted by product id. A catalog
+    SyncReport is applied incrementally: only products whose text changed are
+    re-embedded, price and availability changes just update metadata, and removed
+    products are deleted. Query embeddings are cached, since profiles repeat the
+    same goals.
+    """
+
+    def __init__(self, path: str = None, collection_name: str = "products",
+                 embedding_function: EmbeddingFunction = None, batch_size: int = 1000, ef_search: int = 64, overfetch: int = 3):
+        self.embedding_function = embedding_function or get_embedding_function()
+        self.client = chromadb.PersistentClient(path=path or os.environ.get("PRODUCT_INDEX_PATH", "product_index"))
+        self.collection = self.client.get_or_create_collection(
+            collection_name,
+            embedding_function=self.embedding_function,
+            configuration={"hnsw": {"space": "cosine", "ef_search": ef_search}},
+        )
+        self.batch_size = min(batch_size, self.client.get_max_batch_size())
+        self.overfetch = overfetch
+        self._embed_query = lru_cache(maxsize=4096)(self._embed)
+
+    def _embed(self, text: str) -> np.ndarray:
+        return np.asarray(self.embedding_function([text])[0], dtype=np.float32)
+
+    def upsert(self, products: Iterable[dict]) -> int:
+        """Embeds and upserts products in batches; returns how many were written."""
+        written = 0
+        batch = []
+        for product in products:
+            batch.append(product)
+            if len(batch) >= self.batch_size:
+                written += self._upsert_batch(batch)
+                batch = []
+        if batch:
+            written += self._upsert_batch(batch)
+        return written
+
+    def _upsert_batch(self, products: List[dict]) -> int:
+        documents = [product_document(product) for product in products]
+        self.collection.upsert(
+            ids=[product["product_id"] for product in products],
+            embeddings=self.embedding_function(documents),
+            metadatas=[product_metadata(product) for product in products],
+        )
+        return len(products)
+
+    def update_metadata(self, products: List[dict]):
+        for start in range(0, len(products), self.batch_size):
+            chunk = products[start:start + self.batch_size]
+            self.collection.update(
+                ids=[product["product_id"] for product in chunk],
+                metadatas=[product_metadata(product) for product in chunk],
+            )
+
+    def delete(self, product_ids: List[str]):
+        for start in range(0, len(product_ids), self.batch_size):
+            self.collection.delete(ids=product_ids[start:start + self.batch_size])
+
+    def apply_sync(self, report, store) -> dict:
+        """Brings the index up to date with a catalog SyncReport, reading changed products from `store`."""
+        reembed = set(report.ids_with_changed(*EMBEDDED_FIELDS)) - set(report.removed)
+        metadata_only = [product_id for product_id in report.updated if product_id not in reembed]
+        self.upsert(store.get_products(sorted(reembed)))
+        self.update_metadata(store.get_products(metadata_only))
+        self.delete(list(report.removed))
+        return {"embedded": len(reembed), "metadata_only": len(metadata_only), "deleted": len(report.removed)}
+
+    def rebuild(self, store) -> int:
+        """Re-embeds the whole catalog and drops products the store no longer has."""
+        known = set(self.collection.get(include=[])["ids"])
+        written = self.upsert(store.iter_products(self.batch_size))
+        current = {product["product_id"] for product in store.iter_products(self.batch_size)}
+        self.delete(sorted(known - current))
+        return written
+
+    def query(self, text: str, k: int = 10, available_only: bool = True,
+              product_type: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Returns up to k (product_id, similarity) pairs for free text, best first.
+
+        Filters are applied to an over-fetched candidate list rather than passed as a
+        chromadb `where`, which turns the HNSW search into a metadata scan (about 50x
+        slower at 10k products). Only when too few candidates survive is the filtered
+        query run.
+        """
+        if not text or not text.strip():
+            return []
+        embedding = self._embed_query(text)
+        result = self.collection.query(
+            query_embeddings=[embedding], n_results=k * self.overfetch, include=["metadatas", "distances"],
+        )
+        matches = []
+        for product_id, metadata, distance in zip(result["ids"][0], result["metadatas"][0], result["distances"][0]):
+            if available_only and not metadata.get("available"):
+                continue
+            if product_type and metadata.get("product_type") != product_type:
+                continue
+            matches.append((product_id, 1.0 - distance))
+        if len(matches) >= k or len(result["ids"][0]) < k * self.overfetch:
+            return matches[:k]
+
+        filters = ([{"available": True}] if available_only else []) + \
+                  ([{"product_type": product_type}] if product_type else [])
+        result = self.collection.query(
+            query_embeddings=[embedding], n_results=k, include=["distances"],
+            where=filters[0] if len(filters) == 1 else {"$and": filters},
+        )
+        return [(product_id, 1.0 - distance) for product_id, distance in zip(result["ids"][0], result["distances"][0])]
+
+    def query_profile(self, profile: dict, k: int = 10, **filters) -> List[Tuple[str, float]]:
+        return self.query(profile_query_text(profile), k, **filters)
+
+    def __len__(self):
+        return self.collection.count()
+
+@lru_cache(maxsize=None)
+def get_product_index() -> ProductIndex:
+    """Opens the persistent product index once per process."""
+    return ProductIndex()
@@ -0,0 +1,214 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Annotated, Callable, Dict, List, Optional, Sequence, Tuple, TypedDict
+import numpy as np
+from langgraph.graph import END, START, StateGraph
+from src.models.user_profile import UserProfile
+from src.services.contraindications import ContraindicationEngine, unresolved_terms
+from src.services.interactions import InteractionClient, substance_name
+from src.services.product_index import ProductIndex, profile_query_text
+from src.services.vocabulary import canonicalize_profile_terms, get_vocabulary_index, normalize_text
+from src.storage.catalog_store import CatalogStore
+
+ANALYSIS_NODES = ("drug_interactions", "contraindications", "candidates")
+SAFETY_NODES = ("drug_interactions", "contraindications")
+AVOID_SEVERITIES = frozenset({"major", "moderate"})
+DEFAULT_TIMEOUTS = {
+    "intake_analysis": 1.0,
+    "drug_interactions": 5.0,
+    "contraindications": 1.0,
+    "candidates": 2.0,
+    "filtering": 1.0,
+    "generation": 5.0,
+}
+
+def merge(left: Optional[dict], right: Optional[dict]) -> dict:
+    return {**(left or {}), **(right or {})}
+
+class RecommendationState(TypedDict, total=False):
+    profile: dict
+    query_text: str
+    interactions: List[dict]
+    avoid_substances: List[str]
+    safe_bits: Optional[np.ndarray]
+    needs_review: List[dict]
+    candidates: List[Tuple[str, float]]
+    filtered: List[Tuple[str, float]]
+    recommendations: List[dict]
+    status: str
+    # Written by the parallel branches, so they need reducers to merge
+    timings: Annotated[Dict[str, float], merge]
+    errors: Annotated[Dict[str, str], merge]
+
+@lru_cache(maxsize=65536)
+def product_substance(title: str) -> str:
+    """The normalized main ingredient of a product, from its title, e.g. "fish oil"."""
+    found = get_vocabulary_index().find(title)
+    return normalize_text(found[1]) if found else substance_name(title)
+
+def template_recommendations(profile: dict, products: List[dict], scores: Dict[str, float],
+                             interactions: List[dict]) -> List[dict]:
+    """Default generation step: one entry per product with a short templated explanation."""
+    goals = [goal for goal in profile.get("health_goals") or [] if goal]
+    if profile.get("other_health_goal"):
+        goals.append(profile["other_health_goal"])
+    reason = f"Selected for your goals: {', '.join(goals)}." if goals else "Matches what you told us."
+    caution = " Review the interaction notes with your pharmacist." if interactions else ""
+    return [
+        {
+            "product_id": product["product_id"],
+            "title": product["title"],
+            "price": product.get("price"),
+            "score": round(scores[product["product_id"]], 4),
+            "explanation": f"{reason} Screened against your conditions, medications and allergies.{caution}",
+        }
+        for product in products
+    ]
+
+class RecommendationWorkflow:
+    """
+    The recommendation pipeline from Project_Plan.md as a LangGraph graph.
+
+    intake_analysis validates and canonicalizes the profile, then drug interaction
+    checking, contraindication screening and candidate retrieval run concurrently;
+    none depends on another. Filtering joins the three, and generation turns what
+    is left into recommendations.
+
+    Every node runs on a worker thread under its own timeout, and its wall time is
+    recorded in `timings`. A failed or timed-out node records the reason in
+    `errors`. If a safety node fails, filtering returns nothing rather than
+    unscreened products. Entries that only nearly match a known term are screened as
+    that term and listed in `needs_review`. A timed-out thread is abandoned, not cancelled, so clients
+    should carry their own request timeouts.
+    """
+
+    def __init__(self, interactions: InteractionClient, engine: ContraindicationEngine, index: ProductIndex,
+                 catalog: CatalogStore, timeouts: Dict[str, float] = None, candidate_count: int = 50,
+                 recommendation_count: int = 5, generator: Callable = template_recommendations,
+                 parallel: bool = True, max_workers: int = 32):
+        self.interactions = interactions
+        self.engine = engine
+        self.index = index
+        self.catalog = catalog
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.candidate_count = candidate_count
+        self.recommendation_count = recommendation_count
+        self.generator = generator
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recommendation")
+        self.graph = self._build(parallel)
+
+    def _build(self, parallel: bool):
+        graph = StateGraph(RecommendationState)
+        graph.add_node("intake_analysis", self._node("intake_analysis", self.intake_analysis, {"status": "invalid"}))
+        graph.add_node("drug_interactions", self._node(
+            "drug_interactions", self.check_interactions, {"interactions": [], "avoid_substances": []}))
+        graph.add_node("contraindications", self._node(
+            "contraindications", self.screen_contraindications, {"safe_bits": None, "needs_review": []}))
+        graph.add_node("candidates", self._node("candidates", self.find_candidates, {"candidates": []}))
+        graph.add_node("filtering", self._node("filtering", self.filter_products, {"filtered": []}))
+        graph.add_node("generation", self._node("generation", self.generate, {"recommendations": []}))
+
+        graph.add_edge(START, "intake_analysis")
+        if parallel:
+            for node in ANALYSIS_NODES:
+                graph.add_edge("intake_analysis", node)
+            graph.add_edge(list(ANALYSIS_NODES), "filtering")
+        else:
+            # The strict chain from the project plan, kept for comparison
+            graph.add_edge("intake_analysis", ANALYSIS_NODES[0])
+            for previous, node in zip(ANALYSIS_NODES, ANALYSIS_NODES[1:]):
+                graph.add_edge(previous, node)
+            graph.add_edge(ANALYSIS_NODES[-1], "filtering")
+        graph.add_edge("filtering", "generation")
+        graph.add_edge("generation", END)
+        return graph.compile()
+
+    def _node(self, name: str, fn: Callable[[dict], dict], fallback: dict):
+        timeout = self.timeouts[name]
+
+        async def run(state: RecommendationState) -> dict:
+            started = time.perf_counter()
+            try:
+                if state.get("status") == "invalid" and name != "intake_analysis":
+                    update = dict(fallback)
+                else:
+                    loop = asyncio.get_running_loop()
+                    update = await asyncio.wait_for(loop.run_in_executor(self.executor, fn, state), timeout)
+            except asyncio.TimeoutError:
+                update = dict(fallback, errors={name: f"timed out after {timeout}s"})
+            except Exception as e:
+                print(f"Error in recommendation step {name}: {e}")
+                update = dict(fallback, errors={name: str(e) or type(e).__name__})
+            update["timings"] = {name: time.perf_counter() - started}
+            return update
+
+        return run
+
+    def intake_analysis(self, state: RecommendationState) -> dict:
+        profile = canonicalize_profile_terms(state["profile"])
+        UserProfile.model_validate(profile)
+        return {"profile": profile, "query_text": profile_query_text(profile), "status": "ok"}
+
+    def check_interactions(self, state: RecommendationState) -> dict:
+        profile = state["profile"]
+        medications = {substance_name(term) for term in profile.get("current_medications") or []}
+        terms = [*(profile.get("current_medications") or []), *(profile.get("natural_supplements") or []),
+                 *(profile.get("interested_supplements") or [])]
+        interactions = self.interactions.check_substances(terms)
+        avoid = set()
+        for interaction in interactions:
+            if interaction.get("severity") not in AVOID_SEVERITIES:
+                continue
+            names = [substance_name(name) for name in interaction["pair"]]
+            if any(name in medications for name in names):
+                avoid.update(name for name in names if name not in medications)
+        return {"interactions": interactions, "avoid_substances": sorted(avoid)}
+
+    def screen_contraindications(self, state: RecommendationState) -> dict:
+        # Near misses are screened as the term they nearly match; list them for a person to confirm
+        needs_review = [{"field": field, "entry": entry, "suggestion": suggestion}
+                        for field, entry, suggestion in unresolved_terms(state["profile"])]
+        return {"safe_bits": self.engine.safe_bits(state["profile"]), "needs_review": needs_review}
+
+    def find_candidates(self, state: RecommendationState) -> dict:
+        return {"candidates": self.index.query(state["query_text"], self.candidate_count)}
+
+    def filter_products(self, state: RecommendationState) -> dict:
+        failed = [node for node in SAFETY_NODES if node in (state.get("errors") or {})]
+        if failed:
+            return {"filtered": [], "status": f"safety_check_unavailable: {', '.join(failed)}"}
+        scores = dict(state["candidates"])
+        safe = self.engine.filter_safe(state["safe_bits"], scores)
+        avoid = set(state["avoid_substances"])
+        if avoid:
+            titles = {product["product_id"]: product["title"] for product in self.catalog.get_products(safe)}
+            safe = [product_id for product_id in safe
+                    if product_id in titles and product_substance(titles[product_id]) not in avoid]
+        return {"filtered": [(product_id, scores[product_id]) for product_id in safe]}
+
+    def generate(self, state: RecommendationState) -> dict:
+        top = state["filtered"][:self.recommendation_count]
+        products = self.catalog.get_products([product_id for product_id, _ in top])
+        recommendations = self.generator(state["profile"], products, dict(top), state.get("interactions") or [])
+        return {"recommendations": recommendations}
+
+    async def arun(self, profile: dict) -> RecommendationState:
+        return await self.graph.ainvoke({"profile": profile, "timings": {}, "errors": {}})
+
+    def run(self, profile: dict) -> RecommendationState:
+        return asyncio.run(self.arun(profile))
+
+    async def arun_batch(self, profiles: Sequence[dict], concurrency: int = 16) -> List[RecommendationState]:
+        """Runs many profiles through the graph with at most `concurrency` in flight; results keep input order."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(profile):
+            async with semaphore:
+                return await self.arun(profile)
+
+        return await asyncio.gather(*(bounded(profile) for profile in profiles))
+
+    def run_batch(self, profiles: Sequence[dict], concurrency: int = 16) -> List[RecommendationState]:
+        return asyncio.run(self.arun_batch(profiles, concurrency))
@@ -0,0 +1,353 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from src.config.vocabulary import BROADER_TERMS, VOCABULARY
+
+FIELD_KINDS = {
+    "medical_conditions": "condition",
+    "current_medications": "medication",
+    "natural_supplements": "supplement",
+    "allergies": "allergen",
+    "interested_supplements": "supplement",
+}
+
+# Kinds whose entries may carry a dose; conditions and allergens are matched whole
+DOSED_KINDS = frozenset({"medication", "supplement", None})
+# Kinds where a known word inside a longer entry is worth suggesting; for conditions and
+# medications it is usually a different fact ("Metformin ER", "family history of ...")
+PARTIAL_MATCH_KINDS = frozenset({"supplement", "allergen"})
+
+DOSE_TOKEN = re.compile(r"^\d+(?:[.,]\d+)?(?:mg|mcg|ug|µg|g|iu|ml|units?|%|x)?$", re.IGNORECASE)
+BARE_NUMBER = re.compile(r"^\d+$")
+DIGITS = re.compile(r"\d+")
+LETTER_NUMBER_GAP = re.compile(r"(?<=[a-z]) (?=\d)")
+# Release forms kept on a medication entry but not part of the substance
+FORMULATIONS = frozenset({"er", "xr", "xl", "sr", "cr", "dr", "la", "ir", "odt", "ec", "hcl"})
+# Words that make an entry something other than the plain fact it names: "no diabetes",
+# "not diabetic", "family history of heart disease", "stopped warfarin". Such entries
+# are kept as typed and never canonicalized. They are matched as whole words before
+# hyphens are split, so "non diabetic" is qualified but "Non-Hodgkin lymphoma" isn't.
+QUALIFIER_WORDS = frozenset({
+    "no", "not", "non", "never", "none", "denies", "denied", "without", "negative", "ruled",
+    "family", "history", "hx", "mother", "father", "parent", "parents", "sister", "brother", "grandmother",
+    "grandfather", "suspected", "possible", "possibly", "maybe", "probable", "borderline", "risk",
+    "former", "formerly", "previous", "previously", "past", "stopped", "quit", "discontinued",
+})
+FREQUENCY_STARTS = frozenset({
+    "daily", "twice", "once", "thrice", "nightly", "weekly", "every", "as", "prn", "bid", "tid", "qid",
+    "qd", "qhs", "per", "in", "at", "with", "before", "after",
+})
+NON_WORD = re.compile(r"[^\w\s\-]")
+
+def normalize_text(text: str) -> str:
+    """Casefolds, strips accents and punctuation, and collapses whitespace."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = NON_WORD.sub(" ", text.replace("'", ""))
+    return " ".join(text.split())
+
+def term_key(text: str) -> str:
+    """
+    The lookup key of a term: normalized, with hyphens as spaces and a number joined to
+    the word before it, so "Omega 3", "omega-3" and "Vitamin B 12" / "vitamin b12" meet.
+    """
+    return LETTER_NUMBER_GAP.sub("", normalize_text(text).replace("-", " "))
+
+def is_qualified(text: str) -> bool:
+    """True for negated or qualified entries such as "no diabetes" or "family history of asthma"."""
+    return any(word in QUALIFIER_WORDS for word in normalize_text(text).split())
+
+def split_dosage(text: str) -> Tuple[str, str]:
+    """
+    Splits "Metformin 500mg twice daily" into ("Metformin", "500mg twice daily").
+
+    Dosage starts at the first token (after the first) that is a dose amount or
+    begins a frequency phrase.
+    """
+    tokens = str(text).split()
+    for i, token in enumerate(tokens[1:], start=1):
+        bare = token.strip(",;()").casefold()
+        if DOSE_TOKEN.match(bare) or bare in FREQUENCY_STARTS:
+            return " ".join(tokens[:i]), " ".join(tokens[i:])
+    return " ".join(tokens), ""
+
+def osa_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance, or max_distance + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and previous2 is not None and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def allowed_distance(term: str, max_distance: int) -> int:
+    """Short terms like "d3" or "ibs" only match exactly; longer ones tolerate more typos."""
+    if len(term) <= 3:
+        return 0
+    if len(term) <= 5:
+        return min(1, max_distance)
+    return max_distance
+
+class NormalizedTerm(NamedTuple):
+    """
+    One form entry matched against the vocabulary. `canonical` is only set for an exact
+    or alias match; a near miss leaves it None and offers `suggestion` instead, with the
+    edit `distance` to it (-1 when nothing came close).
+    """
+    raw: str
+    name: str
+    dosage: str
+    canonical: Optional[str]
+    kind: Optional[str]
+    distance: int
+    formulation: str = ""
+    suggestion: Optional[str] = None
+
+    def display(self) -> str:
+        """The value stored on the profile: canonical name, release form and dosage, or the input as typed."""
+        if not self.canonical:
+            return self.raw
+        return " ".join(part for part in (self.canonical, self.formulation, self.dosage) if part)
+
+class PrefixTrie:
+    """Character trie over normalized terms for prefix completion."""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, term: str, value):
+        node = self.root
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, []).append(value)
+
+    def complete(self, prefix: str, limit: int = 10) -> List:
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return []
+        results, stack = [], [node]
+        while stack and len(results) < limit:
+            node = stack.pop()
+            results.extend(node.get(None, ()))
+            stack.extend(child for key, child in sorted(node.items(), key=lambda item: str(item[0]), reverse=True)
+                         if key is not None)
+        return results[:limit]
+
+class VocabularyIndex:
+    """
+    Precomputed lookup over drugs, supplements, allergens and conditions.
+
+    Only exact and alias matches canonicalize an entry. Typos are found through a
+    SymSpell style index, where every term's prefix is stored under all of its
+    deletions up to `max_edit_distance`, so a lookup only needs the deletions of the
+    query and a few distance checks instead of a scan of the vocabulary; a typo match
+    is only ever a suggestion, as is a known name inside a longer supplement or
+    allergen entry.
+    """
+
+    def __init__(self, vocabulary: Dict[str, Dict[str, Iterable[str]]], max_edit_distance: int = 2,
+                 prefix_length: int = 7, cache_size: int = 65536):
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self._terms: Dict[str, List[Tuple[str, str]]] = {}
+        self._deletes: Dict[str, set] = {}
+        self.trie = PrefixTrie()
+        for kind, entries in vocabulary.items():
+            for canonical, aliases in entries.items():
+                for alias in (canonical, *aliases):
+                    self._add(term_key(alias), kind, canonical)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _add(self, term: str, kind: str, canonical: str):
+        entries = self._terms.setdefault(term, [])
+        if (kind, canonical) in entries:
+            return
+        entries.append((kind, canonical))
+        self.trie.insert(term, (kind, canonical))
+        for deletion in self._deletions(term[:self.prefix_length], self.max_edit_distance):
+            self._deletes.setdefault(deletion, set()).add(term)
+
+    @staticmethod
+    def _deletions(word: str, max_distance: int) -> set:
+        results = {word}
+        frontier = {word}
+        for _ in range(max_distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - results
+            results |= frontier
+        return results
+
+    @staticmethod
+    def _pick(entries: List[Tuple[str, str]], kind: Optional[str]) -> Tuple[str, str]:
+        for entry in entries:
+            if entry[0] == kind:
+                return entry
+        return entries[0]
+
+    def lookup_exact(self, term: str, kind: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        entries = self._terms.get(term)
+        return self._pick(entries, kind) if entries else None
+
+    def lookup_fuzzy(self, term: str, kind: Optional[str] = None) -> Optional[Tuple[Tuple[str, str], int]]:
+        """Returns the closest term within the allowed edit distance and its distance."""
+        max_distance = allowed_distance(term, self.max_edit_distance)
+        if max_distance == 0:
+            entry = self.lookup_exact(term, kind)
+            return (entry, 0) if entry else None
+        candidates = set()
+        for deletion in self._deletions(term[:self.prefix_length], max_distance):
+            candidates |= self._deletes.get(deletion, set())
+        best = None
+        for candidate in candidates:
+            # "vitamin b6" is not a typo of "vitamin b7", nor "vitamin b 12" of "vitamin c 12"
+            if DIGITS.findall(candidate) != DIGITS.findall(term):
+                continue
+            limit = min(max_distance, allowed_distance(candidate, self.max_edit_distance))
+            distance = osa_distance(term, candidate, limit)
+            if distance > limit:
+                continue
+            entry = self._pick(self._terms[candidate], kind)
+            rank = (distance, entry[0] != kind, abs(len(candidate) - len(term)), candidate)
+            if best is None or rank < best[0]:
+                best = (rank, entry, distance)
+        return (best[1], best[2]) if best else None
+
+    def _split(self, raw: str, kind: Optional[str]) -> Tuple[str, str]:
+        """
+        Splits off the dosage, except a number that belongs to the name: "Vitamin B 12",
+        "Omega 3 1000mg" and "Type 2 diabetes" are known terms with a number in them.
+        """
+        if kind not in DOSED_KINDS:
+            return raw, ""
+        name, dosage = split_dosage(raw)
+        tokens = dosage.split()
+        if tokens and BARE_NUMBER.match(tokens[0]):
+            for end in range(len(tokens), 0, -1):
+                joined = " ".join([name, *tokens[:end]])
+                if self.lookup_exact(term_key(joined), kind):
+                    return joined, " ".join(tokens[end:])
+        return name, dosage
+
+    def _match(self, text: str, kind: Optional[str] = None) -> Optional[NormalizedTerm]:
+        raw = " ".join(str(text).split())
+        if not term_key(raw):
+            return None
+        if is_qualified(raw):
+            return NormalizedTerm(raw, raw, "", None, None, -1)
+        name, dosage = self._split(raw, kind)
+        term = term_key(name)
+        if not term:
+            return None
+
+        entry = self.lookup_exact(term, kind)
+        if entry:
+            return NormalizedTerm(raw, name, dosage, entry[1], entry[0], 0)
+
+        # "Metformin ER": a known medication in a release form
+        tokens = term.split()
+        if kind in ("medication", None) and len(tokens) > 1 and tokens[-1] in FORMULATIONS:
+            entry = self.lookup_exact(" ".join(tokens[:-1]), kind)
+            if entry and entry[0] == "medication":
+                return NormalizedTerm(raw, name, dosage, entry[1], entry[0], 0, name.split()[-1].upper())
+
+        found = self.lookup_fuzzy(term, kind)
+        if found:
+            (matched_kind, canonical), distance = found
+            return NormalizedTerm(raw, name, dosage, None, matched_kind, distance, suggestion=canonical)
+
+        if kind in PARTIAL_MATCH_KINDS and len(tokens) > 1:
+            # Longest known sub-phrase, e.g. "turmeric curcumin extract" -> "turmeric curcumin"
+            entry = self.find(term, kind)
+            if entry:
+                return NormalizedTerm(raw, name, dosage, None, entry[0], 0, suggestion=entry[1])
+            digits = DIGITS.findall(term)
+            for token in tokens:
+                # A word can't stand for an entry whose number is elsewhere, like "vitamin" in "vitamin b6"
+                found = len(token) > 3 and DIGITS.findall(token) == digits and self.lookup_fuzzy(token, kind)
+                if found:
+                    (matched_kind, canonical), distance = found
+                    return NormalizedTerm(raw, name, dosage, None, matched_kind, distance, suggestion=canonical)
+
+        return NormalizedTerm(raw, name, dosage, None, None, -1)
+
+    def find(self, text: str, kind: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """
+        The (kind, canonical) entry of the longest known term anywhere in `text`. Meant for
+        catalog text such as product titles, not for what a user entered about themselves.
+        """
+        tokens = term_key(text).split()
+        for length in range(len(tokens), 0, -1):
+            for start in range(len(tokens) - length + 1):
+                entry = self.lookup_exact(" ".join(tokens[start:start + length]), kind)
+                if entry:
+                    return entry
+        return None
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Returns (kind, canonical) entries whose terms start with `prefix`."""
+        return list(dict.fromkeys(self.trie.complete(term_key(prefix), limit * 2)))[:limit]
+
+def broader_term(kind: Optional[str], canonical: Optional[str]) -> Optional[str]:
+    """The broader term a subtype also counts as, e.g. "Diabetes" for "Type 2 Diabetes"."""
+    return BROADER_TERMS.get(kind, {}).get(canonical)
+
+@lru_cache(maxsize=None)
+def get_vocabulary_index() -> VocabularyIndex:
+    """Builds the vocabulary index once per process; it is shared by every session."""
+    return VocabularyIndex(VOCABULARY)
+
+def normalize_terms(text: str, kind: Optional[str] = None) -> List[NormalizedTerm]:
+    """Splits comma-separated form input and matches each entry against the vocabulary."""
+    index = get_vocabulary_index()
+    terms = []
+    for part in str(text or "").split(","):
+        if part.strip():
+            matched = index.match(part.strip(), kind)
+            if matched:
+                terms.append(matched)
+    return terms
+
+def parse_term_list(text: str, kind: Optional[str] = None) -> List[str]:
+    """Turns a comma-separated form field into the canonicalized list stored on the profile."""
+    values = []
+    seen = set()
+    for term in normalize_terms(text, kind):
+        value = term.display()
+        if value.casefold() not in seen:
+            seen.add(value.casefold())
+            values.append(value)
+    return values
+
+def term_suggestions(text: str, kind: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(entry as typed, suggested canonical name) for the entries that only nearly match a known term."""
+    return [(term.raw, term.suggestion) for term in normalize_terms(text, kind) if term.suggestion]
+
+def canonicalize_profile_terms(profile: dict) -> dict:
+    """
+    Returns a copy of a profile with every term-list field canonicalized.
+
+    Fields may hold a comma-separated string, as the form submits them, or a list.
+    """
+    profile = dict(profile)
+    for field, kind in FIELD_KINDS.items():
+        value = profile.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            value = ", ".join(str(item) for item in value)
+        profile[field] = parse_term_list(value, kind)
+    return profile
@@ -0,0 +1,166 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.models.user_profile import UserProfile
+
+PROFILE_COLUMNS = tuple(UserProfile.model_fields) + ("recovery_key", "submission_id")
+LIST_COLUMNS = (
+    'medical_conditions', 'current_medications', 'natural_supplements',
+    'allergies', 'health_goals', 'interested_supplements'
+)
+# Columns a revision may change; user_id and submission_id identify the revision itself
+REVISION_COLUMNS = tuple(column for column in PROFILE_COLUMNS if column not in ("user_id", "submission_id"))
+# Columns of the staff browser's list view; the full profile is loaded when one is opened
+BROWSE_COLUMNS = (
+    "id", "user_id", "age_range", "sex", "medical_conditions", "current_medications",
+    "health_goals", "created_at",
+)
+# Free-text columns covered by profile search; schema.sql's profile_search_text() mirrors them
+SEARCH_COLUMNS = ("additional_info", "other_health_goal", "current_medications", "natural_supplements")
+# Columns scan() can be asked for
+SCAN_COLUMNS = frozenset(PROFILE_COLUMNS + ("id", "created_at"))
+
+def apply_revisions(base: dict, revisions: List[dict]) -> dict:
+    """
+    Rebuilds a profile from its base row and the revisions after it, oldest first. A
+    snapshot revision replaces every column; a delta only the columns it carries.
+    """
+    profile = dict(base)
+    for revision in revisions:
+        if revision["is_snapshot"]:
+            profile = dict(base, **revision["fields"])
+        else:
+            profile.update(revision["fields"])
+        profile.update(submission_id=revision["submission_id"], created_at=revision["created_at"],
+                       revision=revision["revision"])
+    return profile
+
+class ProfileStore(ABC):
+    """
+    Storage interface for intake profiles.
+
+    `user_profiles` is the append-only history of full rows and `user_profiles_latest`
+    the current state of each profile. Updates to an existing profile are recorded in
+    `profile_revisions` as the changed columns only, numbered from the full row they
+    build on (`base_id`), with a full snapshot every few revisions so rebuilding an old
+    version reads a bounded number of rows. `profile_analytics` holds aggregate counts
+    over the current profiles, maintained in the database by triggers on
+    `user_profiles_latest`. The current profiles' list columns are indexed for
+    containment filters and their free-text columns for trigram search. Rows are
+    plain dicts keyed by column name; list columns are returned as Python lists and
+    `created_at` as an ISO 8601 string on every backend.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def insert_profiles(self, rows: List[dict]) -> int:
+        """Appends rows to the history, ignoring (user_id, submission_id) pairs already stored."""
+
+    @abstractmethod
+    def load_latest(self, user_id: str) -> Optional[dict]:
+        """Returns the current state of a profile, or None."""
+
+    @abstractmethod
+    def load_by_recovery_key(self, recovery_key: str) -> Optional[dict]:
+        """Returns the current profile with the given recovery key, or None."""
+
+    @abstractmethod
+    def append_revision(self, user_id: str, changes: Dict[str, object], submission_id: str,
+                        snapshot_every: int = 10, created_at: Optional[str] = None) -> Optional[int]:
+        """
+        Applies `changes` to the current profile and records them as its next revision,
+        stored as a full snapshot when the revision number is a multiple of
+        `snapshot_every`. The revision is stamped with `created_at`, or the database's
+        clock if it isn't given. Returns the revision number, the existing one if
+        `submission_id` was already recorded, or None if the profile doesn't exist.
+        """
+
+    @abstractmethod
+    def load_revision(self, user_id: str, revision: int, base_id: Optional[int] = None) -> Optional[dict]:
+        """
+        Rebuilds a profile as of `revision` on `base_id` (default: the current base row);
+        revision 0 is the base row itself. Returns None if there is no such revision.
+        """
+
+    @abstractmethod
+    def load_revisions(self, base_ids: List[int]) -> List[dict]:
+        """
+        Returns every revision built on the given base rows, ordered by (base_id, revision),
+        with `fields` decoded to a dict.
+        """
+
+    @abstractmethod
+    def load_analytics(self) -> Dict[Tuple[str, str], int]:
+        """Returns the nonzero profile_analytics counters as {(dimension, value): count}."""
+
+    @abstractmethod
+    def replace_analytics(self, counts: Dict[Tuple[str, str], int]) -> int:
+        """Replaces every analytics counter in one transaction; returns how many were written."""
+
+    @abstractmethod
+    def browse(self, filters: Optional[Dict[str, List[str]]] = None, after: Optional[Tuple[str, int]] = None,
+               limit: int = 50) -> List[dict]:
+        """
+        Returns the next page of current profiles, newest first, holding every value in
+        `filters` ({list column: values}), starting after the (created_at, id) key of the
+        previous page's last row. Rows carry the BROWSE_COLUMNS only.
+        """
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        """
+        Returns up to `limit` current profiles whose SEARCH_COLUMNS match `query`,
+        tolerating typos, best match first. Rows carry the BROWSE_COLUMNS, the
+        SEARCH_COLUMNS and a `score` between 0 and 1.
+        """
+
+    @abstractmethod
+    def scan(self, after: Optional[Tuple[str, int]] = None, limit: int = 1000,
+             latest_only: bool = False, columns: Optional[List[str]] = None) -> List[dict]:
+        """Returns the next page of rows ordered by (created_at, id), starting after the given key."""
+
+    def iter_rows(self, page_size: int = 1000, latest_only: bool = False,
+                  columns: Optional[List[str]] = None) -> Iterator[dict]:
+        """Streams every row with keyset pagination, holding one page in memory at a time."""
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + ["id", "created_at"]))
+        after = None
+        while True:
+            page = self.scan(after=after, limit=page_size, latest_only=latest_only, columns=columns)
+            if not page:
+                return
+            yield from page
+            last = page[-1]
+            after = (last["created_at"], last["id"])
+            if len(page) < page_size:
+                return
+
+    def iter_history(self, page_size: int = 1000) -> Iterator[dict]:
+        """
+        Streams every version of every profile: each full row of the history as revision
+        0, followed by the profile as of each revision built on it. Rows keep the base
+        row's `id` and carry a `revision` number.
+        """
+        after = None
+        while True:
+            page = self.scan(after=after, limit=page_size)
+            if not page:
+                return
+            revisions = {}
+            for revision in self.load_revisions([row["id"] for row in page]):
+                revisions.setdefault(revision["base_id"], []).append(revision)
+            for base in page:
+                profile = dict(base, revision=0)
+                yield profile
+                for revision in revisions.get(base["id"], []):
+                    # A snapshot carries every revision column, so applying one revision at a
+                    # time to the previous version gives the same result as replaying from the base
+                    profile = apply_revisions(profile, [revision])
+                    yield profile
+            last = page[-1]
+            after = (last["created_at"], last["id"])
+            if len(page) < page_size:
+                return
+
+    def close(self):
+        """Releases connections held by the store."""
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CATALOG_FIELDS = ("title", "handle", "vendor", "product_type", "body_html", "tags", "price", "available")
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    handle TEXT,
+    vendor TEXT,
+    product_type TEXT,
+    body_html TEXT,
+    tags TEXT NOT NULL DEFAULT '[]',
+    price REAL,
+    available INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_type_price ON products (product_type, price);
+CREATE INDEX IF NOT EXISTS idx_products_updated_at ON products (updated_at);
+
+CREATE TABLE IF NOT EXISTS product_tags (
+    tag TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    PRIMARY KEY (tag, product_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_product_tags_product ON product_tags (product_id);
+
+CREATE TABLE IF NOT EXISTS catalog_sync_state (
+    name TEXT PRIMARY KEY,
+    cursor TEXT,
+    etag TEXT,
+    synced_at TEXT
+);
+"""
+
+def product_record(product: dict) -> dict:
+    """Flattens a Shopify product into the columns the recommendation path reads."""
+    tags = product.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    variants = product.get("variants") or []
+    prices = [float(v["price"]) for v in variants if v.get("price") not in (None, "")]
+    record = {
+        "product_id": str(product["id"]),
+        "title": product.get("title") or "",
+        "handle": product.get("handle"),
+        "vendor": product.get("vendor"),
+        "product_type": product.get("product_type"),
+        "body_html": product.get("body_html"),
+        "tags": sorted(set(tags)),
+        "price": min(prices) if prices else None,
+        "available": any((v.get("inventory_quantity") or 0) > 0 for v in variants),
+        "updated_at": product.get("updated_at"),
+    }
+    record["content_hash"] = hashlib.sha1(
+        json.dumps([record[field] for field in CATALOG_FIELDS]).encode()
+    ).hexdigest()
+    return record
+
+class CatalogStore:
+    """
+    Local, read-optimized copy of the active product catalog in SQLite.
+
+    Only active products are kept. Tags get their own table so "all products tagged
+    X" is an index range scan, and each row carries a content hash so a sync can tell
+    a real change from a product re-sent with identical content.
+    """
+
+    def __init__(self, path: str = "catalog.db"):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._connection().executescript(CATALOG_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> dict:
+        product = dict(row)
+        product["tags"] = json.loads(product["tags"])
+        product["available"] = bool(product["available"])
+        return product
+
+    def apply(self, products: Iterable[dict]) -> Tuple[List[str], Dict[str, List[str]], List[str], int]:
+        """
+        Upserts active products and drops inactive ones in one transaction.
+
+        Returns (added ids, {updated id: changed fields}, removed ids, unchanged count).
+        """
+        active, inactive = {}, []
+        for product in products:
+            if product.get("status", "active") == "active":
+                record = product_record(product)
+                active[record["product_id"]] = record
+            else:
+                inactive.append(str(product["id"]))
+
+        added, updated, removed = [], {}, []
+        unchanged = 0
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = self._fetch(conn, list(active) + inactive)
+            writes = []
+            for product_id, record in active.items():
+                current = existing.get(product_id)
+                if current is None:
+                    added.append(product_id)
+                elif current["content_hash"] != record["content_hash"]:
+                    updated[product_id] = [f for f in CATALOG_FIELDS if current[f] != record[f]]
+                else:
+                    unchanged += 1
+                    continue
+                writes.append(record)
+            removed = [product_id for product_id in inactive if product_id in existing]
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(r["product_id"], r["title"], r["handle"], r["vendor"], r["product_type"], r["body_html"],
+                  json.dumps(r["tags"]), r["price"], int(r["available"]), r["updated_at"], r["content_hash"])
+                 for r in writes],
+            )
+            tag_changes = [r for r in writes if "tags" in updated.get(r["product_id"], ["tags"])]
+            self._delete_tags(conn, [r["product_id"] for r in tag_changes] + removed)
+            conn.executemany(
+                "INSERT OR IGNORE INTO product_tags VALUES (?, ?)",
+                [(tag, r["product_id"]) for r in tag_changes for tag in r["tags"]],
+            )
+            self._delete(conn, removed)
+        return added, updated, removed, unchanged
+
+    def remove_missing(self, seen_ids: set) -> List[str]:
+        """Deletes every product not in `seen_ids`; used after a full sync to drop deleted products."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            missing = [row[0] for row in conn.execute("SELECT product_id FROM products")
+                       if row[0] not in seen_ids]
+            self._delete_tags(conn, missing)
+            self._delete(conn, missing)
+        return missing
+
+    @staticmethod
+    def _fetch(conn, product_ids: List[str]) -> Dict[str, dict]:
+        found = {}
+        for start in range(0, len(product_ids), 500):
+            chunk = product_ids[start:start + 500]
+            rows = conn.execute(
+                f"SELECT * FROM products WHERE product_id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+            for row in rows:
+                found[row["product_id"]] = CatalogStore._decode(row)
+        return found
+
+    @staticmethod
+    def _delete_tags(conn, product_ids: List[str]):
+        conn.executemany("DELETE FROM product_tags WHERE product_id = ?", [(i,) for i in product_ids])
+
+    @staticmethod
+    def _delete(conn, product_ids: List[str]):
+        conn.executemany("DELETE FROM products WHERE product_id = ?", [(i,) for i in product_ids])
+
+    def get_products(self, product_ids: List[str]) -> List[dict]:
+        """Returns the products with the given ids, in the given order, skipping unknown ids."""
+        found = self._fetch(self._connection(), list(product_ids))
+        return [found[product_id] for product_id in product_ids if product_id in found]
+
+    def products_by_tag(self, tag: str, available_only: bool = True) -> List[dict]:
+        rows = self._connection().execute(
+            "SELECT p.* FROM product_tags t JOIN products p ON p.product_id = t.product_id "
+            "WHERE t.tag = ?" + (" AND p.available = 1" if available_only else ""),
+            (tag,),
+        )
+        return [self._decode(row) for row in rows]
+
+    def products_by_type(self, product_type: str, max_price: Optional[float] = None) -> List[dict]:
+        sql = "SELECT * FROM products WHERE product_type = ?"
+        params = [product_type]
+        if max_price is not None:
+            sql += " AND price <= ?"
+            params.append(max_price)
+        return [self._decode(row) for row in self._connection().execute(sql + " ORDER BY price", params)]
+
+    def iter_products(self, batch_size: int = 1000):
+        """Yields every product in product_id order, reading in keyset pages."""
+        after = ""
+        while True:
+            rows = self._connection().execute(
+                "SELECT * FROM products WHERE product_id > ? ORDER BY product_id LIMIT ?", (after, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._decode(row)
+            after = rows[-1]["product_id"]
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def get_state(self, name: str) -> dict:
+        row = self._connection().execute(
+            "SELECT cursor, etag, synced_at FROM catalog_sync_state WHERE name = ?", (name,)
+        ).fetchone()
+        return dict(row) if row else {"cursor": None, "etag": None, "synced_at": None}
+
+    def set_state(self, name: str, cursor: Optional[str], etag: Optional[str], synced_at: str):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO catalog_sync_state VALUES (?, ?, ?, ?)", (name, cursor, etag, synced_at)
+        )
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,88 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+DRAFT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    token TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_drafts_updated_at ON drafts (updated_at);
+
+CREATE TABLE IF NOT EXISTS draft_fields (
+    token TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (token, field)
+) WITHOUT ROWID;
+"""
+
+class DraftStore:
+    """
+    Local SQLite store of in-progress intake forms, keyed by draft token.
+
+    A draft is one row per field holding its latest JSON-encoded value, so saving a
+    patch touches only the fields that changed and restoring is a primary key range
+    scan. Drafts are never sent to the profile store.
+    """
+
+    def __init__(self, path: str = "drafts.db"):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._connection().executescript(DRAFT_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def save_patches(self, patches: Dict[str, dict]) -> int:
+        """Upserts {token: {field: value}} in one transaction; returns the number of fields written."""
+        now = time.time()
+        rows = [(token, field, json.dumps(value)) for token, fields in patches.items() for field, value in fields.items()]
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR REPLACE INTO draft_fields VALUES (?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO drafts VALUES (?, ?)", [(token, now) for token in patches])
+        return len(rows)
+
+    def load(self, token: str) -> dict:
+        """Returns {field: value} for a draft, or an empty dict if there is none."""
+        rows = self._connection().execute("SELECT field, value FROM draft_fields WHERE token = ?", (token,))
+        return {field: json.loads(value) for field, value in rows}
+
+    def delete(self, tokens: List[str]):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM draft_fields WHERE token = ?", [(token,) for token in tokens])
+            conn.executemany("DELETE FROM drafts WHERE token = ?", [(token,) for token in tokens])
+
+    def purge(self, max_age: float) -> int:
+        """Deletes drafts not touched in `max_age` seconds; returns how many."""
+        stale = [row[0] for row in self._connection().execute(
+            "SELECT token FROM drafts WHERE updated_at < ?", (time.time() - max_age,)
+        )]
+        self.delete(stale)
+        return len(stale)
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM drafts").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
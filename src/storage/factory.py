@@ -0,0 +1,27 @@
+import os
+from src.storage.base import ProfileStore
+
+STORAGE_BACKENDS = ("supabase", "postgres", "sqlite")
+
+def create_store(backend: str = None) -> ProfileStore:
+    """
+    Creates the profile store named by `backend` or the STORAGE_BACKEND environment variable.
+
+    Backends are imported lazily so each deployment only needs its own driver installed.
+    """
+    backend = (backend or os.environ.get("STORAGE_BACKEND", "supabase")).lower()
+    if backend == "supabase":
+        from src.storage.supabase_store import SupabaseProfileStore
+        return SupabaseProfileStore()
+    if backend == "postgres":
+        from src.storage.postgres_store import PostgresProfileStore
+        return PostgresProfileStore(
+            os.environ.get("DATABASE_URL"),
+            # Defaults to the pool size, so connections keep their prepared statements
+            minconn=int(os.environ.get("DATABASE_POOL_MIN", os.environ.get("DATABASE_POOL_MAX", "10"))),
+            maxconn=int(os.environ.get("DATABASE_POOL_MAX", "10")),
+        )
+    if backend == "sqlite":
+        from src.storage.sqlite_store import SQLiteProfileStore
+        return SQLiteProfileStore(os.environ.get("SQLITE_PATH", "profiles.db"))
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected one of {', '.join(STORAGE_BACKENDS)}")
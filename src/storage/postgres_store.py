@@ -0,0 +1,237 @@
+import datetime
+import functools
+import json
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import psycopg2
+import psycopg2.extras
+import psycopg2.errors
+import psycopg2.pool
+from psycopg2 import sql
+from src.storage.base import BROWSE_COLUMNS, LIST_COLUMNS, ProfileStore, PROFILE_COLUMNS, SCAN_COLUMNS, apply_revisions
+
+def _insert_statement():
+    placeholders = ", ".join(f"${i}" for i in range(1, len(PROFILE_COLUMNS) + 1))
+    return (
+        f"INSERT INTO user_profiles ({', '.join(PROFILE_COLUMNS)}, created_at) "
+        f"VALUES ({placeholders}, COALESCE(${len(PROFILE_COLUMNS) + 1}::timestamptz, NOW())) "
+        f"ON CONFLICT (user_id, submission_id) DO NOTHING"
+    )
+
+PREPARED_STATEMENTS = {
+    "nh_insert_profile": _insert_statement(),
+    "nh_load_latest": "SELECT * FROM user_profiles_latest WHERE user_id = $1",
+    "nh_load_by_recovery_key": (
+        "SELECT * FROM user_profiles_latest WHERE recovery_key = $1 ORDER BY created_at DESC LIMIT 1"
+    ),
+    "nh_append_revision": "SELECT append_profile_revision($1, $2::jsonb, $3, $4, $5::timestamptz) AS revision",
+    "nh_load_revisions": (
+        "SELECT revision, is_snapshot, fields, submission_id, created_at FROM profile_revisions "
+        "WHERE base_id = $1 AND revision <= $2 AND revision >= ("
+        "    SELECT COALESCE(MAX(revision), 0) FROM profile_revisions"
+        "    WHERE base_id = $1 AND is_snapshot AND revision <= $2"
+        ") ORDER BY revision"
+    ),
+    "nh_search_profiles": "SELECT * FROM search_profiles($1, $2)",
+}
+
+def _reprepare_on_missing(method):
+    """
+    Runs a store method once more if its connection had lost its prepared statements,
+    e.g. to a DISCARD ALL from a connection pooler. The failed transaction was rolled
+    back and every write is idempotent, so the retry is safe.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except psycopg2.errors.InvalidSqlStatementName:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class PostgresProfileStore(ProfileStore):
+    """
+    Profile store that talks to Postgres directly through psycopg2.
+
+    Connections come from a thread-safe pool; callers block when every connection is
+    checked out instead of failing. Hot statements are prepared once per connection
+    and run with EXECUTE, so the server skips parsing and planning on every call.
+    The pool closes connections returned beyond `minconn`, losing their prepared
+    statements, so `minconn` defaults to `maxconn` to keep every connection open.
+    """
+
+    name = "postgres"
+
+    def __init__(self, dsn: str = None, minconn: int = None, maxconn: int = 10):
+        self.dsn = dsn or os.environ.get("DATABASE_URL")
+        self.pool = psycopg2.pool.ThreadedConnectionPool(minconn or maxconn, maxconn, self.dsn)
+        self._available = threading.BoundedSemaphore(maxconn)
+        # Connections whose statements are prepared; closed ones drop out when collected
+        self._prepared = weakref.WeakSet()
+        self._prepared_lock = threading.Lock()
+
+    def _prepare(self, conn):
+        with self._prepared_lock:
+            if conn in self._prepared:
+                return
+        with conn.cursor() as cur:
+            # Start clean in case the connection lost only some of them
+            cur.execute("DEALLOCATE ALL")
+            for name, statement in PREPARED_STATEMENTS.items():
+                cur.execute(f"PREPARE {name} AS {statement}")
+        conn.commit()
+        with self._prepared_lock:
+            self._prepared.add(conn)
+
+    @contextmanager
+    def _cursor(self):
+        with self._available:
+            conn = self.pool.getconn()
+            broken = False
+            try:
+                self._prepare(conn)
+                with conn:
+                    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                        yield cur
+            except psycopg2.errors.InvalidSqlStatementName:
+                with self._prepared_lock:
+                    self._prepared.discard(conn)
+                raise
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                broken = True
+                raise
+            finally:
+                self.pool.putconn(conn, close=broken)
+
+    @staticmethod
+    def _decode(row) -> dict:
+        profile = dict(row)
+        for key, value in profile.items():
+            if isinstance(value, datetime.datetime):
+                profile[key] = value.isoformat()
+        return profile
+
+    @_reprepare_on_missing
+    def insert_profiles(self, rows: List[dict]) -> int:
+        placeholders = ", ".join("%s" for _ in range(len(PROFILE_COLUMNS) + 1))
+        params = [tuple(row.get(column) for column in PROFILE_COLUMNS) + (row.get("created_at"),) for row in rows]
+        with self._cursor() as cur:
+            psycopg2.extras.execute_batch(cur, f"EXECUTE nh_insert_profile ({placeholders})", params)
+            return len(rows)
+
+    @_reprepare_on_missing
+    def load_latest(self, user_id: str) -> Optional[dict]:
+        with self._cursor() as cur:
+            cur.execute("EXECUTE nh_load_latest (%s)", (user_id,))
+            row = cur.fetchone()
+        return self._decode(row) if row else None
+
+    @_reprepare_on_missing
+    def load_by_recovery_key(self, recovery_key: str) -> Optional[dict]:
+        with self._cursor() as cur:
+            cur.execute("EXECUTE nh_load_by_recovery_key (%s)", (recovery_key,))
+            row = cur.fetchone()
+        return self._decode(row) if row else None
+
+    @_reprepare_on_missing
+    def append_revision(self, user_id: str, changes: Dict[str, object], submission_id: str,
+                        snapshot_every: int = 10, created_at: Optional[str] = None) -> Optional[int]:
+        with self._cursor() as cur:
+            cur.execute("EXECUTE nh_append_revision (%s, %s, %s, %s, %s)",
+                        (user_id, json.dumps(changes), submission_id, snapshot_every, created_at))
+            return cur.fetchone()["revision"]
+
+    @_reprepare_on_missing
+    def load_revision(self, user_id: str, revision: int, base_id: Optional[int] = None) -> Optional[dict]:
+        with self._cursor() as cur:
+            if base_id is None:
+                cur.execute("SELECT * FROM user_profiles WHERE id = (SELECT id FROM user_profiles_latest WHERE user_id = %s)",
+                            (user_id,))
+            else:
+                cur.execute("SELECT * FROM user_profiles WHERE id = %s AND user_id = %s", (base_id, user_id))
+            base = cur.fetchone()
+            if base is None:
+                return None
+            cur.execute("EXECUTE nh_load_revisions (%s, %s)", (base["id"], revision))
+            rows = [self._decode(row) for row in cur.fetchall()]
+        if revision and (not rows or rows[-1]["revision"] != revision):
+            return None
+        return apply_revisions(dict(self._decode(base), revision=0), rows)
+
+    def load_revisions(self, base_ids: List[int]) -> List[dict]:
+        if not base_ids:
+            return []
+        with self._cursor() as cur:
+            cur.execute(
+                "SELECT base_id, revision, is_snapshot, fields, submission_id, created_at FROM profile_revisions "
+                "WHERE base_id = ANY(%s) ORDER BY base_id, revision",
+                (list(base_ids),),
+            )
+            return [self._decode(row) for row in cur.fetchall()]
+
+    def load_analytics(self) -> Dict[Tuple[str, str], int]:
+        with self._cursor() as cur:
+            cur.execute("SELECT dimension, value, count FROM profile_analytics WHERE count <> 0")
+            return {(row["dimension"], row["value"]): row["count"] for row in cur.fetchall()}
+
+    def replace_analytics(self, counts: Dict[Tuple[str, str], int]) -> int:
+        payload = json.dumps([[dimension, value, count] for (dimension, value), count in counts.items()])
+        with self._cursor() as cur:
+            cur.execute("SELECT replace_profile_analytics(%s::jsonb) AS written", (payload,))
+            return cur.fetchone()["written"]
+
+    def browse(self, filters: Optional[Dict[str, List[str]]] = None, after: Optional[Tuple[str, int]] = None,
+               limit: int = 50) -> List[dict]:
+        filters = {column: values for column, values in (filters or {}).items() if values}
+        unknown = set(filters) - set(LIST_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown list columns: {sorted(unknown)}")
+        conditions = [sql.SQL("{} @> %s::text[]").format(sql.Identifier(column)) for column in filters]
+        params = [list(values) for values in filters.values()]
+        if after is not None:
+            conditions.append(sql.SQL("(created_at, id) < (%s::timestamptz, %s)"))
+            params.extend(after)
+        query = sql.SQL("SELECT {} FROM user_profiles_latest").format(
+            sql.SQL(", ").join(sql.Identifier(column) for column in BROWSE_COLUMNS))
+        if conditions:
+            query += sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+        query += sql.SQL(" ORDER BY created_at DESC, id DESC LIMIT %s")
+        params.append(limit)
+        with self._cursor() as cur:
+            cur.execute(query, params)
+            return [self._decode(row) for row in cur.fetchall()]
+
+    @_reprepare_on_missing
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        if not query or not query.strip():
+            return []
+        with self._cursor() as cur:
+            cur.execute("EXECUTE nh_search_profiles (%s, %s)", (query, limit))
+            return [self._decode(row) for row in cur.fetchall()]
+
+    def scan(self, after: Optional[Tuple[str, int]] = None, limit: int = 1000,
+             latest_only: bool = False, columns: Optional[List[str]] = None) -> List[dict]:
+        if columns:
+            unknown = set(columns) - SCAN_COLUMNS
+            if unknown:
+                raise ValueError(f"Unknown columns: {sorted(unknown)}")
+            select = sql.SQL(", ").join(sql.Identifier(column) for column in columns)
+        else:
+            select = sql.SQL("*")
+        table = sql.Identifier("user_profiles_latest" if latest_only else "user_profiles")
+        query = sql.SQL("SELECT {} FROM {}").format(select, table)
+        params = []
+        if after is not None:
+            query += sql.SQL(" WHERE (created_at, id) > (%s::timestamptz, %s)")
+            params.extend(after)
+        query += sql.SQL(" ORDER BY created_at, id LIMIT %s")
+        params.append(limit)
+        with self._cursor() as cur:
+            cur.execute(query, params)
+            return [self._decode(row) for row in cur.fetchall()]
+
+    def close(self):
+        self.pool.closeall()
@@ -0,0 +1,234 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+WORD = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by do for from had has have i im in is it its ive me my no not of on or "
+    "so that the them this to was we were with".split()
+)
+
+def tokenize(text) -> List[str]:
+    """Casefolded words without accents or stopwords, e.g. "Knee injury (2019)" -> ["knee", "injury", "2019"]."""
+    text = str(text or "")
+    if not text.isascii():
+        text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return [word for word in WORD.findall(text.casefold().replace("'", "")) if word not in STOPWORDS]
+
+def trigrams(word: str) -> frozenset:
+    """A word's trigrams, padded like pg_trgm: two spaces before and one after."""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+class ProfileSearchIndex:
+    """
+    In-memory, typo-tolerant search over profile text; the local stand-in for pg_trgm.
+
+    Each distinct word maps to an array of the documents containing it, and a trigram
+    index over the words themselves expands a query word to the known words within
+    `threshold` trigram similarity, so "anxeity" still finds "anxiety". Matches are
+    ranked by similarity weighted by how rare the word is, summed over the query words.
+
+    Documents are append-only: re-indexing a profile gives it a new document id and
+    marks the old one dead, and dead documents are dropped from the postings once
+    they outnumber `compact_ratio` of the live ones.
+    """
+
+    def __init__(self, columns: Sequence[str], threshold: float = 0.3, max_expansions: int = 16,
+                 compact_ratio: float = 0.5):
+        self.columns = tuple(columns)
+        self.threshold = threshold
+        self.max_expansions = max_expansions
+        self.compact_ratio = compact_ratio
+
+        self._lock = threading.Lock()
+        self._postings: Dict[str, array] = {}
+        self._words_by_trigram: Dict[str, set] = {}
+        self._users: List[str] = []
+        self._documents: Dict[str, int] = {}
+        self._dead = 0
+
+    def document_text(self, profile: dict) -> str:
+        parts = []
+        for column in self.columns:
+            value = profile.get(column)
+            if isinstance(value, (list, tuple)):
+                parts.extend(str(item) for item in value)
+            elif value:
+                parts.append(str(value))
+        return " | ".join(parts)
+
+    def _retire(self, user_id: str):
+        document = self._documents.pop(user_id, None)
+        if document is not None:
+            self._users[document] = None
+            self._dead += 1
+
+    def _add(self, user_id: str, profile: dict):
+        self._retire(user_id)
+        words = set(tokenize(self.document_text(profile)))
+        if not words:
+            return
+        document = len(self._users)
+        self._users.append(user_id)
+        self._documents[user_id] = document
+        postings = self._postings
+        for word in words:
+            documents = postings.get(word)
+            if documents is None:
+                documents = postings[word] = array("i")
+                for trigram in trigrams(word):
+                    self._words_by_trigram.setdefault(trigram, set()).add(word)
+            documents.append(document)
+
+    def add(self, user_id: str, profile: dict):
+        """Indexes a profile's text, replacing whatever was indexed for it before."""
+        with self._lock:
+            self._add(user_id, profile)
+            self._maybe_compact()
+
+    def remove(self, user_id: str):
+        with self._lock:
+            self._retire(user_id)
+            self._maybe_compact()
+
+    def build(self, rows: Iterable[dict]) -> int:
+        """Indexes every row (each with a user_id); returns the number of documents added."""
+        added = 0
+        with self._lock:
+            for row in rows:
+                self._add(row["user_id"], row)
+                added += 1
+            self._maybe_compact()
+        return added
+
+    def _maybe_compact(self):
+        if self._dead > max(1000, len(self._documents) * self.compact_ratio):
+            self._compact()
+
+    def _compact(self):
+        """Renumbers the live documents and rewrites the postings without the dead ones."""
+        remap = array("i", [-1]) * len(self._users)
+        users = []
+        for document, user_id in enumerate(self._users):
+            if user_id is not None:
+                remap[document] = len(users)
+                users.append(user_id)
+        for word in list(self._postings):
+            documents = array("i", (remap[document] for document in self._postings[word] if remap[document] >= 0))
+            if documents:
+                self._postings[word] = documents
+                continue
+            del self._postings[word]
+            for trigram in trigrams(word):
+                words = self._words_by_trigram[trigram]
+                words.discard(word)
+                if not words:
+                    del self._words_by_trigram[trigram]
+        self._users = users
+        self._documents = {user_id: document for document, user_id in enumerate(users)}
+        self._dead = 0
+
+    def _expand(self, word: str) -> List[Tuple[str, float]]:
+        """Known words within the similarity threshold of `word`, most similar first."""
+        grams = trigrams(word)
+        shared = Counter()
+        for trigram in grams:
+            shared.update(self._words_by_trigram.get(trigram, ()))
+        minimum = self.threshold * len(grams)
+        matches = []
+        for candidate, count in shared.items():
+            if count < minimum:
+                continue
+            similarity = count / (len(grams) + len(trigrams(candidate)) - count)
+            if similarity >= self.threshold:
+                matches.append((candidate, similarity))
+        return heapq.nlargest(self.max_expansions, matches, key=lambda match: match[1])
+
+    def _tiers(self, word: str, live: int) -> Tuple[float, List[Tuple[float, array]]]:
+        """
+        The weight of an exact match of `word` and the (weight, documents) tiers of its
+        expansions, heaviest first. The word weighs what an exact match of its closest
+        known word would, and no expansion weighs more, so a typo or a rarer lookalike
+        never outscores the word itself; a word nothing resembles still counts against
+        every match.
+        """
+        expansions = self._expand(word)
+        if not expansions:
+            return math.log(1 + live), []
+        exact = math.log(1 + live / len(self._postings[expansions[0][0]]))
+        tiers = []
+        for candidate, similarity in expansions:
+            documents = self._postings[candidate]
+            tiers.append((similarity * min(exact, math.log(1 + live / len(documents))), documents))
+        tiers.sort(key=lambda tier: -tier[0])
+        return exact, tiers
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """
+        Returns up to `limit` (user_id, score) pairs, best first, newest first among equal
+        scores. The score is the share of the query's weight a profile matched, 1.0 when
+        every word matches exactly.
+
+        A profile scores the weight of the heaviest tier it is in for each query word, so
+        every combination of tiers (or no match) across the words scores the same for
+        all of its profiles. Combinations are visited heaviest first, and each one walks
+        its shortest posting list newest first, checking the others by bisection; the
+        search stops as soon as `limit` profiles are found, without touching the rest of
+        the postings of common words.
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            live = len(self._documents)
+            if not words or not live:
+                return []
+            possible = 0.0
+            word_tiers = []
+            for word in words:
+                exact, tiers = self._tiers(word, live)
+                possible += exact
+                if tiers:
+                    word_tiers.append(tiers)
+            if not word_tiers:
+                return []
+
+            users = self._users
+            found: Dict[int, float] = {}
+            # A combination picks one tier per word; index len(tiers) means no match
+            start = (0,) * len(word_tiers)
+            heap = [(-sum(tiers[0][0] for tiers in word_tiers), start)]
+            seen = {start}
+            while heap and len(found) < limit:
+                score, combination = heapq.heappop(heap)
+                postings = sorted((tiers[i][1] for tiers, i in zip(word_tiers, combination) if i < len(tiers)), key=len)
+                if not postings:
+                    break
+                drive, others = postings[0], postings[1:]
+                for document in reversed(drive):
+                    if users[document] is None or document in found:
+                        continue
+                    for documents in others:
+                        position = bisect_left(documents, document)
+                        if position == len(documents) or documents[position] != document:
+                            break
+                    else:
+                        found[document] = -score
+                        if len(found) == limit:
+                            break
+                for w, tiers in enumerate(word_tiers):
+                    if combination[w] < len(tiers):
+                        following = combination[:w] + (combination[w] + 1,) + combination[w + 1:]
+                        if following not in seen:
+                            seen.add(following)
+                            weight = sum(tiers[i][0] for tiers, i in zip(word_tiers, following) if i < len(tiers))
+                            heapq.heappush(heap, (-weight, following))
+            return [(users[document], round(score / possible, 4)) for document, score in found.items()]
+
+    def __len__(self):
+        return len(self._documents)
@@ -0,0 +1,459 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+from src.config.analytics import CROSS_DIMENSIONS, CROSS_SEPARATOR, LIST_DIMENSIONS, SCALAR_DIMENSIONS, TOTAL_DIMENSION
+from src.storage.base import (
+    BROWSE_COLUMNS, ProfileStore, PROFILE_COLUMNS, LIST_COLUMNS, REVISION_COLUMNS, SCAN_COLUMNS, SEARCH_COLUMNS,
+    apply_revisions,
+)
+from src.storage.search_index import ProfileSearchIndex
+
+NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+
+# How far browse counts a filter value's index range when profile_analytics has no count for it
+BROWSE_COUNT_LIMIT = 10_000
+
+COLUMN_TYPES = {"user_id": "TEXT NOT NULL", "height_ft": "INTEGER", "height_in": "INTEGER", "weight_lbs": "REAL"}
+
+def _column_definitions():
+    return ",\n    ".join(f"{column} {COLUMN_TYPES.get(column, 'TEXT')}" for column in PROFILE_COLUMNS)
+
+def _analytics_keys(row: str) -> str:
+    """A compound SELECT of the distinct (dimension, value) pairs a profile row counts under; see src/config/analytics.py."""
+    selects = [f"SELECT '{TOTAL_DIMENSION[0]}' AS dimension, '{TOTAL_DIMENSION[1]}' AS value"]
+    selects += [f"SELECT '{column}', {row}.{column} WHERE COALESCE({row}.{column}, '') != ''"
+                for column in SCALAR_DIMENSIONS]
+    selects += [f"SELECT '{first}:{second}', {row}.{first} || '{CROSS_SEPARATOR}' || {row}.{second} "
+                f"WHERE COALESCE({row}.{first}, '') != '' AND COALESCE({row}.{second}, '') != ''"
+                for first, second in CROSS_DIMENSIONS]
+    selects += [f"SELECT '{column}', trim(value) FROM json_each(COALESCE({row}.{column}, '[]')) WHERE trim(value) != ''"
+                for column in LIST_DIMENSIONS]
+    return "\n        UNION ".join(selects)
+
+def _analytics_difference(row: str, other: str) -> str:
+    """The pairs `row` counts under that `other` doesn't, so an update only touches what changed."""
+    return f"{_analytics_keys(row)}\n        EXCEPT SELECT * FROM ({_analytics_keys(other)})"
+
+def _bump_analytics(keys: str, delta: int) -> str:
+    return (
+        f"INSERT INTO profile_analytics (dimension, value, count)\n"
+        f"    SELECT dimension, value, {delta} FROM ({keys}) WHERE true\n"
+        f"    ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count;"
+    )
+
+def _log_search_change(row: str) -> str:
+    # Writers are serialized, so MAX(seq) + 1 is unique and increases with commit order
+    return (
+        f"INSERT INTO profile_search_changes (user_id, seq) "
+        f"VALUES ({row}.user_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM profile_search_changes)) "
+        f"ON CONFLICT (user_id) DO UPDATE SET seq = excluded.seq"
+    )
+
+def _list_values(row: str) -> str:
+    """A SELECT of the (user_id, field, value, created_at, id) rows indexing a profile's list columns."""
+    return "\n        UNION ".join(
+        f"SELECT {row}.user_id, '{column}', value, {row}.created_at, {row}.id "
+        f"FROM json_each(COALESCE({row}.{column}, '[]')) WHERE type = 'text' AND value != ''"
+        for column in LIST_COLUMNS
+    )
+
+ANALYTICS_COLUMNS = sorted({*SCALAR_DIMENSIONS, *LIST_DIMENSIONS, *(c for pair in CROSS_DIMENSIONS for c in pair)})
+
+SQLITE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS user_profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    {_column_definitions()},
+    created_at TEXT NOT NULL DEFAULT ({NOW_SQL}),
+    UNIQUE (user_id, submission_id)
+);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_user_created ON user_profiles (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_created_id ON user_profiles (created_at, id);
+
+CREATE TABLE IF NOT EXISTS user_profiles_latest (
+    id INTEGER NOT NULL,
+    {_column_definitions()},
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_recovery_key ON user_profiles_latest (recovery_key);
+CREATE INDEX IF NOT EXISTS idx_user_profiles_latest_created_id ON user_profiles_latest (created_at, id);
+
+DROP TRIGGER IF EXISTS user_profiles_refresh_latest;
+CREATE TRIGGER user_profiles_refresh_latest AFTER INSERT ON user_profiles BEGIN
+    INSERT INTO user_profiles_latest (id, {", ".join(PROFILE_COLUMNS)}, created_at)
+    VALUES (NEW.id, {", ".join(f"NEW.{column}" for column in PROFILE_COLUMNS)}, NEW.created_at)
+    ON CONFLICT (user_id) DO UPDATE SET
+        id = excluded.id,
+        {", ".join(f"{column} = excluded.{column}" for column in PROFILE_COLUMNS if column != "user_id")},
+        created_at = excluded.created_at
+    WHERE (user_profiles_latest.created_at, user_profiles_latest.id) <= (excluded.created_at, excluded.id);
+END;
+
+CREATE TABLE IF NOT EXISTS profile_revisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    base_id INTEGER NOT NULL,
+    revision INTEGER NOT NULL,
+    is_snapshot INTEGER NOT NULL DEFAULT 0,
+    fields TEXT NOT NULL,
+    submission_id TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT ({NOW_SQL}),
+    UNIQUE (base_id, revision),
+    UNIQUE (user_id, submission_id)
+);
+
+-- Aggregate counts over the current profiles, kept up to date by the triggers below
+CREATE TABLE IF NOT EXISTS profile_analytics (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS user_profiles_latest_analytics_insert AFTER INSERT ON user_profiles_latest BEGIN
+    {_bump_analytics(_analytics_keys("NEW"), 1)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_profiles_latest_analytics_update
+AFTER UPDATE OF {", ".join(ANALYTICS_COLUMNS)} ON user_profiles_latest BEGIN
+    {_bump_analytics(_analytics_difference("OLD", "NEW"), -1)}
+    {_bump_analytics(_analytics_difference("NEW", "OLD"), 1)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_profiles_latest_analytics_delete AFTER DELETE ON user_profiles_latest BEGIN
+    {_bump_analytics(_analytics_keys("OLD"), -1)}
+END;
+
+-- Inverted index of the current profiles' list columns, the stand-in for schema.sql's GIN
+-- indexes. Rows carry the profile's browse key so a filtered page is one index range.
+CREATE TABLE IF NOT EXISTS profile_list_values (
+    user_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, field, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_profile_list_values_browse ON profile_list_values (field, value, created_at, id);
+
+CREATE TRIGGER IF NOT EXISTS user_profiles_latest_list_values_insert AFTER INSERT ON user_profiles_latest BEGIN
+    INSERT OR IGNORE INTO profile_list_values {_list_values("NEW")};
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_profiles_latest_list_values_update
+AFTER UPDATE OF {", ".join(LIST_COLUMNS)}, created_at, id ON user_profiles_latest BEGIN
+    DELETE FROM profile_list_values WHERE user_id = OLD.user_id;
+    INSERT OR IGNORE INTO profile_list_values {_list_values("NEW")};
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_profiles_latest_list_values_delete AFTER DELETE ON user_profiles_latest BEGIN
+    DELETE FROM profile_list_values WHERE user_id = OLD.user_id;
+END;
+
+-- Profiles whose search text changed, numbered in commit order, so every process's
+-- in-memory search index can catch up on writes made by the others
+CREATE TABLE IF NOT EXISTS profile_search_changes (
+    user_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_profile_search_changes_seq ON profile_search_changes (seq);
+
+CREATE TRIGGER IF NOT EXISTS user_profiles_latest_search_insert AFTER INSERT ON user_profiles_latest BEGIN
+    {_log_search_change("NEW")};
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_profiles_latest_search_update
+AFTER UPDATE OF {", ".join(SEARCH_COLUMNS)} ON user_profiles_latest BEGIN
+    {_log_search_change("NEW")};
+END;
+
+-- Backfill the index for databases created before it existed
+INSERT OR IGNORE INTO profile_list_values
+SELECT l.user_id, f.field, j.value, l.created_at, l.id
+FROM user_profiles_latest AS l, ({" UNION ALL ".join(f"SELECT '{column}' AS field" for column in LIST_COLUMNS)}) AS f,
+    json_each(COALESCE(CASE f.field {" ".join(f"WHEN '{column}' THEN l.{column}" for column in LIST_COLUMNS)} END, '[]')) AS j
+WHERE j.type = 'text' AND j.value != '' AND NOT EXISTS (SELECT 1 FROM profile_list_values);
+"""
+
+class SQLiteProfileStore(ProfileStore):
+    """
+    Profile store backed by a local SQLite file, for development, tests and benchmarks.
+
+    Mirrors schema.sql: list columns are stored as JSON text and the latest projection
+    is maintained by a trigger. Each thread gets its own connection; the database runs
+    in WAL mode so readers don't block the writer.
+
+    Search has no trigram index to lean on, so it uses an in-memory ProfileSearchIndex
+    built on the first search. Triggers number every change to a profile's search text
+    in `profile_search_changes`, and each search first re-reads the profiles changed
+    since the last number it saw, so writes from other processes are found too.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "profiles.db"):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._search_index = None
+        self._search_seq = 0
+        self._search_lock = threading.Lock()
+        self._connection().executescript(SQLITE_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _encode(row: dict) -> tuple:
+        values = []
+        for column in PROFILE_COLUMNS:
+            value = row.get(column)
+            if column in LIST_COLUMNS and value is not None:
+                value = json.dumps(list(value))
+            values.append(value)
+        values.append(row.get("created_at"))
+        return tuple(values)
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> dict:
+        profile = dict(row)
+        for column in LIST_COLUMNS:
+            if isinstance(profile.get(column), str):
+                profile[column] = json.loads(profile[column])
+        return profile
+
+    def insert_profiles(self, rows: List[dict]) -> int:
+        placeholders = ", ".join("?" for _ in PROFILE_COLUMNS)
+        sql = (
+            f"INSERT OR IGNORE INTO user_profiles ({', '.join(PROFILE_COLUMNS)}, created_at) "
+            f"VALUES ({placeholders}, COALESCE(?, {NOW_SQL}))"
+        )
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            inserted = conn.executemany(sql, [self._encode(row) for row in rows]).rowcount
+        return inserted
+
+    def load_latest(self, user_id: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT * FROM user_profiles_latest WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return self._decode(row) if row else None
+
+    def load_by_recovery_key(self, recovery_key: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT * FROM user_profiles_latest WHERE recovery_key = ? ORDER BY created_at DESC LIMIT 1",
+            (recovery_key,),
+        ).fetchone()
+        return self._decode(row) if row else None
+
+    def append_revision(self, user_id: str, changes: Dict[str, object], submission_id: str,
+                        snapshot_every: int = 10, created_at: Optional[str] = None) -> Optional[int]:
+        changes = {column: value for column, value in changes.items() if column in REVISION_COLUMNS}
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                "SELECT revision FROM profile_revisions WHERE user_id = ? AND submission_id = ?", (user_id, submission_id)
+            ).fetchone()
+            if existing:
+                return existing[0]
+            latest = conn.execute("SELECT * FROM user_profiles_latest WHERE user_id = ?", (user_id,)).fetchone()
+            if latest is None:
+                return None
+            base_id = latest["id"]
+            revision = conn.execute(
+                "SELECT COALESCE(MAX(revision), 0) + 1 FROM profile_revisions WHERE base_id = ?", (base_id,)
+            ).fetchone()[0]
+            is_snapshot = revision % snapshot_every == 0
+            if is_snapshot:
+                profile = dict(self._decode(latest), **changes)
+                fields = {column: profile[column] for column in REVISION_COLUMNS}
+            else:
+                fields = changes
+            if created_at is None:
+                created_at = conn.execute(f"SELECT {NOW_SQL}").fetchone()[0]
+            encoded = [json.dumps(list(changes[column])) if column in LIST_COLUMNS and changes[column] is not None
+                       else changes[column] for column in changes]
+            assignments = "".join(f"{column} = ?, " for column in changes)
+            conn.execute(
+                f"UPDATE user_profiles_latest SET {assignments}submission_id = ?, created_at = ? WHERE user_id = ?",
+                (*encoded, submission_id, created_at, user_id),
+            )
+            conn.execute(
+                "INSERT INTO profile_revisions (user_id, base_id, revision, is_snapshot, fields, submission_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user_id, base_id, revision, int(is_snapshot), json.dumps(fields), submission_id, created_at),
+            )
+        return revision
+
+    def load_revision(self, user_id: str, revision: int, base_id: Optional[int] = None) -> Optional[dict]:
+        conn = self._connection()
+        if base_id is None:
+            latest = conn.execute("SELECT id FROM user_profiles_latest WHERE user_id = ?", (user_id,)).fetchone()
+            if latest is None:
+                return None
+            base_id = latest[0]
+        base = conn.execute("SELECT * FROM user_profiles WHERE id = ? AND user_id = ?", (base_id, user_id)).fetchone()
+        if base is None:
+            return None
+        rows = conn.execute(
+            "SELECT revision, is_snapshot, fields, submission_id, created_at FROM profile_revisions "
+            "WHERE base_id = ? AND revision <= ? AND revision >= ("
+            "    SELECT COALESCE(MAX(revision), 0) FROM profile_revisions"
+            "    WHERE base_id = ? AND is_snapshot = 1 AND revision <= ?"
+            ") ORDER BY revision",
+            (base_id, revision, base_id, revision),
+        ).fetchall()
+        if revision and (not rows or rows[-1]["revision"] != revision):
+            return None
+        revisions = [dict(row, is_snapshot=bool(row["is_snapshot"]), fields=json.loads(row["fields"])) for row in rows]
+        return apply_revisions(dict(self._decode(base), revision=0), revisions)
+
+    def load_revisions(self, base_ids: List[int]) -> List[dict]:
+        if not base_ids:
+            return []
+        rows = self._connection().execute(
+            "SELECT base_id, revision, is_snapshot, fields, submission_id, created_at FROM profile_revisions "
+            f"WHERE base_id IN ({', '.join('?' for _ in base_ids)}) ORDER BY base_id, revision",
+            list(base_ids),
+        )
+        return [dict(row, is_snapshot=bool(row["is_snapshot"]), fields=json.loads(row["fields"])) for row in rows]
+
+    def load_analytics(self) -> Dict[Tuple[str, str], int]:
+        rows = self._connection().execute("SELECT dimension, value, count FROM profile_analytics WHERE count != 0")
+        return {(dimension, value): count for dimension, value, count in rows}
+
+    def replace_analytics(self, counts: Dict[Tuple[str, str], int]) -> int:
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM profile_analytics")
+            conn.executemany("INSERT INTO profile_analytics VALUES (?, ?, ?)",
+                             [(dimension, value, count) for (dimension, value), count in counts.items()])
+        return len(counts)
+
+    def browse(self, filters: Optional[Dict[str, List[str]]] = None, after: Optional[Tuple[str, int]] = None,
+               limit: int = 50) -> List[dict]:
+        pairs = sorted({(column, value) for column, values in (filters or {}).items() for value in values})
+        unknown = {column for column, _ in pairs} - set(LIST_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown list columns: {sorted(unknown)}")
+        conn = self._connection()
+        select = ", ".join(f"l.{column}" for column in BROWSE_COLUMNS)
+        if not pairs:
+            sql = f"SELECT {select} FROM user_profiles_latest AS l"
+            if after is not None:
+                sql += " WHERE (l.created_at, l.id) < (?, ?)"
+            sql += " ORDER BY l.created_at DESC, l.id DESC LIMIT ?"
+            params = (*(after or ()), limit)
+            return [self._decode(row) for row in conn.execute(sql, params)]
+
+        # Walk the rarest value's index range in browse order and check the others per profile
+        pairs.sort(key=lambda pair: self._value_count(conn, *pair))
+        (field, value), others = pairs[0], pairs[1:]
+        sql = (f"SELECT {select} FROM profile_list_values AS t JOIN user_profiles_latest AS l ON l.user_id = t.user_id "
+               f"WHERE t.field = ? AND t.value = ?")
+        params = [field, value]
+        if after is not None:
+            sql += " AND (t.created_at, t.id) < (?, ?)"
+            params.extend(after)
+        for other in others:
+            sql += (" AND EXISTS (SELECT 1 FROM profile_list_values AS o "
+                    "WHERE o.user_id = t.user_id AND o.field = ? AND o.value = ?)")
+            params.extend(other)
+        sql += " ORDER BY t.created_at DESC, t.id DESC LIMIT ?"
+        params.append(limit)
+        return [self._decode(row) for row in conn.execute(sql, params)]
+
+    def _value_count(self, conn, field: str, value: str) -> int:
+        """
+        Number of current profiles with value in field, from profile_analytics. A value
+        the analytics don't track is counted on the browse index, up to
+        BROWSE_COUNT_LIMIT, so it isn't taken for the rarest.
+        """
+        row = conn.execute("SELECT count FROM profile_analytics WHERE dimension = ? AND value = ?",
+                           (field, value)).fetchone()
+        if row is not None:
+            return row[0]
+        return conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM profile_list_values WHERE field = ? AND value = ? LIMIT ?)",
+            (field, value, BROWSE_COUNT_LIMIT),
+        ).fetchone()[0]
+
+    def _search_ready(self) -> ProfileSearchIndex:
+        """Builds the search index on first use and catches it up on changes since the last search."""
+        with self._search_lock:
+            conn = self._connection()
+            if self._search_index is None:
+                # Profiles written while the build scans are logged after this number and re-read below
+                self._search_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM profile_search_changes").fetchone()[0]
+                index = ProfileSearchIndex(SEARCH_COLUMNS)
+                index.build(self.iter_rows(latest_only=True, columns=["user_id", *SEARCH_COLUMNS]))
+                self._search_index = index
+            changed = conn.execute(
+                "SELECT user_id, seq FROM profile_search_changes WHERE seq > ? ORDER BY seq", (self._search_seq,)
+            ).fetchall()
+            if changed:
+                self._reindex([row["user_id"] for row in changed])
+                self._search_seq = changed[-1]["seq"]
+            return self._search_index
+
+    def _reindex(self, user_ids):
+        """Re-reads the current text of the given profiles into the search index."""
+        select = ", ".join(("user_id",) + SEARCH_COLUMNS)
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            rows = self._connection().execute(
+                f"SELECT {select} FROM user_profiles_latest WHERE user_id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+            for row in rows:
+                self._search_index.add(row["user_id"], self._decode(row))
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        matches = self._search_ready().search(query, limit)
+        if not matches:
+            return []
+        select = ", ".join(BROWSE_COLUMNS + tuple(column for column in SEARCH_COLUMNS if column not in BROWSE_COLUMNS))
+        rows = self._connection().execute(
+            f"SELECT {select} FROM user_profiles_latest WHERE user_id IN ({', '.join('?' for _ in matches)})",
+            [user_id for user_id, _ in matches],
+        )
+        found = {row["user_id"]: self._decode(row) for row in rows}
+        return [dict(found[user_id], score=score) for user_id, score in matches if user_id in found]
+
+    def scan(self, after: Optional[Tuple[str, int]] = None, limit: int = 1000,
+             latest_only: bool = False, columns: Optional[List[str]] = None) -> List[dict]:
+        table = "user_profiles_latest" if latest_only else "user_profiles"
+        if columns:
+            unknown = set(columns) - SCAN_COLUMNS
+            if unknown:
+                raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        select = ", ".join(columns) if columns else "*"
+        if after is None:
+            sql = f"SELECT {select} FROM {table} ORDER BY created_at, id LIMIT ?"
+            params = (limit,)
+        else:
+            sql = f"SELECT {select} FROM {table} WHERE (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT ?"
+            params = (after[0], after[1], limit)
+        return [self._decode(row) for row in self._connection().execute(sql, params)]
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+        self._search_index = None
+        self._search_seq = 0
@@ -0,0 +1,131 @@
+import os
+from typing import Dict, List, Optional, Tuple
+from supabase import create_client, Client
+from src.storage.base import BROWSE_COLUMNS, LIST_COLUMNS, ProfileStore, SCAN_COLUMNS, apply_revisions
+
+def create_supabase_client() -> Client:
+    """Create a Supabase client from SUPABASE_URL and SUPABASE_KEY."""
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+    return create_client(url, key)
+
+class SupabaseProfileStore(ProfileStore):
+    """Profile store backed by the Supabase (PostgREST) client."""
+
+    name = "supabase"
+
+    def __init__(self, client: Client = None):
+        self.client = client or create_supabase_client()
+
+    def insert_profiles(self, rows: List[dict]) -> int:
+        response = self.client.table('user_profiles').upsert(
+            rows, on_conflict='user_id,submission_id', ignore_duplicates=True
+        ).execute()
+        return len(response.data or [])
+
+    def load_latest(self, user_id: str) -> Optional[dict]:
+        response = self.client.table('user_profiles_latest').select('*').eq('user_id', user_id).limit(1).execute()
+        return response.data[0] if response.data else None
+
+    def load_by_recovery_key(self, recovery_key: str) -> Optional[dict]:
+        response = self.client.table('user_profiles_latest').select('*')\
+            .eq('recovery_key', recovery_key)\
+            .order('created_at', desc=True).limit(1).execute()
+        return response.data[0] if response.data else None
+
+    def append_revision(self, user_id: str, changes: Dict[str, object], submission_id: str,
+                        snapshot_every: int = 10, created_at: Optional[str] = None) -> Optional[int]:
+        response = self.client.rpc('append_profile_revision', {
+            'p_user_id': user_id, 'p_changes': changes,
+            'p_submission_id': submission_id, 'p_snapshot_every': snapshot_every,
+            'p_created_at': created_at,
+        }).execute()
+        return response.data
+
+    def load_revision(self, user_id: str, revision: int, base_id: Optional[int] = None) -> Optional[dict]:
+        if base_id is None:
+            latest = self.client.table('user_profiles_latest').select('id').eq('user_id', user_id).limit(1).execute()
+            if not latest.data:
+                return None
+            base_id = latest.data[0]['id']
+        base = self.client.table('user_profiles').select('*').eq('id', base_id).eq('user_id', user_id).limit(1).execute()
+        if not base.data:
+            return None
+        snapshot = self.client.table('profile_revisions').select('revision')\
+            .eq('base_id', base_id).eq('is_snapshot', True).lte('revision', revision)\
+            .order('revision', desc=True).limit(1).execute()
+        start = snapshot.data[0]['revision'] if snapshot.data else 0
+        rows = self.client.table('profile_revisions')\
+            .select('revision,is_snapshot,fields,submission_id,created_at')\
+            .eq('base_id', base_id).gte('revision', start).lte('revision', revision)\
+            .order('revision').execute().data or []
+        if revision and (not rows or rows[-1]['revision'] != revision):
+            return None
+        return apply_revisions(dict(base.data[0], revision=0), rows)
+
+    def load_revisions(self, base_ids: List[int]) -> List[dict]:
+        revisions, page = [], 1000
+        base_ids = sorted(base_ids)
+        # The ids go in the query string, so ask for a few hundred base rows at a time
+        for offset in range(0, len(base_ids), 200):
+            start = 0
+            while True:
+                rows = self.client.table('profile_revisions')\
+                    .select('base_id,revision,is_snapshot,fields,submission_id,created_at')\
+                    .in_('base_id', base_ids[offset:offset + 200]).order('base_id').order('revision')\
+                    .range(start, start + page - 1).execute().data or []
+                revisions += rows
+                if len(rows) < page:
+                    break
+                start += page
+        return revisions
+
+    def load_analytics(self) -> Dict[Tuple[str, str], int]:
+        counts, start, page = {}, 0, 1000
+        while True:
+            rows = self.client.table('profile_analytics').select('dimension,value,count').neq('count', 0)\
+                .order('dimension').order('value').range(start, start + page - 1).execute().data or []
+            counts.update({(row['dimension'], row['value']): row['count'] for row in rows})
+            if len(rows) < page:
+                return counts
+            start += page
+
+    def replace_analytics(self, counts: Dict[Tuple[str, str], int]) -> int:
+        response = self.client.rpc('replace_profile_analytics', {
+            'p_counts': [[dimension, value, count] for (dimension, value), count in counts.items()],
+        }).execute()
+        return response.data
+
+    def browse(self, filters: Optional[Dict[str, List[str]]] = None, after: Optional[Tuple[str, int]] = None,
+               limit: int = 50) -> List[dict]:
+        query = self.client.table('user_profiles_latest').select(','.join(BROWSE_COLUMNS))
+        for column, values in (filters or {}).items():
+            if column not in LIST_COLUMNS:
+                raise ValueError(f"Unknown list column: {column}")
+            if values:
+                query = query.contains(column, list(values))
+        if after is not None:
+            created_at, row_id = after
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})')
+        response = query.order('created_at', desc=True).order('id', desc=True).limit(limit).execute()
+        return response.data or []
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        if not query or not query.strip():
+            return []
+        response = self.client.rpc('search_profiles', {'p_query': query, 'p_limit': limit}).execute()
+        return response.data or []
+
+    def scan(self, after: Optional[Tuple[str, int]] = None, limit: int = 1000,
+             latest_only: bool = False, columns: Optional[List[str]] = None) -> List[dict]:
+        table = 'user_profiles_latest' if latest_only else 'user_profiles'
+        if columns:
+            unknown = set(columns) - SCAN_COLUMNS
+            if unknown:
+                raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        query = self.client.table(table).select(",".join(columns) if columns else '*')
+        if after is not None:
+            created_at, row_id = after
+            query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{row_id})')
+        response = query.order('created_at').order('id').limit(limit).execute()
+        return response.data or []
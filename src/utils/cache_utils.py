@@ -0,0 +1,131 @@
+import copy
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+def approximate_size(value) -> int:
+    """Returns a rough deep size in bytes for the dict/list/str values stored in profiles."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(approximate_size(v) for v in value)
+    return size
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry and a memory ceiling.
+
+    Entries are evicted least-recently-used first once either `max_entries` or
+    `max_bytes` is exceeded. Values are deep-copied on the way in and out so callers
+    can mutate what they get back without corrupting the cached copy.
+
+    Every `invalidate` bumps the key's generation. A caller that loads a value from
+    the backing store reads `generation(key)` first and passes it to `set`, which then
+    drops the value if the key was invalidated while it was loading, so a slow load
+    can't put back a row a concurrent write just replaced. Generations are kept for the
+    most recent `max_entries * 4` invalidated keys; a load older than the oldest one
+    forgotten is treated as stale.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300.0, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._generations = OrderedDict()
+        self._clock = 0
+        self._forgotten = 0
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+
+    def get(self, key):
+        """Returns a copy of the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def generation(self, key) -> int:
+        """Returns a token to pass to `set` for a value about to be loaded for key."""
+        with self._lock:
+            return self._clock
+
+    def set(self, key, value, generation=None):
+        """
+        Caches a copy of value, evicting least-recently-used entries to stay in bounds.
+        If `generation` is given and key was invalidated since it was read, nothing is
+        cached.
+        """
+        value = copy.deepcopy(value)
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and (
+                self._generations.get(key, 0) > generation or self._forgotten > generation
+            ):
+                self.stale_sets += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Drops a key from the cache and bumps its generation."""
+        with self._lock:
+            self._clock += 1
+            self._generations[key] = self._clock
+            self._generations.move_to_end(key)
+            while len(self._generations) > self.max_entries * 4:
+                _, self._forgotten = self._generations.popitem(last=False)
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def stats(self) -> dict:
+        """Returns hit/miss/eviction counters and current memory use."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "stale_sets": self.stale_sets,
+        }
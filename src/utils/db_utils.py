@@ -1,33 +1,133 @@
 import os
+import uuid
+from datetime import datetime, timezone
 import streamlit as st
 import json
-from supabase import create_client, Client
 from dotenv import load_dotenv
+from src.storage.base import LIST_COLUMNS, REVISION_COLUMNS, ProfileStore
+from src.storage.factory import create_store
+from src.utils.write_queue import ProfileWriteQueue
+from src.utils.cache_utils import TTLCache
+from src.utils.security_utils import compute_recovery_key, recovery_key_secret
+from src.utils.metrics import DB_ERRORS, DB_SECONDS, PAYLOAD_BYTES, PROFILE_CACHE_LOOKUPS, observe, payload_size
 
 load_dotenv()
 
+WRITE_BEHIND = os.environ.get("PROFILE_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+SNAPSHOT_EVERY = int(os.environ.get("PROFILE_SNAPSHOT_EVERY", "10"))
+
+profile_cache = TTLCache(
+    max_entries=int(os.environ.get("PROFILE_CACHE_MAX_ENTRIES", "2048")),
+    ttl=float(os.environ.get("PROFILE_CACHE_TTL", "300")),
+    max_bytes=int(os.environ.get("PROFILE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+)
+
 @st.cache_resource
-def init_connection() -> Client:
-    """Initialize and return the Supabase client."""
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_KEY")
-    return create_client(url, key)
+def init_connection() -> ProfileStore:
+    """Initialize and return the profile store selected by STORAGE_BACKEND (default: supabase)."""
+    # Fail at startup rather than on the first save if RECOVERY_KEY_SECRET is missing
+    recovery_key_secret()
+    return create_store()
+
+@st.cache_resource
+def get_write_queue(_store: ProfileStore) -> ProfileWriteQueue:
+    """Start the write-behind queue that batches profile inserts in the background."""
+    def flush_rows(rows):
+        with observe(DB_SECONDS, DB_ERRORS, operation="flush_profiles"):
+            _store.insert_profiles(rows)
+        for row in rows:
+            profile_cache.invalidate(row["user_id"])
+
+    queue = ProfileWriteQueue(
+        flush_rows,
+        spool_path=os.environ.get("PROFILE_SPOOL_PATH", "profile_spool.db"),
+        batch_size=int(os.environ.get("PROFILE_FLUSH_BATCH_SIZE", "50")),
+        flush_interval=float(os.environ.get("PROFILE_FLUSH_INTERVAL", "1.0")),
+    )
+    return queue.start()
 
-def save_profile(supabase: Client, user_data: dict):
-    """Save user profile to the database as a new entry."""
+def profile_changes(previous: dict, current: dict) -> dict:
+    """The revision columns of `current` whose values differ from `previous`."""
+    changes = {}
+    for column in REVISION_COLUMNS:
+        if column not in current:
+            continue
+        old, new = previous.get(column), current[column]
+        if column in LIST_COLUMNS:
+            old, new = list(old or []), list(new or [])
+        if old != new:
+            changes[column] = current[column]
+    return changes
+
+def save_profile(store: ProfileStore, user_data: dict, previous_profile: dict = None):
+    """
+    Save user profile to the database as a new entry.
+
+    When `previous_profile` (the version the user loaded) is given, only the columns
+    that changed are sent and stored, as the profile's next revision; nothing is
+    written if nothing changed. Revisions apply to the stored profile, so they need
+    it to exist already: a profile that isn't there yet is saved as a full row.
+
+    With PROFILE_WRITE_BEHIND enabled, full rows are spooled locally and inserted by a
+    background flusher; the submission id is returned immediately. Revisions always
+    bypass the queue: they apply to the stored profile inside the store's transaction,
+    and the caller needs their revision number. Both are stamped with `created_at`
+    here, at submission, since that is what orders a profile's versions.
+    """
+    row = dict(user_data, submission_id=user_data.get("submission_id") or uuid.uuid4().hex)
+    row.setdefault("created_at", datetime.now(timezone.utc).isoformat(timespec="milliseconds"))
+    row["recovery_key"] = compute_recovery_key(row)
+    profile_cache.invalidate(row["user_id"])
+    if previous_profile is not None:
+        previous = dict(previous_profile, recovery_key=compute_recovery_key(previous_profile))
+        changes = profile_changes(previous, row)
+        if not changes:
+            return 0
+        PAYLOAD_BYTES.labels(operation="save_revision").observe(payload_size(changes))
+        try:
+            with observe(DB_SECONDS, DB_ERRORS, operation="save_revision"):
+                revision = store.append_revision(
+                    row["user_id"], changes, row["submission_id"], SNAPSHOT_EVERY, row["created_at"]
+                )
+        except Exception as e:
+            print(f"Error saving profile revision: {e}")
+            return None
+        if revision is not None:
+            profile_cache.invalidate(row["user_id"])
+            return revision
+    PAYLOAD_BYTES.labels(operation="save_profile").observe(payload_size(row))
+    if WRITE_BEHIND:
+        try:
+            with observe(DB_SECONDS, DB_ERRORS, operation="enqueue_profile"):
+                return get_write_queue(store).enqueue(row)
+        except Exception as e:
+            print(f"Error spooling profile: {e}")
+            return None
     try:
-        response = supabase.table('user_profiles').insert(user_data).execute()
-        return response
+        with observe(DB_SECONDS, DB_ERRORS, operation="save_profile"):
+            inserted = store.insert_profiles([row])
+        profile_cache.invalidate(row["user_id"])
+        return inserted
     except Exception as e:
         print(f"Error saving profile: {e}")
         return None
 
-def load_profile_from_db(supabase: Client, user_id: str):
-    """Load the most recent user profile from the database based on user_id."""
+def load_profile_from_db(store: ProfileStore, user_id: str, raise_errors: bool = False):
+    """
+    Load the most recent user profile, served from the in-process cache when possible.
+
+    Reads the user_profiles_latest projection, so the cost doesn't grow with revisions.
+    Returns None if there is no such profile, and on a store error unless `raise_errors`.
+    """
+    cached = profile_cache.get(user_id)
+    PROFILE_CACHE_LOOKUPS.labels(result="miss" if cached is None else "hit").inc()
+    if cached is not None:
+        return cached
+    generation = profile_cache.generation(user_id)
     try:
-        response = supabase.table('user_profiles').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(1).execute()
-        if response.data:
-            profile = response.data[0]
+        with observe(DB_SECONDS, DB_ERRORS, operation="load_profile_from_db"):
+            profile = store.load_latest(user_id)
+        if profile:
             
             list_fields = [
                 'medical_conditions', 'current_medications', 'natural_supplements', 
@@ -50,26 +150,54 @@ def load_profile_from_db(supabase: Client, user_id: str):
                 elif field in profile:
                     profile[field] = ""
             
+            PAYLOAD_BYTES.labels(operation="load_profile_from_db").observe(payload_size(profile))
+            profile_cache.set(user_id, profile, generation)
             return profile
         return None
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error loading profile: {e}")
         return None
 
-def load_profile_by_security_questions(supabase: Client, security_questions: dict):
-    """Load a user profile from the database based on security questions and answers."""
-    try:
-        response = supabase.table('user_profiles').select('*')\
-            .eq('security_question_1', security_questions['security_question_1'])\
-            .eq('security_answer_1', security_questions['security_answer_1'])\
-            .eq('security_question_2', security_questions['security_question_2'])\
-            .eq('security_answer_2', security_questions['security_answer_2'])\
-            .eq('security_question_3', security_questions['security_question_3'])\
-            .eq('security_answer_3', security_questions['security_answer_3'])\
-            .order('created_at', desc=True).limit(1).execute()
-        if response.data:
-            return response.data[0]
+def load_profile_by_security_questions(store: ProfileStore, security_questions: dict, raise_errors: bool = False):
+    """
+    Load a user profile from the database based on security questions and answers.
+    Returns None if none matches, and on a store error unless `raise_errors`.
+    """
+    recovery_key = compute_recovery_key(security_questions)
+    if recovery_key is None:
         return None
+    try:
+        with observe(DB_SECONDS, DB_ERRORS, operation="load_profile_by_security_questions"):
+            return store.load_by_recovery_key(recovery_key)
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error loading profile by security questions: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def browse_profiles(store: ProfileStore, filters: dict = None, after: tuple = None, limit: int = 50):
+    """
+    One page of current profiles for the staff browser, newest first, filtered to those
+    whose list columns contain every selected value. Pass the (created_at, id) of the
+    last row shown to get the next page; returns None on error.
+    """
+    try:
+        with observe(DB_SECONDS, DB_ERRORS, operation="browse_profiles"):
+            return store.browse(filters, after, limit)
+    except Exception as e:
+        print(f"Error browsing profiles: {e}")
+        return None
+
+def search_profiles(store: ProfileStore, query: str, limit: int = 20):
+    """
+    Current profiles whose notes, other health goal, medications or supplements match
+    `query`, tolerating typos, best match first; returns None on error.
+    """
+    try:
+        with observe(DB_SECONDS, DB_ERRORS, operation="search_profiles"):
+            return store.search(query, limit)
+    except Exception as e:
+        print(f"Error searching profiles: {e}")
+        return None
@@ -0,0 +1,196 @@
+import os
+import secrets
+import threading
+import time
+from typing import Dict, Optional
+import streamlit as st
+from src.storage.draft_store import DraftStore
+
+DRAFT_QUERY_PARAM = "draft"
+# Security answers are only ever stored hashed in the recovery key, never in a draft
+EXCLUDED_FIELDS = frozenset({"security_answer_1", "security_answer_2", "security_answer_3"})
+
+class DraftAutosaver:
+    """
+    Debounced, coalescing writer of form draft patches.
+
+    `record` merges changed fields into an in-memory patch per draft token and returns
+    immediately. A background thread writes a token's patch once it has been quiet for
+    `debounce` seconds, or `max_delay` seconds after its first unsaved change if edits
+    keep coming, so a burst of reruns costs one small write of the fields that ended
+    up different. All due tokens are written in one transaction.
+    """
+
+    def __init__(self, store: DraftStore, debounce: float = 2.0, max_delay: float = 10.0):
+        self.store = store
+        self.debounce = debounce
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending: Dict[str, dict] = {}
+        self._first_change: Dict[str, float] = {}
+        self._last_change: Dict[str, float] = {}
+
+        self.recorded_changes = 0
+        self.written_fields = 0
+        self.write_batches = 0
+        self.failed_writes = 0
+
+    def record(self, token: str, changes: dict):
+        if not changes:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._pending.setdefault(token, {}).update(changes)
+            self._first_change.setdefault(token, now)
+            self._last_change[token] = now
+            self.recorded_changes += len(changes)
+
+    def flush(self, force: bool = False) -> int:
+        """Writes every due patch (all of them if `force`) and returns the number of fields written."""
+        now = time.monotonic()
+        with self._lock:
+            due = [token for token in self._pending if force
+                   or now - self._last_change[token] >= self.debounce
+                   or now - self._first_change[token] >= self.max_delay]
+            patches = {token: self._pending.pop(token) for token in due}
+            for token in due:
+                del self._first_change[token], self._last_change[token]
+        if not patches:
+            return 0
+        try:
+            written = self.store.save_patches(patches)
+        except Exception as e:
+            print(f"Error saving {len(patches)} form drafts: {e}")
+            self.failed_writes += 1
+            # Put the patches back under any newer changes so nothing is lost
+            with self._lock:
+                for token, fields in patches.items():
+                    self._pending[token] = dict(fields, **self._pending.get(token, {}))
+                    self._first_change.setdefault(token, now)
+                    self._last_change.setdefault(token, now)
+            return 0
+        self.written_fields += written
+        self.write_batches += 1
+        return written
+
+    def pending(self, token: str) -> dict:
+        with self._lock:
+            return dict(self._pending.get(token, {}))
+
+    def discard(self, token: str):
+        """Drops a draft, pending changes included, e.g. once the profile is saved."""
+        with self._lock:
+            self._pending.pop(token, None)
+            self._first_change.pop(token, None)
+            self._last_change.pop(token, None)
+        try:
+            self.store.delete([token])
+        except Exception as e:
+            print(f"Error deleting form draft: {e}")
+
+    def _run(self):
+        interval = min(self.debounce, self.max_delay) / 2
+        while not self._stop.is_set():
+            self._stop.wait(interval)
+            self.flush()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="draft-autosave", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stops the writer thread and writes whatever is still pending."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.flush(force=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = sum(len(fields) for fields in self._pending.values())
+        return {
+            "pending_fields": pending,
+            "recorded_changes": self.recorded_changes,
+            "written_fields": self.written_fields,
+            "write_batches": self.write_batches,
+            "failed_writes": self.failed_writes,
+        }
+
+@st.cache_resource
+def get_draft_autosaver() -> Optional[DraftAutosaver]:
+    """Starts the draft writer once per process; None if DRAFT_AUTOSAVE is turned off."""
+    if os.environ.get("DRAFT_AUTOSAVE", "true").lower() not in ("1", "true", "yes"):
+        return None
+    store = DraftStore(os.environ.get("DRAFT_STORE_PATH", "drafts.db"))
+    try:
+        store.purge(float(os.environ.get("DRAFT_TTL_HOURS", "72")) * 3600)
+    except Exception as e:
+        print(f"Error purging old form drafts: {e}")
+    return DraftAutosaver(
+        store,
+        debounce=float(os.environ.get("DRAFT_DEBOUNCE", "2.0")),
+        max_delay=float(os.environ.get("DRAFT_MAX_DELAY", "10.0")),
+    ).start()
+
+def autosave_section(previous: Optional[dict], values: dict):
+    """
+    Records the fields of a section that changed since its last render.
+
+    The first render only shows what was seeded, so it records nothing. Values not
+    backed by a widget in this session (e.g. the pregnancy answer while it is hidden)
+    are skipped so a restore never seeds a widget with a value it can't show.
+    """
+    autosaver = get_draft_autosaver()
+    if autosaver is None or previous is None:
+        return
+    changes = {
+        key: value for key, value in values.items()
+        if key not in EXCLUDED_FIELDS and previous.get(key) != value and key in st.session_state
+    }
+    if not changes:
+        return
+    token = st.query_params.get(DRAFT_QUERY_PARAM)
+    if not token:
+        token = secrets.token_urlsafe(16)
+        st.query_params[DRAFT_QUERY_PARAM] = token
+    autosaver.record(token, changes)
+
+def restore_draft() -> int:
+    """
+    Seeds widget values from the draft named in the URL, for a session that just
+    (re)connected; the sections only seed keys that aren't set yet. Returns the number
+    of fields restored.
+    """
+    autosaver = get_draft_autosaver()
+    token = st.query_params.get(DRAFT_QUERY_PARAM)
+    if autosaver is None or not token:
+        return 0
+    try:
+        fields = autosaver.store.load(token)
+    except Exception as e:
+        print(f"Error loading form draft: {e}")
+        return 0
+    # A reconnect can beat the debounce; unsaved changes in this process win
+    fields.update(autosaver.pending(token))
+    for key, value in fields.items():
+        if key not in EXCLUDED_FIELDS:
+            st.session_state[key] = value
+    return len(fields)
+
+def discard_draft():
+    """Deletes the session's draft and drops its token from the URL."""
+    token = st.query_params.get(DRAFT_QUERY_PARAM)
+    if not token:
+        return
+    autosaver = get_draft_autosaver()
+    if autosaver is not None:
+        autosaver.discard(token)
+    del st.query_params[DRAFT_QUERY_PARAM]
@@ -1,10 +1,82 @@
 import base64
+import hashlib
+import os
+import shutil
+from functools import lru_cache
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
-def get_base64_of_bin_file(bin_file):
-    """Reads a binary file and returns its base64 encoded string."""
+STATIC_FOLDER = 'static'
+STATIC_URL_PREFIX = 'app/static'
+# main.py lives at the repository root, two levels above this module
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@lru_cache(maxsize=None)
+def read_bin_file(bin_file):
+    """Reads a binary file once per process and returns its bytes, or None if it is missing."""
     try:
         with open(bin_file, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
+            return f.read()
     except FileNotFoundError:
         return None
+
+@lru_cache(maxsize=None)
+def read_text_file(text_file):
+    """Reads a text file once per process and returns its contents, or None if it is missing."""
+    try:
+        with open(text_file) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+@lru_cache(maxsize=None)
+def get_base64_of_bin_file(bin_file):
+    """Reads a binary file and returns its base64 encoded string."""
+    data = read_bin_file(bin_file)
+    if data is None:
+        return None
+    return base64.b64encode(data).decode()
+
+@lru_cache(maxsize=None)
+def get_content_hash(bin_file, length=12):
+    """Returns a short SHA-256 digest of a file's contents, used to version static assets."""
+    data = read_bin_file(bin_file)
+    if data is None:
+        return None
+    return hashlib.sha256(data).hexdigest()[:length]
+
+def app_static_dir():
+    """The folder Streamlit serves at /app/static: static/ next to the main script, not the CWD."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    main_script = ctx.main_script_path if ctx else os.path.join(APP_ROOT, 'main.py')
+    return os.path.join(os.path.dirname(os.path.abspath(main_script)), STATIC_FOLDER)
+
+@lru_cache(maxsize=None)
+def publish_static_file(bin_file, static_dir=None):
+    """
+    Copies a file into Streamlit's static folder under a content-hashed name and returns its URL.
+
+    The hashed filename means a changed asset always gets a new URL, so the file can be cached
+    for good. Streamlit itself sends no Cache-Control for /app/static, so the long-lived header
+    has to come from the reverse proxy or CDN in front of the app, e.g. for nginx:
+
+        location /app/static/ { proxy_pass ...; add_header Cache-Control "public, max-age=31536000, immutable"; }
+
+    Returns None if the file is missing or the static folder cannot be written.
+    """
+    content_hash = get_content_hash(bin_file)
+    if content_hash is None:
+        return None
+    static_dir = static_dir or app_static_dir()
+    stem, ext = os.path.splitext(os.path.basename(bin_file))
+    hashed_name = f"{stem}.{content_hash}{ext}"
+    try:
+        os.makedirs(static_dir, exist_ok=True)
+        target = os.path.join(static_dir, hashed_name)
+        if not os.path.exists(target):
+            tmp_target = f"{target}.{os.getpid()}.tmp"
+            shutil.copyfile(bin_file, tmp_target)
+            os.replace(tmp_target, target)
+    except OSError as e:
+        print(f"Error publishing static file {bin_file}: {e}")
+        return None
+    return f"{STATIC_URL_PREFIX}/{hashed_name}"
@@ -0,0 +1,84 @@
+import functools
+import time
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from src.utils.draft_utils import autosave_section
+from src.utils.metrics import SECTION_SECONDS
+
+SECTION_VALUES_KEY = "section_values"
+SECTION_TIMINGS_KEY = "section_timings"
+RENDERED_PREFIX = "_rendered_"
+
+def get_section_values(section_name):
+    """Returns the values most recently rendered by a form section, or an empty dict."""
+    return st.session_state.get(SECTION_VALUES_KEY, {}).get(section_name, {})
+
+def clear_section_values():
+    """
+    Forgets what every section last rendered, so the next render counts as a first one:
+    the autosaver records nothing for it and no dependent value triggers a rerun.
+    """
+    st.session_state.pop(SECTION_VALUES_KEY, None)
+    for key in [key for key in st.session_state if str(key).startswith(RENDERED_PREFIX)]:
+        del st.session_state[key]
+
+def get_section_timings():
+    """Returns {section name: seconds} for the most recent render of each form section."""
+    return dict(st.session_state.get(SECTION_TIMINGS_KEY, {}))
+
+def section_fragment(func):
+    """
+    Runs a form section as a Streamlit fragment so its widgets only rerun that section.
+
+    Fragment reruns discard return values, so every render stores the section's values in
+    session state and the wrapper returns them from there. A full app rerun (e.g. the submit
+    button) still calls every section and sees the latest values from all of them.
+    Falls back to a plain call on Streamlit versions without `st.fragment`. The time each
+    render takes is kept in session state for get_section_timings() and observed in the
+    nh_section_render_seconds histogram. Fields that changed since the previous render are
+    passed to the draft autosaver.
+    """
+    @functools.wraps(func)
+    def render(*args, **kwargs):
+        started = time.perf_counter()
+        values = func(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        SECTION_SECONDS.labels(section=func.__name__).observe(elapsed)
+        if SECTION_VALUES_KEY not in st.session_state:
+            st.session_state[SECTION_VALUES_KEY] = {}
+        if SECTION_TIMINGS_KEY not in st.session_state:
+            st.session_state[SECTION_TIMINGS_KEY] = {}
+        autosave_section(st.session_state[SECTION_VALUES_KEY].get(func.__name__), values)
+        st.session_state[SECTION_VALUES_KEY][func.__name__] = values
+        st.session_state[SECTION_TIMINGS_KEY][func.__name__] = elapsed
+        return values
+
+    fragment = getattr(st, "fragment", None)
+    if fragment is None:
+        return render
+
+    fragment_render = fragment(render)
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        fragment_render(*args, **kwargs)
+        return get_section_values(func.__name__)
+
+    return run
+
+def is_fragment_rerun():
+    """Returns True if the current script run only re-executes one or more fragments."""
+    ctx = get_script_run_ctx()
+    return bool(ctx and getattr(ctx, "fragment_ids_this_run", None))
+
+def rerun_app_on_change(state_key, value):
+    """
+    Triggers a full app rerun when a value other sections depend on changes inside a fragment.
+
+    Full app runs already render every dependent section, so they only record the value.
+    """
+    rendered_key = f"{RENDERED_PREFIX}{state_key}"
+    previous = st.session_state.get(rendered_key)
+    st.session_state[rendered_key] = value
+    if previous is not None and previous != value and is_fragment_rerun():
+        st.rerun()
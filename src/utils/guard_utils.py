@@ -0,0 +1,290 @@
+import copy
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from src.utils.db_utils import load_profile_by_security_questions, load_profile_from_db
+from src.utils.metrics import GUARD_BLOCKED_CLIENTS, GUARD_DECISIONS, GUARD_FAILURES
+from src.utils.security_utils import compute_recovery_key
+
+# Behind a reverse proxy every client shares the proxy's address. Set GUARD_TRUST_PROXY
+# there so the client is taken from the address the proxy appended last to
+# X-Forwarded-For; anywhere else the header is the client's to forge, so it is ignored.
+TRUST_PROXY = os.environ.get("GUARD_TRUST_PROXY", "").lower() in ("1", "true", "yes")
+
+UNAVAILABLE_MESSAGE = "We couldn't reach our profile database. Please try again in a moment."
+
+class ThrottledError(Exception):
+    """Raised instead of running a guarded lookup; `retry_after` is in seconds."""
+
+    def __init__(self, retry_after: float, reason: str):
+        super().__init__(f"Too many attempts ({reason}), retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+class StoreUnavailableError(Exception):
+    """Raised when a guarded lookup couldn't reach the profile store; not held against the client."""
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the function
+    and every caller that arrives while it runs waits for and shares its result (or
+    its exception). Followers get a deep copy so nobody mutates anyone else's result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, dict] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], object]) -> Tuple[object, bool]:
+        """Returns (result, whether it was shared from another caller's call)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return copy.deepcopy(call["result"]), True
+        try:
+            call["result"] = fn()
+            return call["result"], False
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+class _BoundedState:
+    """Per-key state in an LRU-bounded dict, so a flood of new clients can't exhaust memory."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._state: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def _get(self, key, default):
+        state = self._state.get(key)
+        if state is None:
+            state = self._state[key] = default
+            while len(self._state) > self.max_keys:
+                self._state.popitem(last=False)
+        else:
+            self._state.move_to_end(key)
+        return state
+
+class TokenBucket(_BoundedState):
+    """
+    Token-bucket rate limiter per key: up to `burst` attempts at once, refilled at
+    `rate` attempts per second.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        super().__init__(max_keys)
+        self.rate = rate
+        self.burst = burst
+
+    def acquire(self, key: Hashable) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._get(key, [self.burst, now])
+            state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+            state[1] = now
+            if state[0] >= 1:
+                state[0] -= 1
+                return 0.0
+            return (1 - state[0]) / self.rate
+
+class FailureBackoff(_BoundedState):
+    """
+    Exponential backoff per key after failed attempts: with n failures on record, a
+    failure blocks the key for `base * 2 ** (n - 1)` seconds, up to `max_delay`. One
+    failure is forgiven for every `decay_after` seconds without one, and all of them
+    after `reset_after` quiet seconds; `success` clears the key at once.
+    """
+
+    def __init__(self, base: float = 1.0, max_delay: float = 300.0, reset_after: float = 900.0,
+                 decay_after: float = 60.0, max_keys: int = 100000):
+        super().__init__(max_keys)
+        self.base = base
+        self.max_delay = max_delay
+        self.reset_after = reset_after
+        self.decay_after = decay_after
+
+    def remaining(self, key: Hashable) -> float:
+        """Seconds the key is still blocked for, 0 if it isn't."""
+        with self._lock:
+            state = self._state.get(key)
+            return max(0.0, state[1] - time.monotonic()) if state else 0.0
+
+    def failure(self, key: Hashable) -> float:
+        """Records a failure and returns the delay it imposes."""
+        now = time.monotonic()
+        with self._lock:
+            # [failures on record, blocked until, time of the last failure]
+            state = self._get(key, [0, now, now])
+            quiet = now - state[2]
+            if quiet > self.reset_after:
+                state[0] = 0
+            elif self.decay_after:
+                state[0] = max(0, state[0] - int(quiet // self.decay_after))
+            state[0] += 1
+            delay = min(self.max_delay, self.base * 2 ** min(state[0] - 1, 32))
+            state[1] = now + delay
+            state[2] = now
+            return delay
+
+    def success(self, key: Hashable):
+        with self._lock:
+            self._state.pop(key, None)
+
+    def blocked(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for _, until, _ in self._state.values() if until > now)
+
+class ProfileGuard:
+    """
+    Guards profile lookups by code and by security answers, per client.
+
+    A client is identified by its session and its IP address, and every check applies
+    to each of them, so a script can't dodge the limit by opening new sessions.
+    Checks run before anything touches the database, in order: a client still in
+    backoff after failed lookups is turned away, then each attempt takes a token from
+    the session's and the IP's buckets. Allowed lookups for the same key that overlap
+    share one query. A lookup that finds nothing is a failure and backs the client
+    off exponentially. One that finds a profile clears the session's backoff but not
+    the IP's, so a script can't reset it by loading a code it knows between guesses;
+    the IP's failures instead decay one per `backoff_decay` quiet seconds, so people
+    sharing an address are soon let back in after someone else's typos. A lookup that
+    raises, e.g. because the database is down, counts as neither.
+    """
+
+    def __init__(self, session_rate: float, session_burst: float, ip_rate: float, ip_burst: float,
+                 backoff_base: float = 1.0, backoff_max: float = 300.0, backoff_reset: float = 900.0,
+                 backoff_decay: float = 60.0):
+        self.limits = {
+            "session": TokenBucket(session_rate, session_burst),
+            "ip": TokenBucket(ip_rate, ip_burst),
+        }
+        self.backoff = FailureBackoff(backoff_base, backoff_max, backoff_reset, backoff_decay)
+        self.flights = SingleFlight()
+
+    def check(self, operation: str, clients: Dict[str, Optional[str]]):
+        """Raises ThrottledError if any of the clients may not make an attempt now."""
+        keys = [(scope, client) for scope, client in clients.items() if client]
+        retry_after = max((self.backoff.remaining(key) for key in keys), default=0.0)
+        if retry_after:
+            GUARD_DECISIONS.labels(operation=operation, outcome="backoff").inc()
+            raise ThrottledError(retry_after, "backoff")
+        for scope, client in keys:
+            retry_after = self.limits[scope].acquire(client)
+            if retry_after:
+                GUARD_DECISIONS.labels(operation=operation, outcome="rate_limited").inc()
+                raise ThrottledError(retry_after, f"{scope} rate limit")
+
+    def run(self, operation: str, key: Hashable, clients: Dict[str, Optional[str]], fn: Callable[[], object],
+            checked: bool = False):
+        """
+        Runs `fn` for an attempt by `clients` unless it is throttled; a None result is a
+        failure and an exception propagates without counting. Pass `checked` if `check`
+        already admitted this attempt.
+        """
+        if not checked:
+            self.check(operation, clients)
+        result, shared = self.flights.do((operation, key), fn)
+        GUARD_DECISIONS.labels(operation=operation, outcome="coalesced" if shared else "allowed").inc()
+        keys = [(scope, client) for scope, client in clients.items() if client]
+        if result is None:
+            GUARD_FAILURES.labels(operation=operation).inc()
+            for client in keys:
+                self.backoff.failure(client)
+        elif clients.get("session"):
+            self.backoff.success(("session", clients["session"]))
+        return result
+
+def create_profile_guard() -> ProfileGuard:
+    """A ProfileGuard configured from the GUARD_* environment variables; rates are per minute."""
+    guard = ProfileGuard(
+        session_rate=float(os.environ.get("GUARD_SESSION_PER_MINUTE", "10")) / 60,
+        session_burst=float(os.environ.get("GUARD_SESSION_BURST", "5")),
+        ip_rate=float(os.environ.get("GUARD_IP_PER_MINUTE", "60")) / 60,
+        ip_burst=float(os.environ.get("GUARD_IP_BURST", "20")),
+        backoff_base=float(os.environ.get("GUARD_BACKOFF_BASE", "1.0")),
+        backoff_max=float(os.environ.get("GUARD_BACKOFF_MAX", "300")),
+        backoff_reset=float(os.environ.get("GUARD_BACKOFF_RESET", "900")),
+        backoff_decay=float(os.environ.get("GUARD_BACKOFF_DECAY", "60")),
+    )
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        GUARD_BLOCKED_CLIENTS.set_function(guard.backoff.blocked)
+    return guard
+
+@st.cache_resource
+def get_profile_guard() -> ProfileGuard:
+    """One guard per process, shared by every session."""
+    return create_profile_guard()
+
+_proxy_warning = threading.Event()
+
+def client_address(address: Optional[str], forwarded_for: Optional[str]) -> Optional[str]:
+    if forwarded_for and TRUST_PROXY:
+        return forwarded_for.split(",")[-1].strip()
+    if forwarded_for and not _proxy_warning.is_set():
+        _proxy_warning.set()
+        print("Warning: ignoring X-Forwarded-For; behind a reverse proxy, set GUARD_TRUST_PROXY=1 "
+              "or every client shares the proxy's rate limit")
+    return address
+
+def session_clients() -> Dict[str, Optional[str]]:
+    """The current Streamlit session and its client's IP address (None when unknown, e.g. localhost)."""
+    ctx = get_script_run_ctx()
+    return {
+        "session": ctx.session_id if ctx else None,
+        "ip": client_address(st.context.ip_address, st.context.headers.get("X-Forwarded-For")),
+    }
+
+def _unavailable_on_error(fn: Callable[[], object]) -> Callable[[], object]:
+    def lookup():
+        try:
+            return fn()
+        except Exception as e:
+            print(f"Error in guarded profile lookup: {e}")
+            raise StoreUnavailableError(str(e)) from e
+    return lookup
+
+def guarded_load_profile(guard: ProfileGuard, store, user_id: str, clients: Dict[str, Optional[str]],
+                         checked: bool = False):
+    """
+    load_profile_from_db behind the guard; raises ThrottledError when throttled and
+    StoreUnavailableError when the store fails.
+    """
+    user_id = (user_id or "").strip()
+    if not user_id:
+        return None
+    return guard.run("load_profile", user_id, clients,
+                     _unavailable_on_error(lambda: load_profile_from_db(store, user_id, raise_errors=True)), checked)
+
+def guarded_recover_profile(guard: ProfileGuard, store, security_questions: dict, clients: Dict[str, Optional[str]],
+                            checked: bool = False):
+    """
+    load_profile_by_security_questions behind the guard; raises ThrottledError when
+    throttled and StoreUnavailableError when the store fails.
+    """
+    recovery_key = compute_recovery_key(security_questions)
+    if recovery_key is None:
+        return None
+    lookup = _unavailable_on_error(
+        lambda: load_profile_by_security_questions(store, security_questions, raise_errors=True))
+    return guard.run("recover_profile", recovery_key, clients, lookup, checked)
+
+def retry_message(error: ThrottledError) -> str:
+    return f"Too many attempts. Please wait {math.ceil(error.retry_after)} seconds and try again."
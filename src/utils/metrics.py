@@ -0,0 +1,150 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, start_http_server
+from prometheus_client import multiprocess
+
+# Streamlit reruns and form sections are milliseconds to seconds; database calls go down to sub-millisecond cache hits
+RERUN_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0)
+SECTION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PAYLOAD_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+# A write-behind flush is one batched insert, plus more when a failed batch is split and retried
+FLUSH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+RERUN_SECONDS = Histogram(
+    "nh_rerun_seconds", "Wall time of a full Streamlit script run.", buckets=RERUN_BUCKETS,
+)
+SECTION_SECONDS = Histogram(
+    "nh_section_render_seconds", "Wall time of one form section render, full or fragment rerun.",
+    ["section"], buckets=SECTION_BUCKETS,
+)
+DB_SECONDS = Histogram(
+    "nh_db_call_seconds", "Latency of a profile store call made through db_utils.",
+    ["operation"], buckets=DB_BUCKETS,
+)
+DB_ERRORS = Counter(
+    "nh_db_errors_total", "Profile store calls that raised.", ["operation"],
+)
+PROFILE_CACHE_LOOKUPS = Counter(
+    "nh_profile_cache_lookups_total", "In-process profile cache lookups by result.", ["result"],
+)
+PAYLOAD_BYTES = Histogram(
+    "nh_profile_payload_bytes", "JSON size of profiles saved and loaded.", ["operation"], buckets=PAYLOAD_BUCKETS,
+)
+RERUN_ERRORS = Counter(
+    "nh_rerun_errors_total", "Script runs that ended in an uncaught exception.", ["exception"],
+)
+VALIDATION_ERRORS = Counter(
+    "nh_validation_errors_total", "Profile fields rejected by validation on submit.", ["field"],
+)
+GUARD_DECISIONS = Counter(
+    "nh_guard_decisions_total",
+    "Guarded profile lookups by outcome: allowed, coalesced onto an in-flight query, rate_limited or backoff.",
+    ["operation", "outcome"],
+)
+GUARD_FAILURES = Counter(
+    "nh_guard_failures_total", "Guarded lookups that found no profile, each backing the client off.", ["operation"],
+)
+GUARD_BLOCKED_CLIENTS = Gauge(
+    "nh_guard_blocked_clients", "Sessions and IPs currently in backoff after failed lookups.", multiprocess_mode="livesum",
+)
+WRITE_QUEUE_DEPTH = Gauge(
+    "nh_write_queue_depth", "Profile rows spooled by the write-behind queue and not yet flushed.",
+    multiprocess_mode="livesum",
+)
+WRITE_QUEUE_FAILED_ROWS = Gauge(
+    "nh_write_queue_failed_rows", "Spooled profile rows that exhausted their retries and wait for retry_failed.",
+    multiprocess_mode="livesum",
+)
+WRITE_QUEUE_OLDEST_AGE = Gauge(
+    "nh_write_queue_oldest_age_seconds", "Age of the oldest row in the write-behind spool.", multiprocess_mode="livemax",
+)
+WRITE_QUEUE_FLUSH_SECONDS = Histogram(
+    "nh_write_queue_flush_seconds", "Time to deliver one spooled batch to the store, including split retries.",
+    buckets=FLUSH_BUCKETS,
+)
+WRITE_QUEUE_FLUSHED_ROWS = Counter(
+    "nh_write_queue_flushed_rows_total", "Spooled profile rows the store accepted.",
+)
+WRITE_QUEUE_SINK_ERRORS = Counter(
+    "nh_write_queue_sink_errors_total", "Write-behind sink calls that raised; a rejected batch is split and sent again, an unreachable store backs off.",
+)
+ASSET_PAYLOAD_BYTES = Gauge(
+    "nh_asset_payload_bytes",
+    "Background and stylesheet bytes sent to the browser on every rerun: as sent now, and as an inline data URI would.",
+    ["delivery"], multiprocess_mode="max",
+)
+ACTIVE_SESSIONS = Gauge(
+    "nh_active_sessions", "Browser sessions connected to this Streamlit server.", multiprocess_mode="livesum",
+)
+
+def payload_size(profile: dict) -> int:
+    return len(json.dumps(profile, default=str))
+
+@contextmanager
+def observe(histogram, errors=None, **labels):
+    """
+    Times the block into `histogram` with the given labels. If `errors` is given, an
+    exception raised by the block increments it with the same labels before propagating.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if errors is not None:
+            errors.labels(**labels).inc()
+        raise
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - started)
+
+@contextmanager
+def observe_rerun():
+    """Times a full script run and counts it as an error if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        # Streamlit's own control-flow exceptions (st.rerun, st.stop) aren't errors
+        if not type(e).__module__.startswith("streamlit."):
+            RERUN_ERRORS.labels(exception=type(e).__name__).inc()
+        raise
+    finally:
+        RERUN_SECONDS.observe(time.perf_counter() - started)
+
+def _count_active_sessions() -> int:
+    from streamlit.runtime import Runtime
+    if not Runtime.exists():
+        return 0
+    # SessionManager has no public accessor on Runtime; fall back to 0 if that changes
+    session_mgr = getattr(Runtime.instance(), "_session_mgr", None)
+    return session_mgr.num_active_sessions() if session_mgr is not None else 0
+
+def metrics_registry():
+    """
+    The registry to expose. Under PROMETHEUS_MULTIPROC_DIR (e.g. uvicorn with several
+    workers) every process writes its samples there and the registry aggregates them.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def start_metrics_server(port: int = None):
+    """
+    Serves /metrics for the Streamlit app on METRICS_PORT (default 9100), which
+    Streamlit can't route itself. Returns the port, or None if METRICS_PORT is 0.
+    """
+    port = int(os.environ.get("METRICS_PORT", "9100")) if port is None else port
+    if not port:
+        return None
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        ACTIVE_SESSIONS.set_function(_count_active_sessions)
+    try:
+        start_http_server(port, registry=metrics_registry())
+    except OSError as e:
+        print(f"Error starting metrics server on port {port}: {e}")
+        return None
+    return port
@@ -0,0 +1,54 @@
+import hashlib
+import hmac
+import os
+import secrets
+import string
+import unicodedata
+
+SECURITY_PAIRS = (
+    ("security_question_1", "security_answer_1"),
+    ("security_question_2", "security_answer_2"),
+    ("security_question_3", "security_answer_3"),
+)
+
+PROFILE_CODE_ALPHABET = string.ascii_letters + string.digits
+
+def generate_profile_code() -> str:
+    """Returns a new profile code in the XXX-XXX-XXX format users are given to load their profile."""
+    raw = ''.join(secrets.choice(PROFILE_CODE_ALPHABET) for _ in range(9))
+    return f"{raw[:3]}-{raw[3:6]}-{raw[6:]}"
+
+def normalize_security_text(text) -> str:
+    """Normalizes unicode form, case and whitespace so equivalent answers compare equal."""
+    text = unicodedata.normalize("NFKC", str(text or ""))
+    return " ".join(text.casefold().split())
+
+def recovery_key_secret() -> bytes:
+    """
+    The RECOVERY_KEY_SECRET that keys recovery keys. Security answers are easy to guess,
+    so an unkeyed hash of them is no protection: a missing secret raises RuntimeError
+    unless RECOVERY_KEY_ALLOW_EMPTY_SECRET is set, for local development only.
+    """
+    secret = os.environ.get("RECOVERY_KEY_SECRET", "")
+    if not secret and os.environ.get("RECOVERY_KEY_ALLOW_EMPTY_SECRET", "").lower() not in ("1", "true", "yes"):
+        raise RuntimeError("RECOVERY_KEY_SECRET is not set; set it, or RECOVERY_KEY_ALLOW_EMPTY_SECRET=1 for local development")
+    return secret.encode()
+
+def compute_recovery_key(security_questions: dict):
+    """
+    Returns the recovery key for a set of security questions and answers.
+
+    The three question/answer pairs are normalized, sorted by question so the order the
+    user picks them in doesn't matter, and hashed with HMAC-SHA256 keyed by
+    RECOVERY_KEY_SECRET (see recovery_key_secret). Returns None if any question or answer
+    is missing.
+    """
+    pairs = []
+    for question_field, answer_field in SECURITY_PAIRS:
+        question = normalize_security_text(security_questions.get(question_field))
+        answer = normalize_security_text(security_questions.get(answer_field))
+        if not question or not answer:
+            return None
+        pairs.append(f"{question}\x1f{answer}")
+    message = "\x1e".join(sorted(pairs)).encode()
+    return hmac.new(recovery_key_secret(), message, hashlib.sha256).hexdigest()
@@ -1,5 +1,8 @@
 import streamlit as st
 from src.config.form_defaults import FORM_FIELDS
+from src.models.session_profile import SessionProfile
+from src.utils.draft_utils import discard_draft
+from src.utils.fragment_utils import clear_section_values
 
 def initialize_session_state():
     """Initializes the session state with default values for all form fields."""
@@ -12,21 +15,17 @@ def initialize_session_state():
 
 def clear_form():
     """
-    Resets the form fields in the session state, including the user profile.
-    """
-    # Reset all form fields to their default values
-    for key, default_value in FORM_FIELDS.items():
-        st.session_state[key] = default_value
+    Resets the form, including the user profile.
 
-    # Reset the user_profile dictionary to its default state
-    st.session_state.user_profile = {
-            "user_id": "", "age_range": "18-24", "sex": "Male", "height_ft": 5, "height_in": 6, "weight_lbs": "",
-            "physical_activity": "3-4 days", "energy_level": "Neutral", "diet": "I don't follow a specific diet",
-            "pregnant_or_breastfeeding": "Not Applicable", "medical_conditions": [],
-            "medications": [], "natural_supplements": [], "allergies": [], "health_goals": [], "other_health_goal": "",
-            "interested_supplements": [], "additional_info": "",
-            "security_question_1": "", "security_answer_1": "",
-            "security_question_2": "", "security_answer_2": "",
-            "security_question_3": "", "security_answer_3": ""
-        }
-    st.session_state.errors = {}
\ No newline at end of file
+    Widget keys are dropped rather than set to their defaults, so each section re-seeds
+    them from the fresh profile on the next run and the defaults live only in
+    PROFILE_DEFAULTS. The sections' last rendered values go too, or the autosaver would
+    record the reset fields as edits and start a new draft of the empty form.
+    """
+    for key in FORM_FIELDS:
+        if key in st.session_state:
+            del st.session_state[key]
+    st.session_state.user_profile = SessionProfile()
+    st.session_state.errors = {}
+    clear_section_values()
+    discard_draft()
@@ -0,0 +1,20 @@
+import hmac
+import os
+import streamlit as st
+
+def require_staff():
+    """Stops the page unless the session has entered STAFF_PASSWORD; staff pages are off when it isn't set."""
+    password = os.environ.get("STAFF_PASSWORD")
+    if not password:
+        st.error("Staff pages are disabled. Set STAFF_PASSWORD to enable them.")
+        st.stop()
+    if st.session_state.get("staff_authenticated"):
+        return
+    entered = st.text_input("Staff password", type="password", key="staff_password")
+    if st.button("Sign in", key="staff_sign_in"):
+        if hmac.compare_digest(entered.encode(), password.encode()):
+            st.session_state.staff_authenticated = True
+            del st.session_state["staff_password"]
+            st.rerun()
+        st.error("Incorrect password.")
+    st.stop()
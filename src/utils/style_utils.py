@@ -1,28 +1,91 @@
 import streamlit as st
-from .file_utils import get_base64_of_bin_file
+from functools import lru_cache
+from src.services.vocabulary import FIELD_KINDS, term_suggestions
+from .file_utils import get_base64_of_bin_file, publish_static_file, read_text_file
 
-def inject_css(file_path):
-    with open(file_path) as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-
-def set_page_background(png_file):
-    """Sets the background of a Streamlit app from a PNG file."""
-    bin_str = get_base64_of_bin_file(png_file)
-    if bin_str:
-        page_bg_img = f"""
+BACKGROUND_CSS_TEMPLATE = """
         <style>
         .stApp {{
-            background-image: url("data:image/png;base64,{bin_str}");
+            background-image: url("{url}");
             background-size: cover;
             background-repeat: no-repeat;
-            background-attachment: scroll; # or 'fixed'
+            background-attachment: fixed;
         }}
         </style>
         """
+
+def static_serving_enabled():
+    """Returns True if Streamlit is configured to serve the ./static folder."""
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+@lru_cache(maxsize=None)
+def get_css_markup(file_path):
+    """Returns the <style> block for a stylesheet, built once per process."""
+    css = read_text_file(file_path)
+    if css is None:
+        return None
+    return f"<style>{css}</style>"
+
+@lru_cache(maxsize=None)
+def get_inline_background_markup(png_file):
+    """Returns the background <style> block with the image embedded as a data URI."""
+    bin_str = get_base64_of_bin_file(png_file)
+    if not bin_str:
+        return None
+    return BACKGROUND_CSS_TEMPLATE.format(url=f"data:image/png;base64,{bin_str}")
+
+@lru_cache(maxsize=None)
+def get_static_background_markup(png_file):
+    """Returns the background <style> block pointing at a content-hashed static file."""
+    url = publish_static_file(png_file)
+    if not url:
+        return None
+    return BACKGROUND_CSS_TEMPLATE.format(url=url)
+
+def get_background_markup(png_file):
+    """Returns the background markup, preferring the static file over the data URI."""
+    markup = None
+    if static_serving_enabled():
+        markup = get_static_background_markup(png_file)
+    return markup or get_inline_background_markup(png_file)
+
+def inject_css(file_path):
+    markup = get_css_markup(file_path)
+    if markup:
+        st.markdown(markup, unsafe_allow_html=True)
+
+def set_page_background(png_file):
+    """Sets the background of a Streamlit app from a PNG file."""
+    page_bg_img = get_background_markup(png_file)
+    if page_bg_img:
         st.markdown(page_bg_img, unsafe_allow_html=True)
 
+def get_asset_payload_report(png_file, css_file):
+    """
+    Returns the number of asset bytes pushed to the browser on every rerun.
+
+    `before` is the inline data URI approach, `after` is what is currently sent.
+    """
+    css_bytes = len((get_css_markup(css_file) or "").encode())
+    inline_bytes = len((get_inline_background_markup(png_file) or "").encode())
+    current_bytes = len((get_background_markup(png_file) or "").encode())
+    return {
+        "before": inline_bytes + css_bytes,
+        "after": current_bytes + css_bytes,
+        "saved": inline_bytes - current_bytes,
+        "static_serving": static_serving_enabled(),
+    }
+
 def display_message(message_type, message):
     if message_type == "success":
         st.success(message)
     elif message_type == "error":
         st.error(message)
+
+def display_term_suggestions(text, field):
+    """Offers the known name an entry nearly matches; the entry itself is saved as typed."""
+    for entry, suggestion in term_suggestions(text, FIELD_KINDS[field]):
+        st.caption(f'Did you mean "{suggestion}" for "{entry}"? Edit the entry to use it, otherwise it is saved as you typed it.')
@@ -0,0 +1,244 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from src.utils.metrics import (
+    WRITE_QUEUE_DEPTH, WRITE_QUEUE_FAILED_ROWS, WRITE_QUEUE_FLUSH_SECONDS, WRITE_QUEUE_FLUSHED_ROWS,
+    WRITE_QUEUE_OLDEST_AGE, WRITE_QUEUE_SINK_ERRORS,
+)
+
+SPOOL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile_spool (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    failed INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    enqueued_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_profile_spool_pending ON profile_spool (failed, next_attempt_at, id);
+"""
+
+# Exception class names, from any database driver or HTTP client, that mean the store
+# couldn't be reached rather than that it refused a row
+UNREACHABLE_ERRORS = frozenset({
+    "OperationalError", "InterfaceError", "ConnectError", "ConnectTimeout", "ReadTimeout", "WriteTimeout",
+    "PoolTimeout", "TimeoutException", "RemoteProtocolError",
+})
+
+def is_unreachable(error: Exception) -> bool:
+    """True if `error` is a connection or timeout failure, not a problem with the rows sent."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in UNREACHABLE_ERRORS for cls in type(error).__mro__)
+
+class ProfileWriteQueue:
+    """
+    Durable write-behind queue for profile inserts.
+
+    Submissions are committed to a local SQLite spool (WAL mode) and acknowledged
+    immediately. A background thread drains the spool in batches through `sink`, a
+    callable that receives a list of rows and raises on failure. Every row carries a
+    `submission_id`, so a batch that is retried after a partial failure can be inserted
+    idempotently on (user_id, submission_id), and a `created_at` stamped when it was
+    spooled, so a late flush doesn't make an old submission look new. A batch the store
+    rejects is split in half and each half sent again, so one bad row only holds back
+    itself; rows that keep failing are kept in the spool and flagged rather than
+    dropped. When the store can't be reached at all, the whole batch backs off instead,
+    without using up its rows' attempts.
+
+    Flush latency, delivered rows and sink errors feed the nh_write_queue_* metrics as
+    they happen; the depth, failed-row and oldest-age gauges are refreshed after every
+    flush pass.
+    """
+
+    def __init__(self, sink, spool_path="profile_spool.db", batch_size=50, flush_interval=1.0,
+                 max_attempts=8, retry_backoff=0.5, max_backoff=60.0):
+        self.sink = sink
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = sqlite3.connect(spool_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SPOOL_SCHEMA)
+
+        self.flushed_rows = 0
+        self.flushed_batches = 0
+        self.failed_flushes = 0
+        self.last_flush_latency = None
+        self.total_flush_latency = 0.0
+
+    def enqueue(self, user_data: dict, submission_id: str = None) -> str:
+        """Spools a profile row and returns its submission id."""
+        submission_id = submission_id or user_data.get("submission_id") or uuid.uuid4().hex
+        row = dict(user_data, submission_id=submission_id)
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat(timespec="milliseconds"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO profile_spool (submission_id, user_id, payload, next_attempt_at, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (submission_id, row["user_id"], json.dumps(row), now, now),
+            )
+        self._wake.set()
+        return submission_id
+
+    def flush(self) -> int:
+        """Sends every due batch to the sink and returns the number of rows flushed."""
+        total = 0
+        try:
+            while True:
+                flushed = self._flush_batch()
+                if not flushed:
+                    break
+                total += flushed
+        finally:
+            self._publish(self._spool_counts())
+        return total
+
+    def _flush_batch(self) -> int:
+        with self._lock:
+            batch = self._conn.execute(
+                "SELECT id, payload, attempts FROM profile_spool "
+                "WHERE failed = 0 AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (time.time(), self.batch_size),
+            ).fetchall()
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        failures = []
+        delivered = self._deliver(batch, failures)
+        latency = time.perf_counter() - started
+        WRITE_QUEUE_FLUSH_SECONDS.observe(latency)
+        WRITE_QUEUE_FLUSHED_ROWS.inc(len(delivered))
+        if failures:
+            self._schedule_retry(failures)
+        with self._lock:
+            self._conn.executemany("DELETE FROM profile_spool WHERE id = ?", [(row_id,) for row_id, _, _ in delivered])
+            if delivered:
+                self.flushed_rows += len(delivered)
+                self.flushed_batches += 1
+                self.last_flush_latency = latency
+                self.total_flush_latency += latency
+        return len(delivered)
+
+    def _deliver(self, batch, failures):
+        """
+        Sends spooled rows to the sink and returns the ones it accepted. A batch the sink
+        rejects is split in half and each half sent again, down to single rows, which are
+        added to `failures` with their error. If the sink is unreachable the rest of the
+        batch is added to `failures` as it is.
+        """
+        try:
+            self.sink([json.loads(payload) for _, payload, _ in batch])
+            return batch
+        except Exception as e:
+            self.failed_flushes += 1
+            WRITE_QUEUE_SINK_ERRORS.inc()
+            unreachable = is_unreachable(e)
+            if unreachable or len(batch) == 1:
+                print(f"Error flushing {len(batch)} spooled profile(s): {e}")
+                failures.extend((row, str(e), unreachable) for row in batch)
+                return []
+        middle = len(batch) // 2
+        delivered = self._deliver(batch[:middle], failures)
+        if failures and failures[-1][2]:
+            failures.extend((row, failures[-1][1], True) for row in batch[middle:])
+            return delivered
+        return delivered + self._deliver(batch[middle:], failures)
+
+    def _schedule_retry(self, failures):
+        now = time.time()
+        updates = []
+        for (row_id, _, attempts), error, unreachable in failures:
+            attempts += 1
+            delay = min(self.retry_backoff * (2 ** (attempts - 1)), self.max_backoff)
+            # An outage backs rows off but doesn't give up on them
+            failed = 1 if attempts >= self.max_attempts and not unreachable else 0
+            updates.append((attempts, now + delay, failed, error, row_id))
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE profile_spool SET attempts = ?, next_attempt_at = ?, failed = ?, last_error = ? WHERE id = ?",
+                updates,
+            )
+
+    def retry_failed(self) -> int:
+        """Puts rows that exhausted their retries back in the queue."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE profile_spool SET failed = 0, attempts = 0, next_attempt_at = ? WHERE failed = 1",
+                (time.time(),),
+            )
+        self._wake.set()
+        return cursor.rowcount
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error in profile write-behind flusher: {e}")
+
+    def start(self):
+        """Starts the background flusher thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profile-write-behind", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stops the flusher thread. Spooled rows stay on disk for the next start."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _spool_counts(self):
+        """Returns (pending rows, failed rows, age in seconds of the oldest row)."""
+        with self._lock:
+            pending, failed, oldest = self._conn.execute(
+                "SELECT COALESCE(SUM(failed = 0), 0), COALESCE(SUM(failed = 1), 0), MIN(enqueued_at) FROM profile_spool"
+            ).fetchone()
+        return pending, failed, time.time() - oldest if oldest else 0.0
+
+    @staticmethod
+    def _publish(counts):
+        pending, failed, oldest_age = counts
+        WRITE_QUEUE_DEPTH.set(pending)
+        WRITE_QUEUE_FAILED_ROWS.set(failed)
+        WRITE_QUEUE_OLDEST_AGE.set(oldest_age)
+
+    def stats(self) -> dict:
+        """Returns queue depth, flush latency and failure counters."""
+        counts = self._spool_counts()
+        self._publish(counts)
+        pending, failed, oldest_age = counts
+        return {
+            "depth": pending,
+            "failed_rows": failed,
+            "oldest_age_seconds": oldest_age,
+            "flushed_rows": self.flushed_rows,
+            "flushed_batches": self.flushed_batches,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_latency": self.last_flush_latency,
+            "avg_flush_latency": self.total_flush_latency / self.flushed_batches if self.flushed_batches else None,
+        }
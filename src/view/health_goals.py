@@ -1,7 +1,10 @@
 import streamlit as st
 from streamlit_extras.stylable_container import stylable_container
 from src.config.form_defaults import FORM_FIELDS
+from src.utils.fragment_utils import section_fragment
+from src.utils.style_utils import display_term_suggestions
 
+@section_fragment
 def health_goals_form(user_profile, errors):
     """Renders the health goals section of the form."""
     with stylable_container(key="health_goals_container", css_styles='''
@@ -63,6 +66,7 @@ def health_goals_form(user_profile, errors):
         )
         if "interested_supplements" in errors:
             st.error(errors["interested_supplements"])
+        display_term_suggestions(interested_supplements, "interested_supplements")
 
         return {
             "health_goals": health_goals,
@@ -1,7 +1,9 @@
 import streamlit as st
 from streamlit_extras.stylable_container import stylable_container
 from src.config.form_defaults import FORM_FIELDS
+from src.utils.fragment_utils import section_fragment
 
+@section_fragment
 def lifestyle_form(user_profile, errors):
     """Renders the lifestyle section of the form."""
     with stylable_container(key="lifestyle_container", css_styles='''
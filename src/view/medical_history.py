@@ -1,7 +1,10 @@
 import streamlit as st
 from streamlit_extras.stylable_container import stylable_container
 from src.config.form_defaults import FORM_FIELDS
+from src.utils.fragment_utils import section_fragment
+from src.utils.style_utils import display_term_suggestions
 
+@section_fragment
 def medical_history_form(user_profile, sex, errors):
     """Renders the medical history section of the form."""
     with stylable_container(key="medical_history_container", css_styles='''
@@ -46,6 +49,7 @@ def medical_history_form(user_profile, sex, errors):
         )
         if "medical_conditions" in errors:
             st.error(errors["medical_conditions"])
+        display_term_suggestions(medical_conditions, "medical_conditions")
 
         return {
             "pregnant_or_breastfeeding": pregnant_or_breastfeeding,
@@ -1,7 +1,10 @@
 import streamlit as st
 from streamlit_extras.stylable_container import stylable_container
 from src.config.form_defaults import FORM_FIELDS
+from src.utils.fragment_utils import section_fragment
+from src.utils.style_utils import display_term_suggestions
 
+@section_fragment
 def medications_allergies_form(user_profile, errors):
     """Renders the medications and allergies section of the form."""
     with stylable_container(key="medications_allergies_container", css_styles='''
@@ -44,6 +47,7 @@ def medications_allergies_form(user_profile, errors):
         )
         if "current_medications" in errors:
             st.error(errors["current_medications"])
+        display_term_suggestions(medications, "current_medications")
         
         natural_supplements = st.text_area(
             "Please list any natural supplements you are currently taking and dosage.",
@@ -52,6 +56,7 @@ def medications_allergies_form(user_profile, errors):
         )
         if "natural_supplements" in errors:
             st.error(errors["natural_supplements"])
+        display_term_suggestions(natural_supplements, "natural_supplements")
         
         allergies = st.text_area(
             "Please list any known allergies.",
@@ -60,6 +65,7 @@ def medications_allergies_form(user_profile, errors):
         )
         if "allergies" in errors:
             st.error(errors["allergies"])
+        display_term_suggestions(allergies, "allergies")
 
         return {
             "current_medications": medications,
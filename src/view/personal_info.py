@@ -1,7 +1,9 @@
 import streamlit as st
 from src.config.form_defaults import FORM_FIELDS
 from streamlit_extras.stylable_container import stylable_container
+from src.utils.fragment_utils import section_fragment, rerun_app_on_change
 
+@section_fragment
 def personal_info_form(user_profile, errors):
     """Renders the personal information section of the form."""
     with stylable_container(key="personal_info_container", css_styles='''
@@ -63,6 +65,8 @@ def personal_info_form(user_profile, errors):
             ('Male', 'Female'),
             key="sex"
         )
+        # Sex drives the pregnancy question in the medical history section
+        rerun_app_on_change("sex", sex)
 
         return {
             "age_range": age_range,
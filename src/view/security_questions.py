@@ -1,7 +1,9 @@
 import streamlit as st
 from streamlit_extras.stylable_container import stylable_container
 from src.config.security_questions import SECURITY_QUESTIONS
+from src.utils.fragment_utils import section_fragment
 
+@section_fragment
 def security_questions_form(user_profile, errors):
     """Renders the security questions section of the form."""
     with stylable_container(key="security_questions_container", css_styles='''